@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Local cache for video analysis results
+Keyed by source content hash + normalized instruction + prompt version, so
+re-cutting or re-rendering the same video never repeats the model call
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from content_hash import source_identity
+from runtime_state import locked_json, state_path
+
+CACHE_PATH = Path(os.getenv('ANALYSIS_CACHE_PATH') or state_path('analysis_cache.json'))
+MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '200'))
+
+
+def normalize_instruction(instruction: str) -> str:
+    """Case and whitespace differences do not change the analysis"""
+    return ' '.join(instruction.split()).casefold()
+
+
+def cache_key(video_path: str, instruction: str, prompt_version: int) -> str:
+    """Hash of source identity, normalized instruction and prompt version"""
+    keyed = {
+        "source": source_identity(video_path),
+        "instruction": normalize_instruction(instruction),
+        "prompt_version": prompt_version
+    }
+    canonical = json.dumps(keyed, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    JSON-file cache of analysis results
+
+    Each entry holds the clip list returned by the model. Beyond
+    max_entries the least recently used entries are evicted.
+
+    Writes are merged into the file under a lock, so concurrent runs
+    keep each other's entries. Hits only touch memory; their use times
+    are persisted with the next write or at exit (flush).
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        self._changed: Set[str] = set()
+        self._used: Set[str] = set()
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        atexit.register(self.flush)
+
+    def _save(self):
+        with locked_json(self.path, {}) as stored:
+            for key in self._changed:
+                stored[key] = self.entries[key]
+            for key in self._used - self._changed:
+                if key in stored and key in self.entries:
+                    stored[key]['used_at'] = max(stored[key]['used_at'], self.entries[key]['used_at'])
+
+            if len(stored) > self.max_entries:
+                by_use = sorted(stored, key=lambda k: stored[k]['used_at'])
+                for key in by_use[:len(stored) - self.max_entries]:
+                    del stored[key]
+            self.entries = stored
+
+        self._changed.clear()
+        self._used.clear()
+
+    def flush(self):
+        """Persist use times of cache hits not yet written"""
+        with self._lock:
+            if self._used:
+                self._save()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached clips, or None if missing"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            entry['used_at'] = time.time()
+            self._used.add(key)
+            return entry['clips']
+
+    def put(self, key: str, clips: List[Dict], instruction: str = ''):
+        """Store the clips returned for one analysis"""
+        with self._lock:
+            now = time.time()
+            self.entries[key] = {
+                "clips": clips,
+                "instruction": instruction,
+                "created_at": now,
+                "used_at": now
+            }
+            self._changed.add(key)
+            self._save()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Analysis proxy generation
+Transcodes sources to a small low-fps proxy for model upload, cached per source
+"""
+
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+from media_probe import ProbeError, get_media_info
+from runtime_state import state_path
+
+PROXY_DIR = Path(os.getenv('ANALYSIS_PROXY_DIR') or state_path('analysis_proxy'))
+PROXY_HEIGHT = 360
+# Gemini samples video at 1 fps, so anything above that is wasted upload
+PROXY_FPS = 1
+PROXY_VIDEO_ARGS = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30', '-pix_fmt', 'yuv420p']
+PROXY_AUDIO_ARGS = ['-c:a', 'aac', '-ac', '1', '-ar', '16000', '-b:a', '32k']
+# PROXY_DIR is trimmed to this size, least recently used first; proxies
+# unused for PROXY_MAX_AGE are removed regardless
+PROXY_MAX_BYTES = float(os.getenv('ANALYSIS_PROXY_MAX_MB', '2048')) * 1024 * 1024
+PROXY_MAX_AGE = float(os.getenv('ANALYSIS_PROXY_MAX_AGE_DAYS', '14')) * 86400
+
+
+def proxy_name(identity: str) -> str:
+    """
+    File stem of the proxy of a source with this content identity
+
+    The proxy settings are part of the name, so changing PROXY_HEIGHT or
+    PROXY_FPS never reuses proxies made with the old ones.
+    """
+    return f"{identity.split(':')[-1]}_{PROXY_HEIGHT}p{PROXY_FPS}fps"
+
+
+def _use(path: Path) -> str:
+    """Mark a cached proxy as used (eviction goes by modification time)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return str(path)
+
+
+def evict_proxies(keep: Optional[Path] = None):
+    """Remove proxies and windows older than PROXY_MAX_AGE, then the oldest beyond PROXY_MAX_BYTES"""
+    now = time.time()
+    files = []
+    for path in PROXY_DIR.glob('*.mp4'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        # Temp files of a transcode in progress are left alone for a day
+        if path.name.startswith('.') and now - stat.st_mtime < 86400:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in sorted(files):
+        if path == keep or (total <= PROXY_MAX_BYTES and now - mtime < PROXY_MAX_AGE):
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def proxy_command(
+    video_path: str,
+    output_path: str,
+    audio: bool = True,
+    start: Optional[float] = None,
+    duration: Optional[float] = None
+) -> list:
+    """
+    ffmpeg command for the analysis proxy (or a window of it)
+
+    Without start/duration the whole source is transcoded and the fps
+    filter keeps frame timestamps on the source timeline, so times
+    reported against the proxy are valid for cutting the source. A
+    window starts at 0, i.e. its times are offset by start.
+    """
+    cmd = ['ffmpeg', '-v', 'error']
+    if start is not None:
+        cmd += ['-ss', f"{start:.3f}"]
+    cmd += ['-i', video_path]
+    if duration is not None:
+        cmd += ['-t', f"{duration:.3f}"]
+    cmd += [
+        '-map', '0:v:0',
+        '-vf', f"scale=-2:'min({PROXY_HEIGHT},ih)',fps={PROXY_FPS}",
+    ] + PROXY_VIDEO_ARGS
+    if audio:
+        cmd += ['-map', '0:a:0'] + PROXY_AUDIO_ARGS
+    return cmd + ['-sn', '-dn', '-movflags', '+faststart', '-y', output_path]
+
+
+def make_proxy(video_path: str) -> str:
+    """
+    Path of the analysis proxy for video_path, transcoding it if needed
+
+    Proxies are cached in PROXY_DIR by source content hash and proxy
+    settings (see proxy_name). Falls back to the source itself when it
+    cannot be probed or transcoded.
+    """
+    try:
+        info = get_media_info(video_path)
+    except ProbeError as e:
+        print(f"Cannot probe {video_path} for a proxy, using the source: {e}")
+        return video_path
+
+    proxy_path = PROXY_DIR / f"{proxy_name(info.identity)}.mp4"
+    if proxy_path.exists():
+        print(f"Using cached analysis proxy: {proxy_path}")
+        return _use(proxy_path)
+
+    PROXY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = proxy_path.with_name(f".{proxy_path.stem}.{os.getpid()}.mp4")
+    print(f"Creating analysis proxy ({PROXY_HEIGHT}p, {PROXY_FPS} fps, mono): {proxy_path}")
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(proxy_command(video_path, str(tmp_path), info.has_audio),
+                                capture_output=True, text=True)
+        error = result.stderr if result.returncode != 0 else None
+    except OSError as e:
+        error = str(e)
+    if error is not None:
+        print(f"Proxy transcode failed, using the source: {error}")
+        tmp_path.unlink(missing_ok=True)
+        return video_path
+
+    os.replace(tmp_path, proxy_path)
+    evict_proxies(keep=proxy_path)
+    source_mb = os.path.getsize(video_path) / (1024 * 1024)
+    proxy_mb = os.path.getsize(proxy_path) / (1024 * 1024)
+    print(f"Proxy ready in {time.perf_counter() - started:.1f}s: {source_mb:.1f} MB -> {proxy_mb:.1f} MB")
+    return str(proxy_path)
+
+
+def make_window(video_path: str, start: float, end: float) -> Optional[str]:
+    """
+    Path of a proxy clip covering [start, end) of video_path
+
+    Cut from the cached proxy (so the master is decoded only once) and
+    cached next to it. None if it cannot be made.
+    """
+    try:
+        info = get_media_info(video_path)
+    except ProbeError as e:
+        print(f"Cannot probe {video_path} for a window: {e}")
+        return None
+
+    name = proxy_name(info.identity)
+    window_path = PROXY_DIR / f"{name}_{start:g}-{end:g}.mp4"
+    if window_path.exists():
+        return _use(window_path)
+
+    proxy_path = PROXY_DIR / f"{name}.mp4"
+    proxy_path = _use(proxy_path) if proxy_path.exists() else make_proxy(video_path)
+    tmp_path = window_path.with_name(f".{window_path.stem}.{os.getpid()}.mp4")
+    try:
+        result = subprocess.run(
+            proxy_command(proxy_path, str(tmp_path), info.has_audio, start, end - start),
+            capture_output=True, text=True
+        )
+        error = result.stderr if result.returncode != 0 else None
+    except OSError as e:
+        error = str(e)
+    if error is not None:
+        print(f"Window {start:g}-{end:g}s failed: {error}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+    os.replace(tmp_path, window_path)
+    evict_proxies(keep=window_path)
+    return str(window_path)
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark for Ruby
+Klap submit → export → download → Blotato media upload → post, against local mock servers
+
+The mocks run in their own process (python -m mock_servers), so their CPU
+time and memory are not counted in the measured client process.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_SIZES = (1, 10, 100, 1000)
+STAGES = ('submit', 'process', 'export', 'download', 'media', 'post', 'total')
+# Mock routes that are file transfers, not API calls
+DOWNLOAD_ROUTES = ('GET /files/', 'GET /media/')
+# Client-side limits are lifted unless --rate-limits is given, so the
+# numbers show the pipeline itself rather than the configured budgets
+UNLIMITED = '1000000,1000000'
+MOCK_STARTUP_SECONDS = 10
+RATE_LIMIT_ENV = ('RATE_LIMIT_KLAP', 'RATE_LIMIT_BLOTATO', 'RATE_LIMIT_BLOTATO_V2_POSTS', 'RATE_LIMIT_BLOTATO_V2_MEDIA')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+async def run_videos(count: int, workers: int, work_dir: str, blotato_url: str) -> List[Dict]:
+    """
+    Push `count` fake sources through the whole flow, timing every stage
+
+    Media uploads and posts go through blotato_posting, the same
+    claim → send → record path the scheduling scripts use.
+    """
+    # Imported here: these modules read their paths and base URLs from the
+    # environment prepared by run_size()
+    from blotato_posting import schedule_post, upload_media
+    from download_manager import download_file
+    from http_transport import get_session
+    from klap_async import AsyncKlapAPI
+
+    klap = AsyncKlapAPI('benchmark')
+    blotato = get_session(blotato_url)
+    headers = {'Authorization': 'Bearer benchmark', 'Content-Type': 'application/json'}
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_video(i: int) -> Dict:
+        timings = {}
+        started = time.perf_counter()
+
+        def lap(stage: str, since: float) -> float:
+            now = time.perf_counter()
+            timings[stage] = now - since
+            return now
+
+        async with semaphore:
+            try:
+                t = time.perf_counter()
+                task = await klap.create_shorts_task(
+                    f"https://example.com/source_{i:04d}.mp4", target_clip_count=3
+                )
+                t = lap('submit', t)
+
+                await klap.wait_for_completion(task['id'])
+                shorts = await klap.get_shorts(task['output_id'])
+                t = lap('process', t)
+
+                top = max(shorts, key=lambda s: s.get('virality_score', 0))
+                export = await klap.export_short(task['output_id'], top['id'])
+                src_url = await klap.wait_for_export(
+                    task['output_id'], top['id'], export['id'], duration=top.get('duration')
+                )
+                t = lap('export', t)
+
+                path = os.path.join(work_dir, f"source_{i:04d}", 'short.mp4')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                record = await asyncio.to_thread(download_file, src_url, path)
+                os.remove(path)
+                t = lap('download', t)
+
+                media_url = await asyncio.to_thread(upload_media, blotato, blotato_url, headers, src_url)
+                if not media_url:
+                    raise RuntimeError(f"media upload failed for {src_url}")
+                t = lap('media', t)
+
+                scheduled_time = '2030-01-01T12:00:00Z'
+                payload = {
+                    'post': {
+                        'accountId': 'benchmark',
+                        'content': {'text': top.get('caption', ''), 'mediaUrls': [media_url], 'platform': 'tiktok'},
+                        'target': {'targetType': 'tiktok'}
+                    },
+                    'scheduledTime': scheduled_time
+                }
+                outcome = await asyncio.to_thread(
+                    schedule_post, blotato, blotato_url, headers,
+                    f"tiktok|source_{i:04d}.mp4|{scheduled_time}", payload, 'tiktok'
+                )
+                if outcome['status'] != 'scheduled':
+                    raise RuntimeError(f"post {outcome['status']}: {outcome.get('error')}")
+                lap('post', t)
+                timings['bytes'] = record['size']
+            except Exception as e:
+                timings['error'] = str(e)
+            timings['total'] = time.perf_counter() - started
+            return timings
+
+    return await asyncio.gather(*(run_video(i) for i in range(count)))
+
+
+def start_mocks(count: int, options: Dict, stats_path: str) -> Tuple[subprocess.Popen, str, str]:
+    """
+    Start the mock servers in their own process on free ports
+
+    Returns:
+        (process, Klap base URL, Blotato base URL)
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'mock_servers',
+            '--klap-port', '0', '--blotato-port', '0',
+            '--latency', str(options['latency']),
+            '--latency-jitter', str(options['latency']),
+            '--task-seconds', str(options['task_seconds']),
+            '--export-seconds', str(options['export_seconds']),
+            '--error-rate', str(options['error_rate']),
+            '--throttle-rate', str(options['throttle_rate']),
+            '--file-mb', str(options['file_mb']),
+            '--seed', str(count),
+            '--stats-file', stats_path
+        ],
+        cwd=Path(__file__).parent,
+        stdout=subprocess.PIPE,
+        text=True
+    )
+
+    urls = {}
+    deadline = time.time() + MOCK_STARTUP_SECONDS
+    while len(urls) < 2 and time.time() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        name, _, url = line.partition(':')
+        if name in ('Mock Klap API', 'Mock Blotato API'):
+            urls[name] = url.strip()
+    if len(urls) < 2:
+        process.kill()
+        raise RuntimeError("Mock servers did not start")
+    return process, urls['Mock Klap API'], urls['Mock Blotato API']
+
+
+def stop_mocks(process: subprocess.Popen, stats_path: str) -> Dict[str, Dict[str, int]]:
+    """Stop the mock servers and return their per-route call counts"""
+    process.terminate()
+    process.communicate(timeout=30)
+    with open(stats_path) as f:
+        return json.load(f)
+
+
+def run_size(count: int, options: Dict) -> Dict:
+    """Benchmark one batch size in a fresh process with its own mocks and state"""
+    work_dir = tempfile.mkdtemp(prefix=f"ruby_bench_{count}_")
+    stats_path = os.path.join(work_dir, 'mock_calls.json')
+    mocks, klap_url, blotato_url = start_mocks(count, options, stats_path)
+
+    os.environ.update(
+        KLAP_BASE_URL=klap_url,
+        BLOTATO_BASE_URL=blotato_url,
+        RUBY_STATE_DIR=work_dir,
+        RUBY_JOB_DB=os.path.join(work_dir, 'jobs.sqlite3'),
+        KLAP_CACHE_PATH=os.path.join(work_dir, 'klap_cache.json'),
+        CONTENT_HASH_CACHE_PATH=os.path.join(work_dir, 'content_hash_cache.json'),
+        KLAP_ETA_PATH=os.path.join(work_dir, 'klap_eta.json'),
+        RATE_LIMIT_DIR=os.path.join(work_dir, 'rate_limits'),
+    )
+    if not options['rate_limits']:
+        os.environ.update({name: UNLIMITED for name in RATE_LIMIT_ENV})
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        results = asyncio.run(run_videos(count, options['workers'], work_dir, blotato_url))
+    wall = time.perf_counter() - started
+
+    calls = stop_mocks(mocks, stats_path)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    api_calls = sum(
+        n for server_calls in calls.values()
+        for route, n in server_calls.items()
+        if not route.startswith(DOWNLOAD_ROUTES)
+    )
+    ok = [r for r in results if 'error' not in r]
+    total_bytes = sum(r['bytes'] for r in ok)
+
+    return {
+        "videos": count,
+        "workers": options['workers'],
+        "errors": len(results) - len(ok),
+        "wall_seconds": round(wall, 3),
+        "videos_per_second": round(len(ok) / wall, 3),
+        "download_mb_per_second": round(total_bytes / wall / (1024 * 1024), 2),
+        "api_calls_per_video": round(api_calls / count, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": {
+            stage: {
+                f"p{pct}": round(percentile([r[stage] for r in ok if stage in r], pct), 3)
+                for pct in (50, 95, 99)
+            }
+            for stage in STAGES
+        },
+        "sample_errors": sorted({r['error'] for r in results if 'error' in r})[:5]
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n=== {report['videos']} videos ({report['workers']} workers) ===")
+    print(f"Wall time:      {report['wall_seconds']:.1f}s")
+    print(f"Throughput:     {report['videos_per_second']:.2f} videos/s, "
+          f"{report['download_mb_per_second']:.1f} MB/s downloaded")
+    print(f"API calls:      {report['api_calls_per_video']:.1f} per video")
+    print(f"Peak RSS:       {report['peak_rss_mb']:.0f} MB")
+    print(f"Errors:         {report['errors']}")
+    for error in report['sample_errors']:
+        print(f"  - {error[:100]}")
+    print(f"\n  {'stage':<10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for stage, stats in report['stages'].items():
+        print(f"  {stage:<10}{stats['p50']:>8.2f}s{stats['p95']:>8.2f}s{stats['p99']:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the clip-and-post pipeline against local mock servers")
+    parser.add_argument('sizes', nargs='*', type=int, default=list(DEFAULT_SIZES), help='batch sizes (default: 1 10 100 1000)')
+    parser.add_argument('--workers', type=int, default=100, help='videos in flight at once')
+    parser.add_argument('--task-seconds', type=float, default=10.0, help='mock Klap processing time')
+    parser.add_argument('--export-seconds', type=float, default=3.0, help='mock export time')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock per-request latency (and jitter)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--file-mb', type=float, default=5.0, help='size of each fake short')
+    parser.add_argument('--rate-limits', action='store_true', help='keep the configured client rate limits')
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    options = vars(args)
+    reports = []
+    for count in args.sizes:
+        print(f"\nRunning {count} videos...")
+        # One process per size: separate peak RSS and no shared sessions/state
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            report = pool.submit(run_size, count, options).result()
+        print_report(report)
+        reports.append(report)
+
+    with open(args.output, 'w') as f:
+        json.dump({"options": options, "runs": reports}, f, indent=2)
+
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Blotato posting steps
+Media upload and the claim → send → record sequence of one scheduled post
+"""
+
+from typing import Dict, Optional
+
+import metrics
+from http_transport import request_sent
+from job_store import MEDIA, POST, get_job_store
+
+UNCONFIRMED = 'Unconfirmed submission from previous run'
+
+
+def upload_media(session, base_url: str, headers: Dict, source_url: str) -> Optional[str]:
+    """
+    Blotato media URL of source_url, uploading it unless a previous run did
+
+    Returns:
+        The hosted URL, or None when the upload failed (recorded in the
+        job store, so the next run tries again)
+    """
+    jobs = get_job_store()
+    media_job = jobs.get(MEDIA, source_url)
+    if media_job and media_job['status'] == 'uploaded':
+        print(f"  ⏭️  Already uploaded: {media_job['data']['blotato_url']}")
+        return media_job['data']['blotato_url']
+
+    try:
+        response = session.post(f'{base_url}/v2/media', headers=headers, json={'url': source_url})
+        if response.status_code in [200, 201]:
+            blotato_url = response.json().get('url')
+            jobs.update(MEDIA, source_url, 'uploaded', blotato_url=blotato_url)
+            print(f"  ✅ Blotato URL: {blotato_url}")
+            return blotato_url
+        print(f"  ❌ Error: {response.text[:100]}")
+        jobs.fail(MEDIA, source_url, response.text[:200])
+    except Exception as e:
+        print(f"  ❌ Exception: {str(e)}")
+        jobs.fail(MEDIA, source_url, str(e))
+    return None
+
+
+def schedule_post(session, base_url: str, headers: Dict, key: str, payload: Dict, platform: str) -> Dict:
+    """
+    Claim, send and record one scheduled post
+
+    The post is claimed in the job store under `key` before it is sent,
+    so a post a previous run scheduled is skipped. If a previous run may
+    already have sent it (still 'submitting') it is skipped as well and
+    reported as an error. A request that fails after it was sent leaves
+    the job 'submitting', because Blotato may have created the post.
+    Check Blotato, then run `job_store.py confirm` or `retry`.
+
+    Returns:
+        {"status": "scheduled", "submission_id": ...}, {"status": "skipped"}
+        or {"status": "error", "error": ...}
+    """
+    jobs = get_job_store()
+    if not jobs.claim(POST, key, payload):
+        status = jobs.get(POST, key)['status']
+        print(f"   ⏭️  Skipping: {status} by a previous run")
+        if status == 'submitting':
+            return {"status": "error", "error": UNCONFIRMED}
+        return {"status": "skipped"}
+
+    try:
+        response = session.post(f'{base_url}/v2/posts', headers=headers, json=payload)
+    except Exception as e:
+        print(f"   ❌ Exception: {str(e)}")
+        if request_sent(e):
+            # Blotato may have created the post - leave it 'submitting', never resend blindly
+            print("   ⚠️  Unconfirmed - check Blotato, then run job_store.py confirm or retry")
+        else:
+            jobs.fail(POST, key, str(e))
+        metrics.POSTS.inc(platform=platform, result='error')
+        return {"status": "error", "error": str(e)}
+
+    if response.status_code not in [200, 201]:
+        error_msg = response.text[:200]
+        jobs.fail(POST, key, error_msg)
+        metrics.POSTS.inc(platform=platform, result='error')
+        print(f"   ❌ Error: {error_msg}")
+        return {"status": "error", "error": error_msg}
+
+    try:
+        result_data = response.json()
+    except ValueError:
+        result_data = {}
+    submission_id = result_data.get('id') or result_data.get('submissionId')
+
+    print(f"   ✅ Scheduled! ID: {submission_id}")
+    jobs.update(POST, key, 'scheduled', submission_id=submission_id)
+    metrics.POSTS.inc(platform=platform, result='scheduled')
+    return {"status": "scheduled", "submission_id": submission_id}
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
-import requests
-import time
+import asyncio
 import json
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from klap_async import AsyncKlapAPI
+from klap_pipeline import export_and_download
+from klap_selection import GlobalTopK
+
 API_KEY = os.getenv('KLAP_API_KEY')
 if not API_KEY:
     raise ValueError("KLAP_API_KEY environment variable not set")
-BASE_URL = "https://api.klap.app/v2"
 CLIP_SHORTS_DIR = "$CONTENT_DIR/ClipShorts"
+EXPORT_MAX_WAIT = 600
+# prepare_schedule.py fills 7 days x 4 posting slots; shorts beyond the
+# best 28 across all videos are never posted, so they are not exported
+SCHEDULE_SLOTS = 7 * 4
 
 tasks = [
     {"id": "8HL9qHpyeO1fISca", "folder": "UUk2UHxJ", "name": "Data-Privacy_FINAL"},
@@ -18,83 +26,29 @@ tasks = [
     {"id": "3IMgjJQT5r4rQkG4", "folder": "RHghepMF", "name": "vide_no_subs_2"}
 ]
 
-headers = {"Authorization": f"Bearer {API_KEY}"}
-
 os.makedirs(CLIP_SHORTS_DIR, exist_ok=True)
 
+# Create subfolder for each video
 for task in tasks:
-    print(f"\n{'='*60}")
-    print(f"Processing: {task['name']}")
-    print(f"{'='*60}\n")
-
-    # Create subfolder for this video
-    video_folder = os.path.join(CLIP_SHORTS_DIR, task['name'])
-    os.makedirs(video_folder, exist_ok=True)
-
-    # Get project details
-    response = requests.get(f"{BASE_URL}/projects/{task['folder']}", headers=headers)
-    shorts = response.json()
-
-    # Handle if response is a dict with 'projects' key or direct list
-    if isinstance(shorts, dict):
-        shorts = shorts.get('projects', [])
-
-    print(f"Found {len(shorts)} shorts for {task['name']}")
-
-    # Sort by virality score (descending)
-    shorts_sorted = sorted(shorts, key=lambda x: x.get('virality_score', 0), reverse=True)
+    task['dest_dir'] = os.path.join(CLIP_SHORTS_DIR, task['name'])
 
-    results = []
+print(f"Exporting and downloading shorts for {len(tasks)} videos...\n")
 
-    for idx, short in enumerate(shorts_sorted, 1):
-        project_id = short['id']
-        folder_id = task['folder']
-        score = short.get('virality_score', 0)
-        caption = short.get('caption', '')
+all_results = asyncio.run(export_and_download(
+    AsyncKlapAPI(API_KEY),
+    tasks,
+    export_max_wait=EXPORT_MAX_WAIT,
+    selection=GlobalTopK(SCHEDULE_SLOTS)
+))
 
-        print(f"\n  Short {idx}: Score {score} - Exporting...")
-
-        # Request export
-        export_response = requests.post(
-            f"{BASE_URL}/projects/{folder_id}/{project_id}/exports",
-            headers=headers,
-            json={}
-        )
-        export_data = export_response.json()
-        export_id = export_data['id']
-
-        # Poll for export completion
-        export_ready = False
-        while not export_ready:
-            export_status_response = requests.get(
-                f"{BASE_URL}/projects/{folder_id}/{project_id}/exports/{export_id}",
-                headers=headers
-            )
-            export_status = export_status_response.json()
-
-            if export_status.get('status') == 'ready':
-                export_ready = True
-                video_url = export_status['src_url']
-
-                # Download video
-                filename = f"short_{idx:02d}_score_{score}.mp4"
-                filepath = os.path.join(video_folder, filename)
-
-                print(f"  Downloading to: {filename}")
-                video_response = requests.get(video_url)
-                with open(filepath, 'wb') as f:
-                    f.write(video_response.content)
-
-                results.append({
-                    "filename": filename,
-                    "virality_score": score,
-                    "caption": caption,
-                    "video_url": video_url
-                })
+for task in tasks:
+    video_folder = task['dest_dir']
+    results = [r for r in all_results[task['name']] if 'error' not in r]
+    failed = len(all_results[task['name']]) - len(results)
 
-                print(f"  ✓ Saved: {filename}")
-            else:
-                time.sleep(2)
+    print(f"\n{'='*60}")
+    print(f"{task['name']}")
+    print(f"{'='*60}")
 
     # Save metadata
     metadata_path = os.path.join(video_folder, "klap_results.json")
@@ -105,10 +59,12 @@ for task in tasks:
             "shorts": results
         }, f, indent=2)
 
-    print(f"\n  ✓ Metadata saved: klap_results.json")
-    print(f"  ✓ All {len(results)} shorts downloaded to: {video_folder}")
+    print(f"  ✓ Metadata saved: klap_results.json")
+    print(f"  ✓ {len(results)} shorts downloaded to: {video_folder}")
+    if failed:
+        print(f"  ✗ {failed} shorts failed (see log above)")
 
 print(f"\n\n{'='*60}")
-print("✓ ALL VIDEOS PROCESSED SUCCESSFULLY")
+print("✓ ALL VIDEOS PROCESSED")
 print(f"{'='*60}")
 print(f"\nLocation: {CLIP_SHORTS_DIR}")
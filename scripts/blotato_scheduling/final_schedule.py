@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import json
-import requests
 import subprocess
-import time
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from blotato_posting import UNCONFIRMED, schedule_post
+from http_transport import get_session
+from job_store import POST, get_job_store
 
 # Load config
 with open('.claude/skills/blotato-posting/config.json') as f:
@@ -22,20 +27,34 @@ headers = {
     'Authorization': f'Bearer {API_KEY}',
     'Content-Type': 'application/json'
 }
+session = get_session(BASE_URL)
+jobs = get_job_store()
 
 # Load schedule
 with open('posting_schedule.json') as f:
     schedule = json.load(f)
 
-# Load already scheduled results to skip
-scheduled_ids = []
+
+def post_key(item):
+    return f"{item['platform']}|{item['video']['filename']}|{item['scheduled_time']}"
+
+
+# Import results of runs made before the job store existed
 if os.path.exists('scheduling_results.json'):
     with open('scheduling_results.json') as f:
         prev_results = json.load(f)
-        scheduled_ids = [r['index'] for r in prev_results.get('scheduled', [])]
+    for r in prev_results.get('scheduled', []):
+        key = f"{r['platform']}|{r['filename']}|{r['scheduled_time']}"
+        if not jobs.get(POST, key):
+            jobs.update(POST, key, 'scheduled', submission_id=r.get('submission_id'))
+
+already_scheduled = sum(
+    1 for item in schedule
+    if (jobs.get(POST, post_key(item)) or {}).get('status') == 'scheduled'
+)
 
 print(f"Scheduling {len(schedule)} videos...")
-print(f"Already scheduled: {len(scheduled_ids)}")
+print(f"Already scheduled: {already_scheduled}")
 print("="*60)
 
 results = []
@@ -43,8 +62,14 @@ errors = []
 cloudinary_uploads = {}
 
 for idx, item in enumerate(schedule, 1):
-    if idx in scheduled_ids:
-        print(f"\n{idx}/{len(schedule)} - Skipping (already scheduled)")
+    key = post_key(item)
+    post_job = jobs.get(POST, key)
+    if post_job and post_job['status'] != 'error':
+        # Scheduled or possibly sent by a previous run - no need to upload again
+        print(f"\n{idx}/{len(schedule)} - Skipping ({post_job['status']} by a previous run)")
+        if post_job['status'] == 'submitting':
+            errors.append({'video': item['video']['filename'], 'platform': item['platform'],
+                           'error': UNCONFIRMED})
         continue
 
     video = item['video']
@@ -142,48 +167,25 @@ for idx, item in enumerate(schedule, 1):
             'isReel': True  # MARK AS REEL!
         })
 
-    # Schedule
-    try:
-        response = requests.post(
-            f'{BASE_URL}/v2/posts',
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code in [200, 201]:
-            result_data = response.json()
-            submission_id = result_data.get('id') or result_data.get('submissionId')
-
-            print(f"   ✅ Scheduled! ID: {submission_id}")
-
-            results.append({
-                'index': idx,
-                'platform': platform,
-                'filename': filename,
-                'score': video['score'],
-                'scheduled_time': scheduled_time,
-                'submission_id': submission_id,
-                'status': 'scheduled'
-            })
-        else:
-            error_msg = response.text[:200]
-            print(f"   ❌ Error: {error_msg}")
-            errors.append({
-                'video': filename,
-                'platform': platform,
-                'error': error_msg
-            })
+    outcome = schedule_post(session, BASE_URL, headers, key, payload, platform)
 
-    except Exception as e:
-        print(f"   ❌ Exception: {str(e)}")
+    if outcome['status'] == 'scheduled':
+        results.append({
+            'index': idx,
+            'platform': platform,
+            'filename': filename,
+            'score': video['score'],
+            'scheduled_time': scheduled_time,
+            'submission_id': outcome['submission_id'],
+            'status': 'scheduled'
+        })
+    elif outcome['status'] == 'error':
         errors.append({
             'video': filename,
             'platform': platform,
-            'error': str(e)
+            'error': outcome['error']
         })
 
-    time.sleep(1)
-
 print("\n\n" + "="*60)
 print("SCHEDULING COMPLETE")
 print("="*60)
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 import json
-import requests
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from blotato_posting import schedule_post
+from http_transport import get_session
 
 # Load config
 with open('.claude/skills/blotato-posting/config.json') as f:
@@ -15,6 +19,7 @@ headers = {
     'Authorization': f'Bearer {API_KEY}',
     'Content-Type': 'application/json'
 }
+session = get_session(BASE_URL)
 
 # Load schedule
 with open('posting_schedule.json') as f:
@@ -113,49 +118,27 @@ for idx, item in enumerate(schedule, 1):
             'isReel': True  # Mark as Reel (this may be the key field)
         })
 
-    # Make API call
-    try:
-        response = requests.post(
-            f'{BASE_URL}/v2/posts',
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code == 200 or response.status_code == 201:
-            result_data = response.json()
-            submission_id = result_data.get('id') or result_data.get('submissionId')
-
-            print(f"   ✅ Scheduled! ID: {submission_id}")
-
-            results.append({
-                'index': idx,
-                'platform': platform,
-                'filename': filename,
-                'score': video['score'],
-                'scheduled_time': scheduled_time,
-                'submission_id': submission_id,
-                'status': 'scheduled'
-            })
-        else:
-            error_msg = response.text
-            print(f"   ❌ Error: {error_msg}")
-            errors.append({
-                'video': filename,
-                'platform': platform,
-                'error': error_msg
-            })
-
-    except Exception as e:
-        print(f"   ❌ Exception: {str(e)}")
+    # Skipped if a previous run scheduled or may already have sent it
+    post_key = f"{platform}|{filename}|{scheduled_time}"
+    outcome = schedule_post(session, BASE_URL, headers, post_key, payload, platform)
+
+    if outcome['status'] == 'scheduled':
+        results.append({
+            'index': idx,
+            'platform': platform,
+            'filename': filename,
+            'score': video['score'],
+            'scheduled_time': scheduled_time,
+            'submission_id': outcome['submission_id'],
+            'status': 'scheduled'
+        })
+    elif outcome['status'] == 'error':
         errors.append({
             'video': filename,
             'platform': platform,
-            'error': str(e)
+            'error': outcome['error']
         })
 
-    # Rate limiting - wait 1 second between posts
-    time.sleep(1)
-
 print("\n\n" + "="*60)
 print("SCHEDULING COMPLETE")
 print("="*60)
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 import json
-import requests
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from blotato_posting import schedule_post, upload_media
+from http_transport import get_session
 
 # Load config
 with open('.claude/skills/blotato-posting/config.json') as f:
@@ -15,6 +19,7 @@ headers = {
     'Authorization': f'Bearer {API_KEY}',
     'Content-Type': 'application/json'
 }
+session = get_session(BASE_URL)
 
 # Dropbox URLs (change dl=0 to dl=1 for direct download)
 dropbox_videos = {
@@ -34,25 +39,9 @@ for filename, dropbox_url in dropbox_videos.items():
     print(f"\nUploading: {filename}")
     print(f"  From: {dropbox_url[:60]}...")
 
-    try:
-        response = requests.post(
-            f'{BASE_URL}/v2/media',
-            headers=headers,
-            json={'url': dropbox_url}
-        )
-
-        if response.status_code in [200, 201]:
-            result = response.json()
-            blotato_url = result.get('url')
-            blotato_urls[filename] = blotato_url
-            print(f"  ✅ Blotato URL: {blotato_url}")
-        else:
-            print(f"  ❌ Error: {response.text[:100]}")
-
-    except Exception as e:
-        print(f"  ❌ Exception: {str(e)}")
-
-    time.sleep(2)  # Wait longer for large files
+    blotato_url = upload_media(session, BASE_URL, headers, dropbox_url)
+    if blotato_url:
+        blotato_urls[filename] = blotato_url
 
 print(f"\n✓ Uploaded {len(blotato_urls)} videos to Blotato")
 
@@ -148,39 +137,22 @@ for item in schedule:
             'isAiGenerated': True
         })
 
-    # Schedule
-    try:
-        response = requests.post(
-            f'{BASE_URL}/v2/posts',
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code in [200, 201]:
-            result_data = response.json()
-            submission_id = result_data.get('id') or result_data.get('submissionId')
-
-            print(f"   ✅ Scheduled! ID: {submission_id}")
-
-            results.append({
-                'platform': platform,
-                'filename': filename,
-                'score': video['score'],
-                'scheduled_time': scheduled_time,
-                'submission_id': submission_id,
-                'caption': caption,
-                'status': 'scheduled'
-            })
-        else:
-            error_msg = response.text[:200]
-            print(f"   ❌ Error: {error_msg}")
-            errors.append({'video': filename, 'platform': platform, 'error': error_msg})
-
-    except Exception as e:
-        print(f"   ❌ Exception: {str(e)}")
-        errors.append({'video': filename, 'platform': platform, 'error': str(e)})
-
-    time.sleep(1)
+    # Skipped if a previous run scheduled or may already have sent it
+    post_key = f"{platform}|{filename}|{scheduled_time}"
+    outcome = schedule_post(session, BASE_URL, headers, post_key, payload, platform)
+
+    if outcome['status'] == 'scheduled':
+        results.append({
+            'platform': platform,
+            'filename': filename,
+            'score': video['score'],
+            'scheduled_time': scheduled_time,
+            'submission_id': outcome['submission_id'],
+            'caption': caption,
+            'status': 'scheduled'
+        })
+    elif outcome['status'] == 'error':
+        errors.append({'video': filename, 'platform': platform, 'error': outcome['error']})
 
 print("\n\n" + "="*60)
 print("SCHEDULING COMPLETE")
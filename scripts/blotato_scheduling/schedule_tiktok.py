@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 import json
-import requests
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from blotato_posting import schedule_post
+from http_transport import get_session
 
 # Load config
 with open('.claude/skills/blotato-posting/config.json') as f:
@@ -15,6 +19,7 @@ headers = {
     'Authorization': f'Bearer {API_KEY}',
     'Content-Type': 'application/json'
 }
+session = get_session(BASE_URL)
 
 # Cloudinary URLs we just uploaded
 cloudinary_urls = {
@@ -86,38 +91,21 @@ for idx, item in enumerate(tiktok_posts, 1):
         'scheduledTime': scheduled_time
     }
 
-    # Schedule
-    try:
-        response = requests.post(
-            f'{BASE_URL}/v2/posts',
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code in [200, 201]:
-            result_data = response.json()
-            submission_id = result_data.get('id') or result_data.get('submissionId')
-
-            print(f"   ✅ Scheduled! ID: {submission_id}")
-
-            results.append({
-                'platform': 'tiktok',
-                'filename': filename,
-                'score': video['score'],
-                'scheduled_time': scheduled_time,
-                'submission_id': submission_id,
-                'status': 'scheduled'
-            })
-        else:
-            error_msg = response.text[:200]
-            print(f"   ❌ Error: {error_msg}")
-            errors.append({'video': filename, 'error': error_msg})
-
-    except Exception as e:
-        print(f"   ❌ Exception: {str(e)}")
-        errors.append({'video': filename, 'error': str(e)})
-
-    time.sleep(1)
+    # Skipped if a previous run scheduled or may already have sent it
+    post_key = f"tiktok|{filename}|{scheduled_time}"
+    outcome = schedule_post(session, BASE_URL, headers, post_key, payload, 'tiktok')
+
+    if outcome['status'] == 'scheduled':
+        results.append({
+            'platform': 'tiktok',
+            'filename': filename,
+            'score': video['score'],
+            'scheduled_time': scheduled_time,
+            'submission_id': outcome['submission_id'],
+            'status': 'scheduled'
+        })
+    elif outcome['status'] == 'error':
+        errors.append({'video': filename, 'error': outcome['error']})
 
 print("\n\n" + "="*60)
 print("TIKTOK SCHEDULING COMPLETE")
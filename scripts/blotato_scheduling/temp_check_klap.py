@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
+import asyncio
 import os
-import requests
-import time
-import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from klap_async import AsyncKlapAPI
+from klap_monitor import KlapMonitor
 
 API_KEY = os.getenv('KLAP_API_KEY')
 if not API_KEY:
     raise ValueError("KLAP_API_KEY environment variable not set")
-BASE_URL = "https://api.klap.app/v2"
 
 tasks = [
     {"id": "8HL9qHpyeO1fISca", "folder": "UUk2UHxJ", "name": "Data-Privacy_FINAL"},
@@ -16,36 +19,26 @@ tasks = [
     {"id": "3IMgjJQT5r4rQkG4", "folder": "RHghepMF", "name": "vide_no_subs_2"}
 ]
 
-headers = {"Authorization": f"Bearer {API_KEY}"}
-
-print("Checking status of all 4 tasks...\n")
+klap = AsyncKlapAPI(API_KEY)
+monitor = KlapMonitor(klap)
 
-for task in tasks:
-    response = requests.get(f"{BASE_URL}/tasks/{task['id']}", headers=headers)
-    data = response.json()
-    print(f"{task['name']}: {data['status']}")
 
-print("\n" + "="*50)
-print("Waiting for all tasks to complete...")
-print("="*50 + "\n")
+def show(item):
+    print(f"{item.name}: {item.status}" + (f" ({item.error})" if item.error else ""))
 
-all_ready = False
-while not all_ready:
-    all_ready = True
-    statuses = []
 
-    for task in tasks:
-        response = requests.get(f"{BASE_URL}/tasks/{task['id']}", headers=headers)
-        data = response.json()
-        status = data['status']
-        statuses.append(f"{task['name']}: {status}")
+for event in ("ready", "error", "timeout"):
+    monitor.on(event, show)
 
-        if status != "ready":
-            all_ready = False
+print(f"Waiting for all {len(tasks)} tasks to complete...\n")
 
-    print("\r" + " | ".join(statuses), end="", flush=True)
+for task in tasks:
+    monitor.watch_task(task['id'], name=task['name'])
 
-    if not all_ready:
-        time.sleep(30)
+items = asyncio.run(monitor.run())
 
-print("\n\n✓ All tasks complete!")
+failed = [item.name for item in items.values() if item.status != "ready"]
+if failed:
+    print(f"\n✗ Not ready: {', '.join(failed)}")
+else:
+    print("\n✓ All tasks complete!")
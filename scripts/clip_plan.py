@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Clip plans
+Parses clip timestamps into float-second segments and merges overlapping ranges into spans
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Segments closer than this (about a frame) are cut as one span
+ADJACENT_GAP = 0.05
+
+# [[HH:]MM:]SS[.mmm], with "," accepted for the fraction (SRT style)
+_TIMESTAMP = re.compile(r'^(?:(?:(\d+):)?(\d+):)?(\d+(?:[.,]\d+)?)$')
+
+
+def parse_timestamp(value) -> float:
+    """
+    Seconds from 90, 90.5, "90.5", "01:30", "1:30.250" or "01:02:03.500"
+
+    Raises:
+        ValueError: if value is not a valid, non-negative timestamp
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        match = _TIMESTAMP.match(str(value).strip())
+        if not match:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        hours, minutes, secs = match.groups()
+        secs = float(secs.replace(',', '.'))
+        if (minutes is not None and secs >= 60) or (hours is not None and int(minutes) >= 60):
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        seconds = int(hours or 0) * 3600 + int(minutes or 0) * 60 + secs
+
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return seconds
+
+
+class ClipSegment:
+    """One output clip: [start, end) of the source, in seconds"""
+
+    __slots__ = ('start', 'end', 'output_path', 'metadata')
+
+    def __init__(self, start: float, end: float, output_path: Optional[str] = None,
+                 metadata: Optional[Dict] = None):
+        self.start = start
+        self.end = end
+        self.output_path = output_path
+        self.metadata = metadata or {}
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"ClipSegment({self.start:.3f}, {self.end:.3f}, {self.output_path!r})"
+
+
+class Span:
+    """A source range decoded and encoded once, and the segments sliced from it"""
+
+    __slots__ = ('start', 'end', 'segments')
+
+    def __init__(self, start: float, end: float, segments: List[ClipSegment]):
+        self.start = start
+        self.end = end
+        self.segments = segments
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Span({self.start:.3f}, {self.end:.3f}, {len(self.segments)} segments)"
+
+
+class ClipPlan:
+    """
+    The clips to cut from one source
+
+    Segments are validated against the source duration when it is
+    known: ends past it are clamped, and unusable clips are recorded in
+    rejected as (metadata, reason) instead of being cut.
+    """
+
+    __slots__ = ('source', 'duration', 'segments', 'rejected')
+
+    def __init__(self, source: str, duration: Optional[float] = None):
+        self.source = source
+        self.duration = duration
+        self.segments: List[ClipSegment] = []
+        self.rejected: List[Tuple[Dict, str]] = []
+
+    def add(self, start, end, output_path: Optional[str] = None,
+            metadata: Optional[Dict] = None) -> Optional[ClipSegment]:
+        """Parse and validate one clip; None if it was rejected"""
+        metadata = metadata or {}
+        try:
+            start, end = parse_timestamp(start), parse_timestamp(end)
+        except ValueError as e:
+            self.rejected.append((metadata, str(e)))
+            return None
+
+        if self.duration:
+            if start >= self.duration:
+                self.rejected.append((metadata, f"starts after the end of the {self.duration:.2f}s source"))
+                return None
+            end = min(end, self.duration)
+        if end <= start:
+            self.rejected.append((metadata, "ends before it starts"))
+            return None
+
+        segment = ClipSegment(start, end, output_path, metadata)
+        self.segments.append(segment)
+        return segment
+
+    @classmethod
+    def from_clips(cls, source: str, clips: List[Dict], duration: Optional[float] = None) -> 'ClipPlan':
+        """Plan from analysis results ({"start_time", "end_time", ...} dicts)"""
+        plan = cls(source, duration)
+        for clip in clips:
+            plan.add(clip.get('start_time'), clip.get('end_time'), metadata=clip)
+        return plan
+
+    def spans(self, merge: bool = True, max_gap: float = ADJACENT_GAP) -> List[Span]:
+        """
+        Segments grouped into spans, in source order
+
+        With merge, overlapping segments and segments less than max_gap
+        apart share a span, so their common range is encoded once;
+        otherwise every segment is its own span.
+        """
+        spans: List[Span] = []
+        for segment in sorted(self.segments, key=lambda s: (s.start, s.end)):
+            if merge and spans and segment.start <= spans[-1].end + max_gap:
+                spans[-1].segments.append(segment)
+                spans[-1].end = max(spans[-1].end, segment.end)
+            else:
+                spans.append(Span(segment.start, segment.end, [segment]))
+        return spans
@@ -5,16 +5,45 @@ Uses Gemini 1.5 Pro to analyze video and FFmpeg to extract clips
 """
 
 import json
-import subprocess
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def analyze_video_with_gemini(video_path, instruction):
+import metrics
+from analysis_cache import AnalysisCache, cache_key as analysis_cache_key
+from analysis_proxy import make_proxy, make_window
+from clip_plan import ClipPlan, parse_timestamp
+from media_probe import ProbeError, get_media_info
+from multi_clip import extract_clips, extract_span
+from render_pool import render_parallel, run_ffmpeg
+from smart_cut import smart_cut
+from vertical_render import render_plan
+from windowed_analysis import WORKERS, merge_clips, plan_windows, to_source
+
+# Bump when the prompt or the expected response changes, so cached
+# analyses made with the old prompt are not reused
+PROMPT_VERSION = 2
+
+def analyze_video_with_gemini(video_path, instruction, use_cache=True, proxy=True, cache=None):
     """
     Call Gemini via gemini-agent to get clip timestamps
     Returns JSON with clip segments
+
+    Results are cached per source content, normalized instruction and
+    PROMPT_VERSION (see analysis_cache.py); use_cache=False forces a
+    new analysis. proxy=False uploads video_path as is (it already is a
+    proxy or window).
     """
+    cache = cache or AnalysisCache()
+    key = analysis_cache_key(video_path, instruction, PROMPT_VERSION)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"Using cached analysis for: {video_path}")
+            return cached
+
     # Escape quotes in instruction
     instruction_escaped = instruction.replace('"', '\\"')
 
@@ -26,11 +55,13 @@ Return ONLY a JSON array with this exact structure (no markdown, no explanation)
     "start_time": "MM:SS",
     "end_time": "MM:SS",
     "description": "Brief description of what happens in this clip",
-    "reason": "Why this clip matches the instruction"
+    "reason": "Why this clip matches the instruction",
+    "score": 8
   }}
 ]
 
 Make sure timestamps are in MM:SS format (e.g., "01:30" for 1 minute 30 seconds).
+Score each clip from 1 to 10 for how well it matches the instruction.
 Identify 3-5 of the most compelling clips that match the instruction.'''
 
     # Call gemini-agent sub-agent
@@ -42,57 +73,138 @@ Identify 3-5 of the most compelling clips that match the instruction.'''
     ]
 
     # Note: You'd need to upload video to Gemini first
-    # For now, using file path - actual implementation needs File API
-    print(f"Analyzing video with Gemini: {video_path}")
+    # For now, using file path - actual implementation needs File API.
+    # Upload the small analysis proxy, not the master; it keeps the
+    # source timeline, so returned timestamps apply to video_path
+    upload_path = make_proxy(video_path) if proxy else video_path
+    print(f"Analyzing video with Gemini: {video_path} (uploading {upload_path})")
     print(f"Instruction: {instruction}")
 
     # For testing, return mock data
     # In production, parse result from gemini-agent
-    return [
+    clips = [
         {
             "start_time": "01:30",
             "end_time": "02:45",
             "description": "90% failure rate discussion",
-            "reason": "Key insight about implementation failures"
+            "reason": "Key insight about implementation failures",
+            "score": 9
         },
         {
             "start_time": "05:10",
             "end_time": "06:20",
             "description": "Human resistance factor",
-            "reason": "Important psychological barrier explanation"
+            "reason": "Important psychological barrier explanation",
+            "score": 7
         }
     ]
+    cache.put(key, clips, instruction)
+    return clips
+
+def analyze_video_windowed(video_path, instruction, use_cache=True):
+    """
+    Analyze a long video as overlapping windows, in parallel
+
+    Each window (see windowed_analysis.py) is cut from the analysis proxy
+    and analyzed on its own; clip times are shifted back to the source
+    timeline, then duplicates from overlapping windows are merged and the
+    best clips kept. Latency follows the slowest window, not the length
+    of the video. Short or unreadable videos get a single analysis.
+    """
+    try:
+        duration = get_media_info(video_path).duration
+    except ProbeError as e:
+        print(f"Cannot probe {video_path}, analyzing it whole: {e}")
+        return analyze_video_with_gemini(video_path, instruction, use_cache)
+
+    windows = plan_windows(duration)
+    if len(windows) == 1:
+        return analyze_video_with_gemini(video_path, instruction, use_cache)
+
+    print(f"Analyzing {duration / 60:.1f} min in {len(windows)} windows, {WORKERS} at a time")
+    make_proxy(video_path)  # once, before the windows are cut from it
+    cache = AnalysisCache()
+
+    def analyze_window(window):
+        window_start, window_end = window
+        window_path = make_window(video_path, window_start, window_end)
+        if window_path is None:
+            return []
+        candidates = []
+        for clip in analyze_video_with_gemini(window_path, instruction, use_cache, proxy=False, cache=cache):
+            try:
+                candidate = to_source(clip, window)
+            except ValueError as e:
+                print(f"Skipping clip from window {window_start:g}-{window_end:g}s: {e}")
+                continue
+            if candidate:
+                candidates.append(candidate)
+        return candidates
+
+    with ThreadPoolExecutor(max_workers=min(WORKERS, len(windows))) as pool:
+        candidates = [c for found in pool.map(analyze_window, windows) for c in found]
+
+    merged = merge_clips(candidates)
+    print(f"Merged {len(candidates)} candidate clips into {len(merged)}")
+    return [clip for _, _, clip in merged]
 
 def convert_timestamp_to_seconds(timestamp):
-    """Convert MM:SS to seconds"""
-    parts = timestamp.split(':')
-    if len(parts) == 2:
-        return int(parts[0]) * 60 + int(parts[1])
-    elif len(parts) == 3:
-        return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-    return 0
-
-def cut_clip_with_ffmpeg(video_path, start_time, end_time, output_path):
+    """
+    Convert MM:SS, HH:MM:SS (fractions allowed) or plain seconds to seconds
+    Raises ValueError on anything else (see clip_plan.parse_timestamp)
+    """
+    return parse_timestamp(timestamp)
+
+def cut_clip_with_ffmpeg(video_path, start_time, end_time, output_path, mode='encode',
+                         threads=None, on_progress=None):
     """
     Cut a clip from video using FFmpeg
-    Uses -ss before -i for fast seeking, -c copy for lossless cutting
+    Uses -ss before -i for fast seeking
+
+    mode "encode" re-encodes the whole clip; mode "smart" stream-copies
+    the GOPs inside the clip and re-encodes only its partial edge GOPs
+    (see smart_cut.py), falling back to "encode" when that is not possible.
+    threads sets ffmpeg -threads; on_progress(seconds_done, speed) receives
+    ffmpeg -progress updates while encoding. start_time/end_time may be
+    timestamps or seconds.
     """
-    # For precise cuts with re-encoding (higher quality):
+    start = convert_timestamp_to_seconds(start_time)
+    end = convert_timestamp_to_seconds(end_time)
+    started = time.perf_counter()
+
+    if mode == 'smart':
+        print(f"Smart-cutting clip: {start_time} to {end_time}")
+        if smart_cut(video_path, start, end, output_path, threads=threads):
+            metrics.FFMPEG_CUT_SECONDS.observe(time.perf_counter() - started, result='ok', mode='smart')
+            return True
+        print("Smart cut not possible, re-encoding whole clip")
+
+    # For precise cuts with re-encoding (higher quality).
+    # -t, not -to: after input seeking output timestamps start at 0
     cmd = [
         'ffmpeg',
-        '-ss', start_time,
+        '-ss', str(start),
         '-i', video_path,
-        '-to', end_time,
+        '-t', str(end - start),
         '-c:v', 'libx264',
         '-c:a', 'aac',
         '-preset', 'fast',
         '-crf', '18',  # High quality
+    ]
+    if threads:
+        cmd += ['-threads', str(threads)]
+    cmd += [
         '-y',  # Overwrite output
         output_path
     ]
 
     print(f"Cutting clip: {start_time} to {end_time}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg(cmd, on_progress)
+    metrics.FFMPEG_CUT_SECONDS.observe(
+        time.perf_counter() - started,
+        result='ok' if result.returncode == 0 else 'error',
+        mode='encode'
+    )
 
     if result.returncode != 0:
         print(f"Error cutting clip: {result.stderr}")
@@ -101,54 +213,124 @@ def cut_clip_with_ffmpeg(video_path, start_time, end_time, output_path):
     return True
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python clip_video_semantic.py <video_path> <instruction> [output_dir]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    cut_mode = 'smart' if '--smart' in sys.argv else 'encode'
+    single_pass = '--single-pass' in sys.argv
+    use_cache = '--reanalyze' not in sys.argv
+    windowed = '--windowed' in sys.argv
+    captions_path = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--captions=')), None)
+    vertical = '--vertical' in sys.argv or captions_path is not None
+
+    if len(args) < 2:
+        print("Usage: python clip_video_semantic.py <video_path> <instruction> [output_dir] [--smart | --single-pass | --vertical [--captions=subs.srt]] [--reanalyze] [--windowed]")
         print("Example: python clip_video_semantic.py video.mp4 'Find the most insightful moments' ./clips")
+        print("\n--smart: stream-copy whole GOPs, re-encode only clip edges (much faster)")
+        print("--single-pass: decode the source once for all nearby/overlapping clips")
+        print("--reanalyze: ignore the cached analysis for this video and instruction")
+        print("--vertical: render finished 9:16 shorts (cut, reframe, loudness) in one encode")
+        print("--captions=subs.srt: burn in captions from an SRT of the source (implies --vertical)")
+        print("--windowed: analyze long videos as overlapping windows in parallel")
         sys.exit(1)
 
-    video_path = sys.argv[1]
-    instruction = sys.argv[2]
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else './clips'
+    video_path = args[0]
+    instruction = args[1]
+    output_dir = args[2] if len(args) > 2 else './clips'
 
     # Verify video exists
     if not os.path.exists(video_path):
         print(f"Error: Video file not found: {video_path}")
         sys.exit(1)
+    if captions_path and not os.path.exists(captions_path):
+        print(f"Error: Captions file not found: {captions_path}")
+        sys.exit(1)
 
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
 
     # Step 1: Analyze video with Gemini
     print("\n=== Step 1: Analyzing video with Gemini ===")
-    clips = analyze_video_with_gemini(video_path, instruction)
+    if windowed:
+        clips = analyze_video_windowed(video_path, instruction, use_cache)
+    else:
+        clips = analyze_video_with_gemini(video_path, instruction, use_cache)
 
     print(f"\nFound {len(clips)} clips:")
     for i, clip in enumerate(clips, 1):
         print(f"{i}. {clip['start_time']} - {clip['end_time']}: {clip['description']}")
 
+    # Probe the source once (cached per file hash) and plan the cuts
+    # against it; the cutters below reuse the same probe
+    try:
+        info = get_media_info(video_path)
+    except ProbeError as e:
+        print(f"Error: Cannot read video: {e}")
+        sys.exit(1)
+    print(f"\nSource: {info.duration:.2f}s, {(info.video or {}).get('codec_name', 'no video')}, "
+          f"{len(info.keyframes)} keyframes")
+
+    plan = ClipPlan.from_clips(video_path, clips, info.duration)
+    for clip, reason in plan.rejected:
+        print(f"Skipping {clip.get('start_time')} - {clip.get('end_time')}: {reason}")
+
     # Step 2: Cut clips with FFmpeg
     print("\n=== Step 2: Cutting clips with FFmpeg ===")
     video_basename = Path(video_path).stem
 
-    for i, clip in enumerate(clips, 1):
-        output_filename = f"{video_basename}_clip_{i:02d}.mp4"
-        output_path = os.path.join(output_dir, output_filename)
-
-        success = cut_clip_with_ffmpeg(
-            video_path,
-            clip['start_time'],
-            clip['end_time'],
-            output_path
+    for i, segment in enumerate(plan.segments, 1):
+        segment.output_path = os.path.join(output_dir, f"{video_basename}_clip_{i:02d}.mp4")
+
+    succeeded = set()
+    if vertical:
+        # Cut, crop/scale, captions and loudnorm share one encode per short
+        outcomes = render_plan(plan, captions_path)
+        succeeded.update(s.output_path for s, ok in zip(plan.segments, outcomes) if ok)
+    elif single_pass:
+        outcomes = extract_clips(video_path, [
+            (segment.start, segment.end, segment.output_path) for segment in plan.segments
+        ])
+        succeeded.update(s.output_path for s, ok in zip(plan.segments, outcomes) if ok)
+    else:
+        # Overlapping clips are encoded once as a shared span and sliced
+        # (smart mode copies shared GOPs anyway, so it cuts each clip);
+        # spans render in parallel, sized to the machine
+        spans = plan.spans(merge=cut_mode == 'encode')
+
+        def render(index, threads, on_progress):
+            span = spans[index]
+            if len(span.segments) > 1:
+                outcomes = extract_span(video_path, span, info.has_audio, threads, on_progress)
+            else:
+                segment = span.segments[0]
+                outcomes = [cut_clip_with_ffmpeg(
+                    video_path,
+                    segment.start,
+                    segment.end,
+                    segment.output_path,
+                    mode=cut_mode,
+                    threads=threads,
+                    on_progress=on_progress
+                )]
+            succeeded.update(s.output_path for s, ok in zip(span.segments, outcomes) if ok)
+            return all(outcomes)
+
+        render_parallel(
+            [
+                (', '.join(os.path.basename(s.output_path) for s in span.segments), span.duration)
+                for span in spans
+            ],
+            render
         )
 
-        if success:
+    for segment in plan.segments:
+        output_path = segment.output_path
+        if output_path in succeeded:
             print(f"✓ Created: {output_path}")
             # Save metadata
             metadata_path = output_path.replace('.mp4', '_metadata.json')
             with open(metadata_path, 'w') as f:
-                json.dump(clip, f, indent=2)
+                json.dump(segment.metadata, f, indent=2)
         else:
-            print(f"✗ Failed: {output_filename}")
+            print(f"✗ Failed: {os.path.basename(output_path)}")
 
     print(f"\n=== Complete! Clips saved to: {output_dir} ===")
 
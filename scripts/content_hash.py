@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Fast content hashing for large media files
+Fingerprints files from their size plus sampled blocks, cached by path/inode/mtime
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from runtime_state import state_path
+
+CACHE_PATH = Path(os.getenv('CONTENT_HASH_CACHE_PATH') or state_path('content_hash_cache.json'))
+# Set to use full SHA-256 hashes wherever a file identity is needed
+FULL_HASH = os.getenv('CONTENT_HASH_FULL', '').lower() in ('1', 'true', 'yes')
+
+SAMPLE_COUNT = 32
+SAMPLE_SIZE = 64 * 1024
+MAX_ENTRIES = 5000
+
+
+def _sampled_digest(path: str, size: int) -> str:
+    """
+    SHA-256 over the size and SAMPLE_COUNT evenly spaced blocks
+
+    The first and last blocks are always included (container headers and
+    MP4 moov atoms live there). Files no larger than the samples combined
+    are hashed whole.
+    """
+    hasher = hashlib.sha256(str(size).encode())
+    if size == 0:
+        return hasher.hexdigest()
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if size <= SAMPLE_COUNT * SAMPLE_SIZE:
+            hasher.update(mapped)
+        else:
+            last = size - SAMPLE_SIZE
+            for i in range(SAMPLE_COUNT):
+                offset = last * i // (SAMPLE_COUNT - 1)
+                hasher.update(mapped[offset:offset + SAMPLE_SIZE])
+    return hasher.hexdigest()
+
+
+def _full_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class HashCache:
+    """
+    JSON-file cache of file hashes
+
+    Entries are keyed by real path and only trusted while device, inode,
+    size and mtime are unchanged. Beyond max_entries the oldest are
+    evicted.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def _save(self):
+        if len(self.entries) > self.max_entries:
+            by_age = sorted(self.entries, key=lambda k: self.entries[k]['hashed_at'])
+            for key in by_age[:len(self.entries) - self.max_entries]:
+                del self.entries[key]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def identity(self, path: str, full: bool = False) -> str:
+        """
+        "sample:<hex>" (default) or "sha256:<hex>" (full) for the file
+
+        Raises:
+            OSError: if the file cannot be read
+        """
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        state = [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+        field = 'sha256' if full else 'sample'
+
+        with self._lock:
+            entry = self.entries.get(real_path)
+            if entry and entry['state'] == state and field in entry:
+                return f"{field}:{entry[field]}"
+
+        digest = _full_digest(real_path) if full else _sampled_digest(real_path, stat.st_size)
+
+        with self._lock:
+            entry = self.entries.get(real_path)
+            if not entry or entry['state'] != state:
+                entry = {"state": state}
+            entry[field] = digest
+            entry['hashed_at'] = time.time()
+            self.entries[real_path] = entry
+            self._save()
+        return f"{field}:{digest}"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def file_identity(path: str, full: bool = FULL_HASH) -> str:
+    """Cached content identity of a local file (see HashCache.identity)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HashCache()
+    return _cache.identity(path, full)
+
+
+def source_identity(video_url: str) -> str:
+    """Local files are identified by file_identity(), everything else by URL"""
+    if os.path.isfile(video_url):
+        return file_identity(video_url)
+    return video_url
+
+
+if __name__ == '__main__':
+    full = '--full' in sys.argv
+    for file_path in [arg for arg in sys.argv[1:] if not arg.startswith('--')]:
+        started = time.perf_counter()
+        print(f"{file_identity(file_path, full)}  {file_path}  ({(time.perf_counter() - started) * 1000:.1f} ms)")
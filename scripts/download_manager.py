@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Download manager for Ruby
+Streams to a temp file, resumes with HTTP Range, verifies and renames atomically
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+import metrics
+from http_transport import get_session
+
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_NAME = '.downloads.json'
+
+_manifest_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """Download could not be completed or failed verification"""
+
+
+def _manifest_path(path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(path)), MANIFEST_NAME)
+
+
+def _read_manifest(path: str) -> Dict:
+    try:
+        with open(_manifest_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _record(path: str, record: Dict):
+    with _manifest_lock:
+        manifest = _read_manifest(path)
+        manifest[os.path.basename(path)] = record
+
+        manifest_path = _manifest_path(path)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+
+def _observe(started: float, transferred: int, result: str):
+    seconds = time.perf_counter() - started
+    metrics.DOWNLOAD_BYTES.inc(transferred)
+    metrics.DOWNLOAD_SECONDS.observe(seconds, result=result)
+    if result == 'done' and seconds > 0:
+        metrics.DOWNLOAD_RATE.observe(transferred / seconds)
+
+
+def downloaded_record(
+    path: str,
+    expected_size: Optional[int] = None,
+    sha256: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Manifest record for path if it is already fully downloaded
+
+    A file counts as downloaded when the manifest written next to it
+    has its size (and hash, if given) and the file on disk still has
+    that size. Without a manifest entry, a matching expected_size is
+    accepted as well.
+    """
+    if not os.path.isfile(path):
+        return None
+
+    size = os.path.getsize(path)
+    record = _read_manifest(path).get(os.path.basename(path))
+
+    if record:
+        if record.get('size') != size:
+            return None
+        if expected_size is not None and expected_size != size:
+            return None
+        if sha256 and record.get('sha256') != sha256:
+            return None
+        return record
+
+    if expected_size is not None and expected_size == size and not sha256:
+        return {"size": size}
+    return None
+
+
+def download_file(
+    url: str,
+    path: str,
+    expected_size: Optional[int] = None,
+    sha256: Optional[str] = None,
+    max_retries: int = 3,
+    chunk_size: int = CHUNK_SIZE
+) -> Dict:
+    """
+    Download url to path without holding the file in memory
+
+    Data is streamed to "<path>.part". An interrupted download resumes
+    from the bytes already on disk (Range request) on retry or on the
+    next run. The result is checked against Content-Length and the
+    optional expected_size / sha256, then renamed into place.
+
+    Returns:
+        Manifest record: {"url", "size", "sha256", "skipped", ...}
+
+    Raises:
+        DownloadError: after max_retries failed attempts or on a
+            size/hash mismatch
+    """
+    existing = downloaded_record(path, expected_size, sha256)
+    if existing:
+        return dict(existing, skipped=True)
+
+    part_path = path + '.part'
+    session = get_session(url)
+    last_error = None
+    started = time.perf_counter()
+    transferred = 0
+
+    for attempt in range(max_retries):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        hasher = hashlib.sha256()
+
+        try:
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            with session.get(url, headers=headers, stream=True) as response:
+                if response.status_code == 416:
+                    # Range past the end: stale part file, start over
+                    os.remove(part_path)
+                    continue
+                response.raise_for_status()
+
+                if offset and response.status_code == 206:
+                    with open(part_path, 'rb') as f:
+                        for block in iter(lambda: f.read(chunk_size), b''):
+                            hasher.update(block)
+                    mode = 'ab'
+                else:
+                    offset = 0
+                    mode = 'wb'
+
+                content_length = response.headers.get('Content-Length')
+                total_size = offset + int(content_length) if content_length else None
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        transferred += len(chunk)
+
+        except (requests.RequestException, OSError) as e:
+            last_error = e
+            print(f"  Download interrupted ({e}), retry {attempt + 1}/{max_retries}")
+            time.sleep(2 ** attempt)
+            continue
+
+        size = os.path.getsize(part_path)
+        digest = hasher.hexdigest()
+
+        if total_size is not None and size != total_size:
+            last_error = DownloadError(f"Incomplete download: {size}/{total_size} bytes")
+            continue
+        if (expected_size is not None and size != expected_size) or (sha256 and digest != sha256):
+            os.remove(part_path)
+            _observe(started, transferred, 'error')
+            raise DownloadError(
+                f"Verification failed for {os.path.basename(path)}: "
+                f"size {size}, sha256 {digest}"
+            )
+
+        os.replace(part_path, path)
+        record = {"url": url, "size": size, "sha256": digest, "downloaded_at": int(time.time())}
+        _record(path, record)
+        _observe(started, transferred, 'done')
+        return dict(record, skipped=False)
+
+    _observe(started, transferred, 'error')
+    raise DownloadError(f"Download failed after {max_retries} attempts: {last_error}")
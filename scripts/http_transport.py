@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Transport for Ruby
+Pooled keep-alive sessions used by KlapAPI and the Blotato scripts
+"""
+
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+import metrics
+import rate_limit
+
+# Defaults (overridable from .env, read when a session is first created)
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 60.0
+MAX_CONNECTIONS_PER_HOST = 10
+MAX_THROTTLE_RETRIES = 3
+# Endpoints that answer only after slow server-side work (Blotato fetches
+# the whole video before replying), named like rate_limit.DEFAULT_LIMITS.
+# Read timeout in seconds; override with e.g. HTTP_READ_TIMEOUT_BLOTATO_V2_MEDIA=900
+SLOW_READ_TIMEOUTS: Dict[str, float] = {
+    'blotato /v2/media': 600.0,
+    'blotato /v2/posts': 300.0,
+}
+
+_sessions: Dict[str, 'PooledSession'] = {}
+_sessions_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session bound to a single host
+
+    Connections are kept alive between calls and capped at
+    max_connections; extra concurrent callers wait for a free
+    connection instead of opening new ones. Requests to rate-limited
+    APIs wait for a token (see rate_limit) and are retried after a 429.
+    Every caller of the host shares the session, so auth headers are
+    passed per request, never set on the session.
+    """
+
+    def __init__(self, max_connections: int, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            pool_block=True
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        api = rate_limit.api_name(url)
+        if 'timeout' not in kwargs:
+            slow = _slow_read_timeout(api, urlsplit(url).path)
+            kwargs['timeout'] = (self.timeout[0], max(self.timeout[1], slow)) if slow else self.timeout
+        labels = dict(
+            api=api or 'download',
+            method=method.upper(),
+            endpoint=metrics.endpoint(urlsplit(url).path) if api else ''
+        )
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            rate_limit.acquire(url)
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, **kwargs)
+            except requests.RequestException:
+                metrics.API_REQUESTS.inc(status='error', **labels)
+                raise
+            metrics.API_LATENCY.observe(time.perf_counter() - started, **labels)
+            metrics.API_REQUESTS.inc(status=response.status_code, **labels)
+            if response.status_code != 429 or attempt == MAX_THROTTLE_RETRIES:
+                return response
+
+            delay = rate_limit.retry_after(response.headers, attempt)
+            print(f"429 from {urlsplit(url).netloc}, backing off {delay:.0f}s")
+            rate_limit.throttled(url, delay)
+            response.close()
+
+
+def _slow_read_timeout(api: Optional[str], path: str) -> Optional[float]:
+    for name, seconds in SLOW_READ_TIMEOUTS.items():
+        endpoint_api, _, prefix = name.partition(' ')
+        if api == endpoint_api and path.startswith(prefix):
+            env_name = 'HTTP_READ_TIMEOUT_' + '_'.join(re.findall(r'[A-Za-z0-9]+', name)).upper()
+            return float(os.getenv(env_name, seconds))
+    return None
+
+
+def request_sent(error: Exception) -> bool:
+    """
+    Whether a request that raised `error` may have reached the server
+
+    False only when it failed while connecting (DNS, refused connection,
+    connect timeout, TLS or proxy handshake). A read timeout or a dropped
+    connection can come after the server acted on the request, so a
+    non-idempotent call (creating a post) must not be blindly resent.
+    """
+    if isinstance(error, (requests.ConnectTimeout, requests.exceptions.SSLError,
+                          requests.exceptions.ProxyError)):
+        return False
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return not isinstance(reason, NewConnectionError)
+    return isinstance(error, (requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                              requests.exceptions.ContentDecodingError))
+
+
+def _default_timeout() -> Tuple[float, float]:
+    return (
+        float(os.getenv('HTTP_CONNECT_TIMEOUT', CONNECT_TIMEOUT)),
+        float(os.getenv('HTTP_READ_TIMEOUT', READ_TIMEOUT))
+    )
+
+
+def _default_max_connections() -> int:
+    return int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', MAX_CONNECTIONS_PER_HOST))
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(
+    url: str,
+    max_connections: Optional[int] = None,
+    timeout: Optional[Tuple[float, float]] = None
+) -> PooledSession:
+    """
+    Get the shared session for the host of `url`
+
+    Args:
+        url: Any URL on the target host (base URL or full endpoint)
+        max_connections: Per-host connection limit (first caller wins)
+        timeout: (connect, read) timeout in seconds
+
+    Returns:
+        PooledSession reused by every caller for that host
+    """
+    key = _host_key(url)
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = PooledSession(
+                max_connections=max_connections or _default_max_connections(),
+                timeout=timeout or _default_timeout()
+            )
+            _sessions[key] = session
+        elif timeout:
+            session.timeout = timeout
+
+    return session
+
+
+def close_sessions():
+    """Close every pooled session (end of run)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Durable job store for the clip-and-post pipeline
+Embedded SQLite record of every task, export, download, media upload and post
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from runtime_state import state_path
+
+JOB_DB_PATH = Path(os.getenv('RUBY_JOB_DB') or state_path('ruby_jobs.sqlite3'))
+
+# Job kinds, one per pipeline stage
+TASK = 'task'
+EXPORT = 'export'
+DOWNLOAD = 'download'
+MEDIA = 'media'
+POST = 'post'
+
+
+def export_job_key(folder_id: str, project_id: str, watermark_url: Optional[str] = None) -> str:
+    """Job key of a Klap export (same short with another watermark is another export)"""
+    return f"{folder_id}/{project_id}|{watermark_url or ''}"
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE TABLE IF NOT EXISTS transitions (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    status TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs (kind, status);
+"""
+
+
+class JobStore:
+    """
+    Status of every unit of pipeline work, keyed by (kind, key)
+
+    Keys are natural identifiers chosen by each stage (source + options
+    hash for tasks, export_job_key() for exports, output path for
+    downloads, source URL for media uploads, "<platform>|<file>|<time>"
+    for posts) so a rerun finds the work it already did. Each status change is
+    appended to the transitions table with a timestamp.
+    """
+
+    def __init__(self, path: Path = JOB_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['data'] = json.loads(job['data'])
+        return job
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        """Job record or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def update(
+        self,
+        kind: str,
+        key: str,
+        status: str,
+        error: Optional[str] = None,
+        **data
+    ) -> Dict:
+        """
+        Create or move a job to `status`, merging `data` into its record
+
+        Returns:
+            The updated job record
+        """
+        with self._lock, self._conn:
+            self._write(kind, key, status, error, data)
+        return self.get(kind, key)
+
+    def _write(self, kind: str, key: str, status: str, error: Optional[str], data: Dict):
+        # Caller holds the lock and the transaction
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT id, status, data FROM jobs WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+
+        if row:
+            merged = dict(json.loads(row['data']), **data)
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(merged), error, now, row['id'])
+            )
+            job_id = row['id']
+            changed = row['status'] != status
+        else:
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (kind, key, status, data, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, key, status, json.dumps(data), error, now, now)
+            ).lastrowid
+            changed = True
+
+        if changed:
+            self._conn.execute(
+                "INSERT INTO transitions (job_id, status, at) VALUES (?, ?, ?)",
+                (job_id, status, now)
+            )
+
+    def claim(self, kind: str, key: str, payload: Dict) -> bool:
+        """
+        Move a job to 'submitting' before its request is sent
+
+        Returns:
+            True if the caller should send it (new job, or one that failed
+            before reaching the API); False if a previous run finished it
+            or may already have sent it ('submitting', see `stuck`)
+        """
+        with self._lock, self._conn:
+            # BEGIN IMMEDIATE so two processes cannot both claim the job
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT status FROM jobs WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row and row['status'] != 'error':
+                return False
+            self._write(kind, key, 'submitting', None, {'payload': payload})
+        return True
+
+    def fail(self, kind: str, key: str, error: str, **data) -> Dict:
+        """Mark a job as failed with an error message"""
+        return self.update(kind, key, 'error', error=error, **data)
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        """Jobs filtered by kind and/or status, oldest first"""
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def entered_at(self, kind: str, key: str, status: str) -> Optional[float]:
+        """When the job last moved to `status` (None if it never did)"""
+        times = [t['at'] for t in self.history(kind, key) if t['status'] == status]
+        return times[-1] if times else None
+
+    def history(self, kind: str, key: str) -> List[Dict]:
+        """Status transitions of one job, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.status, t.at FROM transitions t JOIN jobs j ON j.id = t.job_id "
+                "WHERE j.kind = ? AND j.key = ? ORDER BY t.rowid", (kind, key)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store backed by JOB_DB_PATH"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
+
+
+def main(argv: List[str]) -> int:
+    """
+    Inspect and resolve jobs a crashed or timed-out run left 'submitting'
+
+    Their request may or may not have reached the API, so they are never
+    resent automatically. Check the target (e.g. the Blotato dashboard), then:
+
+        python job_store.py stuck [kind]             list them
+        python job_store.py confirm <kind> <key> <status>   it went through
+        python job_store.py retry <kind> <key>       it did not, send again
+    """
+    store = get_job_store()
+    command = argv[0] if argv else 'stuck'
+
+    if command == 'stuck' and len(argv) <= 2:
+        jobs = store.list(argv[1] if len(argv) == 2 else None, 'submitting')
+        for job in jobs:
+            age_min = (time.time() - job['updated_at']) / 60
+            print(f"{job['kind']}  {job['key']}  (submitting for {age_min:.0f} min)")
+        print(f"{len(jobs)} unconfirmed job(s)")
+        return 0
+
+    if command in ('confirm', 'retry') and len(argv) == (4 if command == 'confirm' else 3):
+        kind, key = argv[1], argv[2]
+        job = store.get(kind, key)
+        if not job or job['status'] != 'submitting':
+            print(f"No unconfirmed {kind} job {key}")
+            return 1
+        if command == 'confirm':
+            store.update(kind, key, argv[3], confirmed_manually=True)
+        else:
+            store.fail(kind, key, 'Released for retry after an unconfirmed submission')
+        print(f"{kind} {key}: {store.get(kind, key)['status']}")
+        return 0
+
+    print(main.__doc__)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Async Klap API client for Ruby
+Drives many source videos through the shorts lifecycle concurrently
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import List, Dict, Optional
+
+from klap_cache import KlapResultCache
+from klap_clipper import KlapAPI
+from klap_lifecycle import ShortsRun
+from klap_polling import PollTracker
+
+
+class AsyncKlapAPI:
+    """
+    Awaitable counterpart of KlapAPI
+
+    HTTP calls run in worker threads over the shared pooled session;
+    waiting between polls is an asyncio sleep, so hundreds of tasks can
+    be tracked from a single event loop.
+    """
+
+    def __init__(self, api_key: str):
+        self.client = KlapAPI(api_key)
+
+    async def create_shorts_task(self, video_url: str, **options) -> Dict:
+        """Submit video for shorts generation (see KlapAPI.create_shorts_task)"""
+        return await asyncio.to_thread(
+            self.client.create_shorts_task, video_url, **options
+        )
+
+    async def get_task_status(self, task_id: str) -> Dict:
+        """Poll task status"""
+        return await asyncio.to_thread(self.client.get_task_status, task_id)
+
+    async def wait_for_completion(
+        self,
+        task_id: str,
+        poll_interval: Optional[int] = None,
+        max_wait: int = 1800,
+        source_duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ) -> Dict:
+        """Wait for task to complete without blocking other tasks"""
+        poll = PollTracker('task', max_wait, source_duration, poll_interval, submitted_at)
+
+        while True:
+            task = await self.get_task_status(task_id)
+            outcome = poll.observe(task)
+            print(f"[{task_id}] [{int(poll.elapsed)}s] Status: {task['status']}")
+
+            if outcome == 'ready':
+                return task
+            poll.raise_for(outcome, task)
+            await asyncio.sleep(poll.next_delay())
+
+    async def get_shorts(self, folder_id: str) -> List[Dict]:
+        """Get all generated shorts from folder"""
+        return await asyncio.to_thread(self.client.get_shorts, folder_id)
+
+    async def export_short(
+        self,
+        folder_id: str,
+        project_id: str,
+        watermark_url: Optional[str] = None
+    ) -> Dict:
+        """Export a short for download"""
+        return await asyncio.to_thread(
+            self.client.export_short, folder_id, project_id, watermark_url
+        )
+
+    async def find_export(
+        self,
+        folder_id: str,
+        project_id: str,
+        watermark_url: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Reusable export of a short (see KlapAPI.find_export)"""
+        return await asyncio.to_thread(
+            self.client.find_export, folder_id, project_id, watermark_url
+        )
+
+    async def get_export_status(
+        self,
+        folder_id: str,
+        project_id: str,
+        export_id: str
+    ) -> Dict:
+        """Get export status and download URL"""
+        return await asyncio.to_thread(
+            self.client.get_export_status, folder_id, project_id, export_id
+        )
+
+    async def wait_for_export(
+        self,
+        folder_id: str,
+        project_id: str,
+        export_id: str,
+        poll_interval: Optional[int] = None,
+        max_wait: int = 300,
+        duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ) -> str:
+        """Wait for export to complete and return download URL"""
+        poll = PollTracker('export', max_wait, duration, poll_interval, submitted_at)
+
+        while True:
+            export = await self.get_export_status(folder_id, project_id, export_id)
+            outcome = poll.observe(export)
+            print(f"[{project_id}] [{int(poll.elapsed)}s] Export status: {export['status']}")
+
+            if outcome == 'ready':
+                return export['src_url']
+            poll.raise_for(outcome, export)
+            await asyncio.sleep(poll.next_delay())
+
+
+async def process_video(
+    klap: AsyncKlapAPI,
+    video_url: str,
+    semaphore: asyncio.Semaphore,
+    export_count: int = 1,
+    cache: Optional[KlapResultCache] = None,
+    **options
+) -> Dict:
+    """
+    Run one source video through submit → poll → shorts → export
+
+    Args:
+        klap: Shared async client
+        video_url: Source video URL
+        semaphore: Bounds how many videos are in flight at once
+        export_count: Number of top shorts (by virality) to export
+        cache: Result cache; a hit skips submit/poll (and cached exports)
+        **options: Passed through to create_shorts_task
+
+    Submitted tasks and requested exports are recorded in the job store,
+    so a rerun after a crash waits on them instead of submitting again.
+
+    Returns:
+        Result dict with task/folder IDs, shorts and export URLs
+    """
+    async with semaphore:
+        run = ShortsRun(video_url, KlapAPI.shorts_payload(video_url, **options), cache)
+        cached = run.cached()
+
+        if cached:
+            task_id = cached['task_id']
+            folder_id = cached['output_id']
+            shorts = cached['shorts']
+            print(f"Cached {video_url} → task {task_id}")
+        else:
+            resumed = run.resumable()
+            if resumed:
+                task_id = resumed['task_id']
+                folder_id = resumed['output_id']
+                print(f"Resuming {video_url} → task {task_id}")
+            else:
+                task = await klap.create_shorts_task(video_url, **options)
+                task_id = task['id']
+                folder_id = task['output_id']
+                run.submitted(task)
+                print(f"Submitted {video_url} → task {task_id}")
+
+            try:
+                await klap.wait_for_completion(
+                    task_id,
+                    source_duration=await asyncio.to_thread(run.source_duration),
+                    submitted_at=run.submitted_at
+                )
+            except Exception as e:
+                # Timeouts are still processing on Klap's side; the next run resumes them
+                run.failed(e)
+                raise
+
+            shorts = await klap.get_shorts(folder_id)
+            run.ready(task_id, folder_id, shorts)
+
+        shorts.sort(key=lambda x: x.get('virality_score', 0), reverse=True)
+
+        async def export(short: Dict) -> Dict:
+            steps = run.export(folder_id, short['id'])
+            url = steps.cached_url()
+            if not url:
+                step, found = steps.plan(await klap.find_export(folder_id, short['id']))
+                if step == 'reused':
+                    url = found
+                else:
+                    if step == 'wait':
+                        export_id = found
+                    else:
+                        export_id = (await klap.export_short(folder_id, short['id']))['id']
+                        steps.requested(export_id)
+
+                    try:
+                        url = await klap.wait_for_export(
+                            folder_id, short['id'], export_id,
+                            duration=short.get('duration'),
+                            submitted_at=steps.requested_at
+                        )
+                    except Exception as e:
+                        steps.failed(e)
+                        raise
+                    steps.ready(url)
+            return {
+                "project_id": short['id'],
+                "virality_score": short.get('virality_score', 0),
+                "download_url": url
+            }
+
+        exports = await asyncio.gather(*(export(s) for s in shorts[:export_count]))
+
+        return {
+            "video_url": video_url,
+            "task_id": task_id,
+            "folder_id": folder_id,
+            "shorts": shorts,
+            "exports": list(exports)
+        }
+
+
+async def process_videos(
+    api_key: str,
+    video_urls: List[str],
+    max_concurrent: int = 10,
+    export_count: int = 1,
+    **options
+) -> List[Dict]:
+    """
+    Drive a batch of source videos through the whole lifecycle concurrently
+
+    A failure on one video is recorded in its result ("error" key)
+    and does not cancel the rest of the batch.
+
+    Returns:
+        One result dict per input URL, in input order
+    """
+    klap = AsyncKlapAPI(api_key)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    cache = KlapResultCache()
+
+    outcomes = await asyncio.gather(
+        *(process_video(klap, url, semaphore, export_count, cache, **options) for url in video_urls),
+        return_exceptions=True
+    )
+
+    results = []
+    for url, outcome in zip(video_urls, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"✗ {url}: {outcome}")
+            results.append({"video_url": url, "error": str(outcome)})
+        else:
+            results.append(outcome)
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python klap_async.py <video_url> [<video_url> ...]")
+        print("\nEnv: KLAP_API_KEY (from .env), KLAP_MAX_CONCURRENT (default 10)")
+        sys.exit(1)
+
+    api_key = os.getenv('KLAP_API_KEY')
+    if not api_key:
+        print("Error: KLAP_API_KEY not found in .env file")
+        sys.exit(1)
+
+    video_urls = sys.argv[1:]
+    max_concurrent = int(os.getenv('KLAP_MAX_CONCURRENT', '10'))
+
+    print(f"\n=== Processing {len(video_urls)} videos (max {max_concurrent} at once) ===")
+    results = asyncio.run(process_videos(
+        api_key,
+        video_urls,
+        max_concurrent=max_concurrent,
+        max_duration=60,
+        captions=True,
+        reframe=True
+    ))
+
+    ok = sum(1 for r in results if 'error' not in r)
+    print(f"\n✓ {ok}/{len(results)} videos complete")
+
+    with open('klap_batch_results.json', 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Results saved to klap_batch_results.json")
+
+
+if __name__ == '__main__':
+    main()
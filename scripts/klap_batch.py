@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Manifest-driven batch mode for the Klap clipper
+Runs a whole content backlog through submit → poll → export → download
+"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Dict
+
+from download_manager import download_file
+from klap_async import AsyncKlapAPI, process_video
+from klap_cache import KlapResultCache
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / 'outputs' / 'klap_shorts'
+
+# Manifest keys passed through to create_shorts_task
+TASK_OPTIONS = (
+    'language', 'max_duration', 'target_clip_count',
+    'captions', 'reframe', 'emojis', 'intro_title'
+)
+DEFAULTS = {
+    "max_duration": 60,
+    "target_clip_count": 5,
+    "captions": True,
+    "reframe": True,
+    "export_count": 1
+}
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Read sources from a YAML, JSON or JSONL manifest
+
+    YAML/JSON may be a list of sources or {"defaults": {...}, "sources": [...]};
+    JSONL is one source per line. Each source needs "url" and may set
+    "name", "dest_dir", "export_count", "max_clips" (alias of
+    target_clip_count) and any create_shorts_task option.
+
+    Returns:
+        Sources with defaults applied
+    """
+    with open(path) as f:
+        text = f.read()
+
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("YAML manifests need PyYAML (pip install pyyaml), or use JSONL")
+        data = yaml.safe_load(text)
+    elif path.endswith('.jsonl'):
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        data = json.loads(text)
+
+    defaults = dict(DEFAULTS)
+    if isinstance(data, dict):
+        defaults.update(data.get('defaults') or {})
+        data = data.get('sources') or []
+
+    sources = []
+    for i, source in enumerate(data, 1):
+        if 'url' not in source:
+            raise ValueError(f"Manifest source #{i} has no 'url'")
+        source = dict(defaults, **source)
+        if 'max_clips' in source:
+            source['target_clip_count'] = source.pop('max_clips')
+        source.setdefault('name', f"source_{i:03d}")
+        source.setdefault('dest_dir', str(DEFAULT_OUTPUT_DIR / source['name']))
+        sources.append(source)
+    return sources
+
+
+async def run_batch(
+    api_key: str,
+    sources: List[Dict],
+    workers: int = 5,
+    max_concurrent_downloads: int = 4
+) -> List[Dict]:
+    """
+    Process every manifest source concurrently
+
+    Up to `workers` sources are in submit/poll/export at once; each
+    source's exported shorts are downloaded as soon as its exports
+    finish, bounded by max_concurrent_downloads.
+
+    Returns:
+        One result per source, in manifest order
+    """
+    klap = AsyncKlapAPI(api_key)
+    cache = KlapResultCache()
+    semaphore = asyncio.Semaphore(workers)
+    download_semaphore = asyncio.Semaphore(max_concurrent_downloads)
+
+    async def run_source(source: Dict) -> Dict:
+        options = {k: source[k] for k in TASK_OPTIONS if k in source}
+        result = await process_video(
+            klap, source['url'], semaphore,
+            export_count=source['export_count'],
+            cache=cache,
+            **options
+        )
+        os.makedirs(source['dest_dir'], exist_ok=True)
+
+        async def download(rank: int, export: Dict):
+            filename = f"short_{rank:02d}_score_{export['virality_score']}.mp4"
+            path = os.path.join(source['dest_dir'], filename)
+            async with download_semaphore:
+                await asyncio.to_thread(download_file, export['download_url'], path)
+            export['file'] = path
+
+        await asyncio.gather(*(
+            download(rank, export) for rank, export in enumerate(result['exports'], 1)
+        ))
+        print(f"✓ {source['name']}: {len(result['exports'])} shorts → {source['dest_dir']}")
+        return result
+
+    outcomes = await asyncio.gather(
+        *(run_source(source) for source in sources),
+        return_exceptions=True
+    )
+
+    results = []
+    for source, outcome in zip(sources, outcomes):
+        entry = {"name": source['name'], "video_url": source['url'], "dest_dir": source['dest_dir']}
+        if isinstance(outcome, BaseException):
+            print(f"✗ {source['name']}: {outcome}")
+            entry['error'] = str(outcome)
+        else:
+            entry.update(
+                task_id=outcome['task_id'],
+                folder_id=outcome['folder_id'],
+                total_shorts=len(outcome['shorts']),
+                exports=outcome['exports']
+            )
+        results.append(entry)
+    return results
+
+
+def main(args: List[str]):
+    """klap_clipper.py --manifest <manifest> [workers] [results.json]"""
+    if not args:
+        print("Usage: python klap_clipper.py --manifest <sources.yaml|.jsonl|.json> [workers] [results.json]")
+        sys.exit(1)
+
+    api_key = os.getenv('KLAP_API_KEY')
+    if not api_key:
+        print("Error: KLAP_API_KEY not found in .env file")
+        sys.exit(1)
+
+    manifest_path = args[0]
+    workers = int(args[1]) if len(args) > 1 else 5
+    output_path = args[2] if len(args) > 2 else 'klap_batch_results.json'
+
+    sources = load_manifest(manifest_path)
+    print(f"\n=== Batch: {len(sources)} sources, {workers} workers ===")
+
+    results = asyncio.run(run_batch(api_key, sources, workers=workers))
+
+    ok = sum(1 for r in results if 'error' not in r)
+    print(f"\n✓ {ok}/{len(results)} sources complete")
+
+    with open(output_path, 'w') as f:
+        json.dump({
+            "manifest": manifest_path,
+            "total": len(results),
+            "success_count": ok,
+            "error_count": len(results) - ok,
+            "sources": results
+        }, f, indent=2)
+
+    print(f"Results saved to {output_path}")
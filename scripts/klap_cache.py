@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Local result cache for Klap shorts tasks
+Keyed by source identity + full request payload, so the same video with the
+same options is never processed (or paid for) twice
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from content_hash import source_identity
+from runtime_state import locked_json, state_path
+
+CACHE_PATH = Path(os.getenv('KLAP_CACHE_PATH') or state_path('klap_cache.json'))
+
+# Klap keeps generated projects for a while; signed export URLs expire sooner
+TASK_TTL = float(os.getenv('KLAP_CACHE_TTL_DAYS', '30')) * 86400
+EXPORT_URL_TTL = float(os.getenv('KLAP_EXPORT_URL_TTL_HOURS', '24')) * 3600
+MAX_ENTRIES = 500
+
+
+def cache_key(video_url: str, payload: Dict) -> str:
+    """Hash of source identity plus every option in the task payload"""
+    keyed = dict(payload, source_video_url=source_identity(video_url))
+    canonical = json.dumps(keyed, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class KlapResultCache:
+    """
+    JSON-file cache of completed Klap tasks
+
+    Each entry holds task_id, output_id (folder), the shorts list and
+    export URLs per (project, watermark). Entries expire after TASK_TTL,
+    export URLs after EXPORT_URL_TTL; beyond MAX_ENTRIES the least
+    recently used entries are evicted.
+
+    Writes are merged into the file under a lock, so concurrent runs
+    keep each other's entries. Hits only touch memory; their use times
+    are persisted with the next write or at exit (flush).
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttl: float = TASK_TTL,
+        export_ttl: float = EXPORT_URL_TTL,
+        max_entries: int = MAX_ENTRIES
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.export_ttl = export_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        self._changed: Set[str] = set()
+        self._used: Set[str] = set()
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        atexit.register(self.flush)
+
+    def _save(self):
+        with locked_json(self.path, {}) as stored:
+            for key in self._changed:
+                entry = self.entries[key]
+                previous = stored.get(key)
+                if previous and previous.get('task_id') == entry['task_id']:
+                    # Keep exports another run added to the same task
+                    entry['exports'] = dict(previous.get('exports', {}), **entry['exports'])
+                stored[key] = entry
+            for key in self._used - self._changed:
+                if key in stored and key in self.entries:
+                    stored[key]['used_at'] = max(stored[key]['used_at'], self.entries[key]['used_at'])
+
+            now = time.time()
+            for key in [key for key, entry in stored.items() if now - entry['created_at'] >= self.ttl]:
+                del stored[key]
+            if len(stored) > self.max_entries:
+                by_use = sorted(stored, key=lambda k: stored[k]['used_at'])
+                for key in by_use[:len(stored) - self.max_entries]:
+                    del stored[key]
+            self.entries = stored
+
+        self._changed.clear()
+        self._used.clear()
+
+    def flush(self):
+        """Persist use times of cache hits not yet written"""
+        with self._lock:
+            if self._used:
+                self._save()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached task result, or None if missing/expired"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry or time.time() - entry['created_at'] >= self.ttl:
+                return None
+            entry['used_at'] = time.time()
+            self._used.add(key)
+            return entry
+
+    def put(self, key: str, task_id: str, folder_id: str, shorts: List[Dict]):
+        """Store a completed task and its shorts"""
+        with self._lock:
+            now = time.time()
+            self.entries[key] = {
+                "task_id": task_id,
+                "output_id": folder_id,
+                "shorts": shorts,
+                "exports": {},
+                "created_at": now,
+                "used_at": now
+            }
+            self._changed.add(key)
+            self._save()
+
+    def get_export(
+        self,
+        key: str,
+        project_id: str,
+        watermark_url: Optional[str] = None
+    ) -> Optional[str]:
+        """Cached export URL for a short, or None if missing/expired"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            export = entry['exports'].get(f"{project_id}|{watermark_url or ''}")
+            if not export or time.time() - export['exported_at'] >= self.export_ttl:
+                return None
+            return export['src_url']
+
+    def put_export(
+        self,
+        key: str,
+        project_id: str,
+        src_url: str,
+        watermark_url: Optional[str] = None
+    ):
+        """Store the download URL of an exported short"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return
+            entry['exports'][f"{project_id}|{watermark_url or ''}"] = {
+                "src_url": src_url,
+                "exported_at": time.time()
+            }
+            self._changed.add(key)
+            self._save()
@@ -5,13 +5,20 @@ Converts long-form videos into viral shorts
 """
 
 import os
-import requests
 import time
 import json
 import sys
 from pathlib import Path
 from typing import List, Dict, Optional
 
+import requests
+
+from http_transport import get_session
+from job_store import EXPORT, export_job_key, get_job_store
+from klap_cache import KlapResultCache, EXPORT_URL_TTL
+from klap_lifecycle import ShortsRun
+from klap_polling import EXPORT_DONE_STATUSES, PollTracker
+
 # Load environment variables from .env
 def load_env():
     """Load .env file from project root"""
@@ -33,11 +40,37 @@ load_env()
 class KlapAPI:
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.klap.app/v2"
+        self.base_url = os.getenv('KLAP_BASE_URL', "https://api.klap.app/v2").rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self.session = get_session(self.base_url)
+
+    @staticmethod
+    def shorts_payload(
+        video_url: str,
+        language: str = "en",
+        max_duration: int = 60,
+        target_clip_count: int = 5,
+        captions: bool = True,
+        reframe: bool = True,
+        emojis: bool = False,
+        intro_title: bool = False
+    ) -> Dict:
+        """Request body for create_shorts_task (also used as cache key)"""
+        return {
+            "source_video_url": video_url,
+            "language": language,
+            "max_duration": max_duration,
+            "target_clip_count": target_clip_count,
+            "editing_options": {
+                "captions": captions,
+                "reframe": reframe,
+                "emojis": emojis,
+                "intro_title": intro_title
+            }
+        }
 
     def create_shorts_task(
         self,
@@ -66,20 +99,12 @@ class KlapAPI:
         Returns:
             Task object with id and status
         """
-        payload = {
-            "source_video_url": video_url,
-            "language": language,
-            "max_duration": max_duration,
-            "target_clip_count": target_clip_count,
-            "editing_options": {
-                "captions": captions,
-                "reframe": reframe,
-                "emojis": emojis,
-                "intro_title": intro_title
-            }
-        }
+        payload = self.shorts_payload(
+            video_url, language, max_duration, target_clip_count,
+            captions, reframe, emojis, intro_title
+        )
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/tasks/video-to-shorts",
             headers=self.headers,
             json=payload
@@ -89,7 +114,7 @@ class KlapAPI:
 
     def get_task_status(self, task_id: str) -> Dict:
         """Poll task status"""
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/tasks/{task_id}",
             headers=self.headers
         )
@@ -99,37 +124,37 @@ class KlapAPI:
     def wait_for_completion(
         self,
         task_id: str,
-        poll_interval: int = 30,
-        max_wait: int = 1800
+        poll_interval: Optional[int] = None,
+        max_wait: int = 1800,
+        source_duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
     ) -> Dict:
         """
         Wait for task to complete
 
         Args:
             task_id: Task ID to monitor
-            poll_interval: Seconds between status checks
+            poll_interval: Fixed seconds between status checks
+                (default: adaptive backoff around the learned ETA)
             max_wait: Maximum wait time in seconds
+            source_duration: Source video length in seconds, sharpens the ETA
+            submitted_at: When the task was created (epoch seconds), for
+                a task resumed from an earlier run
 
         Returns:
             Completed task object
         """
-        start_time = time.time()
+        poll = PollTracker('task', max_wait, source_duration, poll_interval, submitted_at)
 
         while True:
             task = self.get_task_status(task_id)
-            status = task['status']
+            outcome = poll.observe(task)
+            print(f"[{int(poll.elapsed)}s] Status: {task['status']}")
 
-            elapsed = int(time.time() - start_time)
-            print(f"[{elapsed}s] Status: {status}")
-
-            if status == "ready":
+            if outcome == 'ready':
                 return task
-            elif status == "error":
-                raise Exception(f"Task failed: {task.get('error_code')}")
-            elif elapsed > max_wait:
-                raise TimeoutError(f"Task timeout after {max_wait}s")
-
-            time.sleep(poll_interval)
+            poll.raise_for(outcome, task)
+            time.sleep(poll.next_delay())
 
     def get_shorts(self, folder_id: str) -> List[Dict]:
         """
@@ -137,12 +162,17 @@ class KlapAPI:
 
         Returns list of project objects with virality scores
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/projects/{folder_id}",
             headers=self.headers
         )
         response.raise_for_status()
-        return response.json()
+        shorts = response.json()
+
+        # Handle if response is a dict with 'projects' key or direct list
+        if isinstance(shorts, dict):
+            shorts = shorts.get('projects', [])
+        return shorts
 
     def export_short(
         self,
@@ -170,7 +200,7 @@ class KlapAPI:
                 "scale": 1
             }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/projects/{folder_id}/{project_id}/exports",
             headers=self.headers,
             json=payload
@@ -178,6 +208,96 @@ class KlapAPI:
         response.raise_for_status()
         return response.json()
 
+    def list_exports(self, folder_id: str, project_id: str) -> List[Dict]:
+        """Exports already made for a short ([] if Klap offers no listing)"""
+        response = self.session.get(
+            f"{self.base_url}/projects/{folder_id}/{project_id}/exports",
+            headers=self.headers
+        )
+        if response.status_code in (404, 405):
+            return []
+        response.raise_for_status()
+        exports = response.json()
+
+        if isinstance(exports, dict):
+            exports = exports.get('exports', [])
+        return exports
+
+    def find_export(
+        self,
+        folder_id: str,
+        project_id: str,
+        watermark_url: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Reusable export of a short with the same watermark
+
+        Checks the job store first (ready exports whose URL is younger
+        than EXPORT_URL_TTL, or exports still rendering), then Klap's
+        export listing. A finished export is preferred over one in
+        progress; remote hits are recorded in the job store. An export
+        a previous run requested is checked once: if Klap no longer has
+        it (404) or it failed, the job is failed and None is returned
+        so the caller requests it again.
+
+        Returns:
+            Export object ({"id", "status", "src_url"}) or None
+        """
+        jobs = get_job_store()
+        export_key = export_job_key(folder_id, project_id, watermark_url)
+        job = jobs.get(EXPORT, export_key)
+
+        if (job and job['status'] == 'ready' and job['data'].get('src_url')
+                and time.time() - job['updated_at'] < EXPORT_URL_TTL):
+            return {"id": job['data'].get('export_id'), "status": "ready", "src_url": job['data']['src_url']}
+
+        try:
+            remote = self.list_exports(folder_id, project_id)
+        except Exception as e:
+            print(f"Warning: could not list exports of {project_id}: {e}")
+            remote = []
+
+        matching = [
+            export for export in remote
+            if ((export.get('watermark') or {}).get('src_url') or None) == watermark_url
+        ]
+        for export in matching:
+            if export.get('status') in EXPORT_DONE_STATUSES and export.get('src_url'):
+                jobs.update(EXPORT, export_key, 'ready', export_id=export['id'], src_url=export['src_url'])
+                return export
+
+        if job and job['status'] == 'requested':
+            export = self._requested_export(folder_id, project_id, job['data']['export_id'])
+            if export and export.get('status') in EXPORT_DONE_STATUSES and export.get('src_url'):
+                jobs.update(EXPORT, export_key, 'ready', export_id=export['id'], src_url=export['src_url'])
+                return export
+            if export:
+                return export
+            # Gone or failed on Klap's side: request it again
+            jobs.fail(EXPORT, export_key, 'Export no longer available on Klap')
+        for export in matching:
+            if export.get('status') not in EXPORT_DONE_STATUSES + ('error',):
+                jobs.update(EXPORT, export_key, 'requested', export_id=export['id'])
+                return export
+        return None
+
+    def _requested_export(self, folder_id: str, project_id: str, export_id: str) -> Optional[Dict]:
+        """Current state of an export a previous run requested, None if gone or failed"""
+        try:
+            export = self.get_export_status(folder_id, project_id, export_id)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            print(f"Warning: could not check export {export_id}: {e}")
+            return {"id": export_id, "status": "processing"}
+        except requests.RequestException as e:
+            print(f"Warning: could not check export {export_id}: {e}")
+            return {"id": export_id, "status": "processing"}
+
+        if export.get('status') == 'error':
+            return None
+        return dict(export, id=export.get('id') or export_id)
+
     def get_export_status(
         self,
         folder_id: str,
@@ -185,7 +305,7 @@ class KlapAPI:
         export_id: str
     ) -> Dict:
         """Get export status and download URL"""
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/projects/{folder_id}/{project_id}/exports/{export_id}",
             headers=self.headers
         )
@@ -197,38 +317,45 @@ class KlapAPI:
         folder_id: str,
         project_id: str,
         export_id: str,
-        poll_interval: int = 10,
-        max_wait: int = 300
+        poll_interval: Optional[int] = None,
+        max_wait: int = 300,
+        duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
     ) -> str:
         """
         Wait for export to complete and return download URL
+
+        poll_interval is fixed when given, adaptive otherwise;
+        duration is the short's length in seconds (sharpens the ETA);
+        submitted_at is when a resumed export was requested.
         """
-        start_time = time.time()
+        poll = PollTracker('export', max_wait, duration, poll_interval, submitted_at)
 
         while True:
             export = self.get_export_status(folder_id, project_id, export_id)
-            status = export['status']
-
-            elapsed = int(time.time() - start_time)
-            print(f"[{elapsed}s] Export status: {status}")
+            outcome = poll.observe(export)
+            print(f"[{int(poll.elapsed)}s] Export status: {export['status']}")
 
-            if status == "completed":
+            if outcome == 'ready':
                 return export['src_url']
-            elif status == "error":
-                raise Exception(f"Export failed: {export}")
-            elif elapsed > max_wait:
-                raise TimeoutError(f"Export timeout after {max_wait}s")
-
-            time.sleep(poll_interval)
+            poll.raise_for(outcome, export)
+            time.sleep(poll.next_delay())
 
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python klap_clipper.py <video_url> [max_clips]")
+        print("       python klap_clipper.py --manifest <sources.yaml|.jsonl> [workers] [results.json]")
         print("Example: python klap_clipper.py https://youtube.com/watch?v=xxx 5")
         print("\nNote: API key is loaded from .env file (KLAP_API_KEY)")
         sys.exit(1)
 
+    if sys.argv[1] == '--manifest':
+        # Imported here: klap_batch builds on this module
+        from klap_batch import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+
     api_key = os.getenv('KLAP_API_KEY')
     if not api_key:
         print("Error: KLAP_API_KEY not found in .env file")
@@ -238,33 +365,63 @@ def main():
     max_clips = int(sys.argv[2]) if len(sys.argv) > 2 else 5
 
     klap = KlapAPI(api_key)
-
-    # Step 1: Submit video
-    print(f"\n=== Submitting Video ===")
-    print(f"URL: {video_url}")
-    print(f"Max clips: {max_clips}")
-
-    task = klap.create_shorts_task(
-        video_url=video_url,
+    options = dict(
         target_clip_count=max_clips,
         max_duration=60,
         captions=True,
         reframe=True
     )
+    run = ShortsRun(video_url, klap.shorts_payload(video_url, **options), KlapResultCache())
+    cached = run.cached()
+
+    if cached:
+        # Same source and options were processed before
+        print(f"\n=== Using Cached Result ===")
+        task_id = cached['task_id']
+        folder_id = cached['output_id']
+        shorts = cached['shorts']
+        print(f"Task ID: {task_id}")
+        print(f"Folder ID: {folder_id}")
+    else:
+        resumed = run.resumable()
+        if resumed:
+            # A previous run submitted this video but did not finish
+            print(f"\n=== Resuming Task ===")
+            task_id = resumed['task_id']
+            folder_id = resumed['output_id']
+        else:
+            # Step 1: Submit video
+            print(f"\n=== Submitting Video ===")
+            print(f"URL: {video_url}")
+            print(f"Max clips: {max_clips}")
+
+            task = klap.create_shorts_task(video_url=video_url, **options)
+
+            task_id = task['id']
+            folder_id = task['output_id']
+            run.submitted(task)
+
+        print(f"Task ID: {task_id}")
+        print(f"Folder ID: {folder_id}")
+
+        # Step 2: Wait for completion
+        print(f"\n=== Processing Video ===")
+        try:
+            klap.wait_for_completion(
+                task_id,
+                source_duration=run.source_duration(),
+                submitted_at=run.submitted_at
+            )
+        except Exception as e:
+            run.failed(e)
+            raise
+        print(f"✓ Processing complete!")
+
+        # Step 3: Get shorts
+        shorts = klap.get_shorts(folder_id)
+        run.ready(task_id, folder_id, shorts)
 
-    task_id = task['id']
-    folder_id = task['output_id']
-    print(f"Task ID: {task_id}")
-    print(f"Folder ID: {folder_id}")
-
-    # Step 2: Wait for completion
-    print(f"\n=== Processing Video ===")
-    completed_task = klap.wait_for_completion(task_id)
-    print(f"✓ Processing complete!")
-
-    # Step 3: Get shorts
     print(f"\n=== Generated Shorts ===")
-    shorts = klap.get_shorts(folder_id)
 
     # Sort by virality score
     shorts.sort(key=lambda x: x.get('virality_score', 0), reverse=True)
@@ -283,10 +440,33 @@ def main():
         print(f"\n=== Exporting Top Short ===")
         print(f"Project ID: {top_short['id']}")
 
-        export_task = klap.export_short(folder_id, top_short['id'])
-        export_id = export_task['id']
-
-        download_url = klap.wait_for_export(folder_id, top_short['id'], export_id)
+        export = run.export(folder_id, top_short['id'])
+        download_url = export.cached_url()
+        if download_url:
+            print(f"✓ Reusing cached export")
+        else:
+            step, found = export.plan(klap.find_export(folder_id, top_short['id']))
+            if step == 'reused':
+                download_url = found
+                print(f"✓ Reusing existing export")
+            else:
+                if step == 'wait':
+                    export_id = found
+                    print(f"Waiting on export already in progress: {export_id}")
+                else:
+                    export_id = klap.export_short(folder_id, top_short['id'])['id']
+                    export.requested(export_id)
+
+                try:
+                    download_url = klap.wait_for_export(
+                        folder_id, top_short['id'], export_id,
+                        duration=top_short.get('duration'),
+                        submitted_at=export.requested_at
+                    )
+                except Exception as e:
+                    export.failed(e)
+                    raise
+                export.ready(download_url)
 
         print(f"\n✓ Export complete!")
         print(f"Download URL: {download_url}")
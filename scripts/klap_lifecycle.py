@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Shared bookkeeping of the Klap shorts lifecycle
+Cache, job-store and export-reuse steps used by the blocking and async clients
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import metrics
+from job_store import TASK, EXPORT, export_job_key, get_job_store
+from klap_cache import KlapResultCache, cache_key
+from klap_polling import EXPORT_DONE_STATUSES
+from media_probe import source_duration
+
+
+class ShortsRun:
+    """
+    Steps of turning one source video into shorts
+
+    klap_clipper.main (blocking calls) and klap_async.process_video
+    (awaited calls) talk to Klap in the same order:
+
+        cached() → resumable() → submit + submitted() → wait → ready()
+
+    The decisions and records between those calls live here.
+    submitted_at is set once the task is submitted or resumed.
+    """
+
+    def __init__(self, video_url: str, payload: Dict, cache: Optional[KlapResultCache] = None):
+        self.video_url = video_url
+        self.cache = cache
+        self.jobs = get_job_store()
+        self.key = cache_key(video_url, payload)
+        self.submitted_at: Optional[float] = None
+
+    def cached(self) -> Optional[Dict]:
+        """{"task_id", "output_id", "shorts"} of an earlier run with the same source and options"""
+        return self.cache.get(self.key) if self.cache else None
+
+    def resumable(self) -> Optional[Dict]:
+        """Job data ({"task_id", "output_id", ...}) of a task submitted but never finished"""
+        job = self.jobs.get(TASK, self.key)
+        if job and job['status'] == 'submitted':
+            self.submitted_at = self.jobs.entered_at(TASK, self.key, 'submitted')
+            return job['data']
+        return None
+
+    def submitted(self, task: Dict):
+        """Record a freshly created task so a crashed run resumes it"""
+        self.submitted_at = time.time()
+        self.jobs.update(
+            TASK, self.key, 'submitted',
+            task_id=task['id'], output_id=task['output_id'], video_url=self.video_url
+        )
+
+    def source_duration(self) -> Optional[float]:
+        """Source length in seconds for the ETA, probed once and kept with the task job"""
+        job = self.jobs.get(TASK, self.key)
+        if job and 'source_duration' in job['data']:
+            return job['data']['source_duration']
+
+        duration = source_duration(self.video_url)
+        if job:
+            self.jobs.update(TASK, self.key, job['status'], source_duration=duration)
+        return duration
+
+    def failed(self, error: Exception):
+        """Record a failed wait (timeouts stay 'submitted' and are resumed)"""
+        if not isinstance(error, TimeoutError):
+            self.jobs.fail(TASK, self.key, str(error))
+
+    def ready(self, task_id: str, folder_id: str, shorts: List[Dict]):
+        """Record the generated shorts"""
+        self.jobs.update(TASK, self.key, 'ready', shorts=len(shorts))
+        if self.cache:
+            self.cache.put(self.key, task_id, folder_id, shorts)
+
+    def export(self, folder_id: str, project_id: str, watermark_url: Optional[str] = None) -> 'ExportSteps':
+        """Export steps of one of this run's shorts (cached with the run)"""
+        return ExportSteps(folder_id, project_id, watermark_url, self.cache, self.key)
+
+
+class ExportSteps:
+    """
+    Steps of getting the download URL of one short
+
+    Shared by klap_clipper.main, process_video and klap_pipeline:
+
+        cached_url() → plan(find_export(...)) → request + requested() → wait → ready()
+
+    requested_at is set once the export is requested or found in progress
+    (for one found only in Klap's listing, when it was found).
+    """
+
+    def __init__(
+        self,
+        folder_id: str,
+        project_id: str,
+        watermark_url: Optional[str] = None,
+        cache: Optional[KlapResultCache] = None,
+        source_key: Optional[str] = None
+    ):
+        self.folder_id = folder_id
+        self.project_id = project_id
+        self.cache = cache
+        self.source_key = source_key
+        self.jobs = get_job_store()
+        self.key = export_job_key(folder_id, project_id, watermark_url)
+        self.requested_at: Optional[float] = None
+
+    def cached_url(self) -> Optional[str]:
+        """Download URL cached with the source run, if still fresh"""
+        if not (self.cache and self.source_key):
+            return None
+        url = self.cache.get_export(self.source_key, self.project_id)
+        if url:
+            metrics.EXPORTS.inc(result='cached')
+        return url
+
+    def plan(self, existing: Optional[Dict]) -> Tuple[str, Optional[str]]:
+        """
+        Next step given the result of find_export
+
+        Returns:
+            ('reused', src_url) for a finished export, ('wait', export_id)
+            for one still rendering, ('request', None) when there is none
+        """
+        if existing and existing['status'] in EXPORT_DONE_STATUSES:
+            metrics.EXPORTS.inc(result='reused')
+            self._cache(existing['src_url'])
+            return 'reused', existing['src_url']
+        if existing:
+            self.requested_at = self.jobs.entered_at(EXPORT, self.key, 'requested')
+            return 'wait', existing['id']
+        return 'request', None
+
+    def requested(self, export_id: str):
+        """Record a new export request so a crashed run waits on it"""
+        self.requested_at = time.time()
+        self.jobs.update(EXPORT, self.key, 'requested', export_id=export_id)
+
+    def failed(self, error: Union[Exception, str]):
+        """Record a failed wait (timeouts stay 'requested' and are resumed)"""
+        if not isinstance(error, TimeoutError):
+            self.jobs.fail(EXPORT, self.key, str(error))
+
+    def ready(self, src_url: str):
+        """Record the finished export's download URL"""
+        self.jobs.update(EXPORT, self.key, 'ready', src_url=src_url)
+        self._cache(src_url)
+
+    def _cache(self, src_url: str):
+        if self.cache and self.source_key:
+            self.cache.put_export(self.source_key, self.project_id, src_url)
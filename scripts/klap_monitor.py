@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Multiplexed monitor for in-flight Klap tasks and exports
+Polls everything on one shared schedule and fires ready/error/timeout events
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Callable, Dict, List, Optional
+
+from klap_async import AsyncKlapAPI
+from klap_polling import PollTracker, error_text
+
+EVENTS = ("ready", "error", "timeout")
+
+# Consecutive failed polls (timeouts, 5xx, dropped connections) before
+# an item is given up on; failed polls back off exponentially up to
+# POLL_FAILURE_MAX_DELAY seconds
+MAX_POLL_FAILURES = 5
+POLL_FAILURE_MAX_DELAY = 60
+
+
+def permanent_failure(error: Exception) -> bool:
+    """Whether a failed poll will not succeed on retry (a 4xx other than 408/429)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+class WatchedItem:
+    """One task or export being tracked by the monitor"""
+
+    def __init__(
+        self,
+        kind: str,
+        key: str,
+        name: str,
+        max_wait: float,
+        ids: Dict[str, str],
+        duration: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ):
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.max_wait = max_wait
+        self.ids = ids
+        self.poll = PollTracker(kind, max_wait, duration, poll_interval, submitted_at)
+        self.next_poll = self.poll.started
+        self.status: Optional[str] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.failures = 0
+
+    @property
+    def elapsed(self) -> float:
+        return self.poll.elapsed
+
+    def __repr__(self):
+        return f"<{self.kind} {self.name}: {self.status}>"
+
+
+class KlapMonitor:
+    """
+    Track many Klap tasks and exports at once
+
+    Usage:
+        monitor = KlapMonitor(AsyncKlapAPI(api_key))
+        monitor.on('ready', handle_ready)        # handler(item)
+        monitor.watch_task(task_id, name='episode-12')
+        results = await monitor.run()
+
+    Every item gets its own adaptive poll time (see klap_polling); one
+    loop polls all items that are due concurrently, then sleeps until
+    the next one is due. Handlers run the moment their item resolves and
+    may add new items (e.g. watch an export once a task is ready).
+    Coroutine handlers are scheduled without blocking the poll loop.
+    A failed poll is retried with backoff; 'error' fires when Klap
+    reports an error status, on a 4xx response, or after
+    MAX_POLL_FAILURES failed polls in a row.
+    """
+
+    def __init__(self, klap: AsyncKlapAPI, poll_interval: Optional[float] = None):
+        self.klap = klap
+        self.poll_interval = poll_interval
+        self.items: Dict[str, WatchedItem] = {}
+        self.handlers: Dict[str, List[Callable]] = {event: [] for event in EVENTS}
+        self._pending: Dict[str, WatchedItem] = {}
+        self._handler_tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def on(self, event: str, handler: Callable):
+        """Register handler(item) for 'ready', 'error' or 'timeout'"""
+        if event not in self.handlers:
+            raise ValueError(f"Unknown event: {event} (expected one of {EVENTS})")
+        self.handlers[event].append(handler)
+
+    def _add(self, item: WatchedItem) -> str:
+        self.items[item.key] = item
+        self._pending[item.key] = item
+        if self._wakeup:
+            self._wakeup.set()
+        return item.key
+
+    def watch_task(
+        self,
+        task_id: str,
+        name: Optional[str] = None,
+        max_wait: float = 1800,
+        source_duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ) -> str:
+        """
+        Track a video-to-shorts task until it is ready
+
+        source_duration (e.g. from media_probe.source_duration) and, for
+        a task created by an earlier run, submitted_at sharpen the ETA;
+        without them the task's own metadata is used when Klap reports it.
+        """
+        return self._add(WatchedItem(
+            kind='task',
+            key=f"task:{task_id}",
+            name=name or task_id,
+            max_wait=max_wait,
+            ids={"task_id": task_id},
+            duration=source_duration,
+            poll_interval=self.poll_interval,
+            submitted_at=submitted_at
+        ))
+
+    def watch_export(
+        self,
+        folder_id: str,
+        project_id: str,
+        export_id: str,
+        name: Optional[str] = None,
+        max_wait: float = 300,
+        duration: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ) -> str:
+        """Track an export until its download URL is available"""
+        return self._add(WatchedItem(
+            kind='export',
+            key=f"export:{folder_id}/{project_id}/{export_id}",
+            name=name or project_id,
+            max_wait=max_wait,
+            ids={"folder_id": folder_id, "project_id": project_id, "export_id": export_id},
+            duration=duration,
+            poll_interval=self.poll_interval,
+            submitted_at=submitted_at
+        ))
+
+    def _emit(self, event: str, item: WatchedItem):
+        self._pending.pop(item.key, None)
+        for handler in self.handlers[event]:
+            result = handler(item)
+            if inspect.isawaitable(result):
+                self._handler_tasks.append(asyncio.ensure_future(result))
+
+    def _reap_handlers(self):
+        running = []
+        for task in self._handler_tasks:
+            if not task.done():
+                running.append(task)
+            elif not task.cancelled() and task.exception():
+                print(f"✗ Monitor handler failed: {task.exception()!r}")
+        self._handler_tasks = running
+
+    async def _poll(self, item: WatchedItem):
+        try:
+            if item.kind == 'task':
+                data = await self.klap.get_task_status(item.ids['task_id'])
+            else:
+                data = await self.klap.get_export_status(
+                    item.ids['folder_id'], item.ids['project_id'], item.ids['export_id']
+                )
+        except Exception as e:
+            item.failures += 1
+            if item.failures < MAX_POLL_FAILURES and not permanent_failure(e):
+                delay = min(2 ** item.failures, POLL_FAILURE_MAX_DELAY)
+                print(f"  {item.name}: poll failed ({e}), retry {item.failures}/{MAX_POLL_FAILURES - 1} in {delay}s")
+                item.next_poll = time.time() + delay
+                return
+            item.status = 'error'
+            item.error = str(e)
+            self._emit('error', item)
+            return
+
+        item.failures = 0
+        item.status = data.get('status')
+        item.result = data
+        outcome = item.poll.observe(data)
+
+        if outcome == 'ready':
+            self._emit('ready', item)
+        elif outcome == 'error':
+            item.error = error_text(data)
+            self._emit('error', item)
+        elif outcome == 'timeout':
+            item.status = 'timeout'
+            item.error = f"timeout after {item.max_wait}s"
+            self._emit('timeout', item)
+        else:
+            item.next_poll = time.time() + item.poll.next_delay()
+
+    async def run(self, until: Optional[asyncio.Future] = None) -> Dict[str, WatchedItem]:
+        """
+        Poll until every watched item is ready, failed or timed out
+
+        Args:
+            until: Keep running until this future is done as well, e.g.
+                the requests that are still adding items to watch
+
+        Returns:
+            All watched items keyed by "task:<id>" / "export:<folder>/<project>/<id>"
+        """
+        self._wakeup = asyncio.Event()
+
+        def feeding() -> bool:
+            return until is not None and not until.done()
+
+        while self._pending or self._handler_tasks or feeding():
+            now = time.time()
+            due = [item for item in self._pending.values() if item.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll(item) for item in due))
+
+            self._reap_handlers()
+
+            if self._pending:
+                delay = max(0, min(item.next_poll for item in self._pending.values()) - time.time())
+            elif self._handler_tasks or feeding():
+                # Nothing to poll, but handlers or `until` may still add items
+                delay = None
+            else:
+                break
+
+            self._wakeup.clear()
+            waiters = [asyncio.ensure_future(self._wakeup.wait())] + self._handler_tasks
+            if feeding():
+                waiters.append(until)
+            await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            waiters[0].cancel()
+
+        self._wakeup = None
+        return self.items
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Pipelined export + download of Klap shorts
+Requests every export up front, downloads each one as soon as it renders
+"""
+
+import asyncio
+import os
+from typing import List, Dict, Optional
+
+from download_manager import download_file, downloaded_record
+from job_store import DOWNLOAD, get_job_store
+from klap_async import AsyncKlapAPI
+from klap_lifecycle import ExportSteps
+from klap_monitor import KlapMonitor
+from klap_selection import SelectionPolicy
+
+
+async def export_and_download(
+    klap: AsyncKlapAPI,
+    jobs: List[Dict],
+    max_concurrent_exports: int = 5,
+    max_concurrent_downloads: int = 3,
+    watermark_url: Optional[str] = None,
+    export_max_wait: float = 600,
+    selection: Optional[SelectionPolicy] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Export and download every short of one or more Klap folders
+
+    Export requests and export lookups go out at most
+    max_concurrent_exports at a time while a shared KlapMonitor already
+    polls the ones sent, starting each download the moment its export
+    is ready, so Klap's render time overlaps with our requests and
+    downloads. Shorts already downloaded by a previous run are
+    skipped without requesting an export; shorts with a finished export
+    from an earlier run (job store or Klap's export listing) are
+    downloaded straight away, and exports still rendering are watched
+    instead of re-requested.
+    Only shorts chosen by `selection` (default: all) are exported.
+
+    Args:
+        klap: Shared async client
+        jobs: [{"folder": folder_id, "name": label, "dest_dir": path}, ...]
+        max_concurrent_exports: Export requests in flight at once
+        max_concurrent_downloads: Downloads in flight at once
+        watermark_url: Optional watermark image URL for every export
+        export_max_wait: Seconds before an export is given up on
+        selection: Which shorts to export, decided on get_shorts metadata
+
+    Returns:
+        {name: [short result, ...]} sorted by virality score; each result
+        has filename, virality_score, caption, video_url (or error).
+        Filenames keep the short's rank within its folder.
+    """
+    monitor = KlapMonitor(klap)
+    store = get_job_store()
+    export_semaphore = asyncio.Semaphore(max_concurrent_exports)
+    download_semaphore = asyncio.Semaphore(max_concurrent_downloads)
+    results: Dict[str, List[Dict]] = {job['name']: [] for job in jobs}
+    pending: Dict[str, Dict] = {}
+    reused_downloads: List[asyncio.Task] = []
+
+    async def download(job: Dict, entry: Dict, url: str, name: str):
+        entry['video_url'] = url
+        filepath = os.path.join(job['dest_dir'], entry['filename'])
+
+        async with download_semaphore:
+            print(f"  Downloading {name} → {entry['filename']}")
+            store.update(DOWNLOAD, filepath, 'downloading', url=url)
+            try:
+                record = await asyncio.to_thread(download_file, url, filepath)
+            except Exception as e:
+                print(f"  ✗ {name}: download failed: {e}")
+                entry['error'] = str(e)
+                store.fail(DOWNLOAD, filepath, str(e))
+                return
+            store.update(DOWNLOAD, filepath, 'done', size=record['size'], sha256=record['sha256'])
+
+        print(f"  ✓ Saved: {entry['filename']}")
+
+    async def request_export(job: Dict, idx: int, short: Dict):
+        project_id = short['id']
+        score = short.get('virality_score', 0)
+        entry = {
+            "filename": f"short_{idx:02d}_score_{score}.mp4",
+            "virality_score": score,
+            "caption": short.get('caption', '')
+        }
+        results[job['name']].append(entry)
+
+        record = downloaded_record(os.path.join(job['dest_dir'], entry['filename']))
+        if record:
+            entry['video_url'] = record.get('url')
+            print(f"  ✓ Already downloaded: {job['name']}/{entry['filename']}")
+            return
+
+        steps = ExportSteps(job['folder'], project_id, watermark_url)
+        async with export_semaphore:
+            existing = await klap.find_export(job['folder'], project_id, watermark_url)
+        step, found = steps.plan(existing)
+        if step == 'reused':
+            # Rendered by an earlier run and still downloadable
+            reused_downloads.append(asyncio.create_task(
+                download(job, entry, found, f"{job['name']} short {idx}")
+            ))
+            return
+        if step == 'wait':
+            export_id = found
+        else:
+            try:
+                async with export_semaphore:
+                    export_task = await klap.export_short(job['folder'], project_id, watermark_url)
+            except Exception as e:
+                print(f"  ✗ {job['name']} short {idx}: export request failed: {e}")
+                entry['error'] = str(e)
+                return
+            export_id = export_task['id']
+            steps.requested(export_id)
+
+        key = monitor.watch_export(
+            job['folder'], project_id, export_id,
+            name=f"{job['name']} short {idx}",
+            max_wait=export_max_wait,
+            duration=short.get('duration'),
+            submitted_at=steps.requested_at
+        )
+        pending[key] = {"job": job, "entry": entry, "steps": steps}
+
+    async def on_ready(item):
+        job_entry = pending.pop(item.key)
+        src_url = item.result['src_url']
+        job_entry['steps'].ready(src_url)
+        await download(job_entry['job'], job_entry['entry'], src_url, item.name)
+
+    def on_failed(item):
+        job_entry = pending.pop(item.key)
+        print(f"  ✗ {item.name}: export {item.status} ({item.error})")
+        job_entry['entry']['error'] = item.error
+        if item.status == 'error':
+            # Timed-out exports stay 'requested' and are resumed next run
+            job_entry['steps'].failed(item.error)
+
+    monitor.on('ready', on_ready)
+    monitor.on('error', on_failed)
+    monitor.on('timeout', on_failed)
+
+    # Fetch every folder's shorts, pick the ones worth exporting, then
+    # fire all export requests
+    shorts_lists = await asyncio.gather(*(klap.get_shorts(job['folder']) for job in jobs))
+    candidates = {
+        job['name']: sorted(shorts, key=lambda x: x.get('virality_score', 0), reverse=True)
+        for job, shorts in zip(jobs, shorts_lists)
+    }
+    selected = (selection or SelectionPolicy()).select(candidates)
+
+    requests_to_send = []
+    for job in jobs:
+        os.makedirs(job['dest_dir'], exist_ok=True)
+        shorts = candidates[job['name']]
+        chosen = {short['id'] for short in selected.get(job['name'], [])}
+        print(f"Found {len(shorts)} shorts for {job['name']}, exporting {len(chosen)}")
+        for idx, short in enumerate(shorts, 1):
+            if short['id'] in chosen:
+                requests_to_send.append(request_export(job, idx, short))
+
+    # Poll while requests are still going out, so early exports start
+    # downloading before the last request is sent
+    sending = asyncio.ensure_future(asyncio.gather(*requests_to_send))
+    await monitor.run(until=sending)
+    await sending
+    await asyncio.gather(*reused_downloads)
+
+    for entries in results.values():
+        entries.sort(key=lambda x: x['virality_score'], reverse=True)
+    return results
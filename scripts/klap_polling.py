@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Adaptive polling for Klap tasks and exports
+Exponential backoff with jitter, tightened around a learned ETA
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+import metrics
+from runtime_state import locked_json, state_path
+
+ETA_PATH = Path(os.getenv('KLAP_ETA_PATH') or state_path('klap_eta.json'))
+MAX_SAMPLES = 200
+
+# Export status has been seen as both "completed" and "ready"
+EXPORT_DONE_STATUSES = ("completed", "ready")
+# Task fields that may carry the source length when it was not probed locally
+TASK_DURATION_FIELDS = ("source_duration", "duration")
+
+
+class PollPolicy:
+    """
+    Decide how long to sleep before the next status check
+
+    Without an ETA the delay grows exponentially from min_interval to
+    max_interval. With an ETA the delay is half the predicted remaining
+    time (down to eta_floor, below min_interval), so checks get denser
+    as completion approaches and a job that is predicted to be quick is
+    not held back by the floor; once the ETA is overdue polling restarts
+    at min_interval and backs off again.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 2,
+        max_interval: float = 60,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+        eta_floor: float = 0.5
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.eta_floor = eta_floor
+
+    def _clamp(self, delay: float, floor: float) -> float:
+        return max(floor, min(self.max_interval, delay))
+
+    def next_delay(
+        self,
+        attempt: int,
+        elapsed: float,
+        eta: Optional[float] = None
+    ) -> float:
+        """
+        Args:
+            attempt: Number of polls done so far (0-based)
+            elapsed: Seconds since the job was submitted
+            eta: Predicted total processing time in seconds, if known
+
+        Returns:
+            Seconds to sleep before the next poll
+        """
+        if eta is not None and elapsed < eta:
+            delay = (eta - elapsed) / 2
+            floor = self.eta_floor
+        else:
+            if eta is not None:
+                # Overdue: count attempts from the moment the ETA passed
+                attempt = int((elapsed - eta) / self.min_interval)
+            delay = self.min_interval * (self.backoff ** min(attempt, 32))
+            floor = self.min_interval
+
+        delay = self._clamp(delay, floor)
+        spread = delay * self.jitter
+        return self._clamp(delay + random.uniform(-spread, spread), floor)
+
+
+class EtaModel:
+    """
+    Processing-time model learned from past runs
+
+    Samples of (source duration, processing seconds) are kept per kind
+    ("task", "export") in a local JSON file. Predictions use a least
+    squares line over duration when there is enough spread in the data,
+    otherwise the median of past runs.
+    """
+
+    def __init__(self, path: Path = ETA_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[Dict]] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.samples = json.load(f)
+            except (OSError, ValueError):
+                self.samples = {}
+
+    def record(self, kind: str, seconds: float, duration: Optional[float] = None):
+        """Store one observed processing time, merged into the file other runs share"""
+        with self._lock, locked_json(self.path, {}) as samples:
+            kind_samples = samples.setdefault(kind, [])
+            kind_samples.append({
+                "duration": duration,
+                "seconds": round(seconds, 1),
+                "at": int(time.time())
+            })
+            del kind_samples[:-MAX_SAMPLES]
+            self.samples = samples
+
+    def predict(self, kind: str, duration: Optional[float] = None) -> Optional[float]:
+        """Predicted processing seconds, or None with no history"""
+        with self._lock:
+            samples = list(self.samples.get(kind, []))
+
+        if not samples:
+            return None
+
+        points = [(s['duration'], s['seconds']) for s in samples if s.get('duration')]
+        if duration and len(points) >= 3:
+            n = len(points)
+            mean_x = sum(x for x, _ in points) / n
+            mean_y = sum(y for _, y in points) / n
+            var_x = sum((x - mean_x) ** 2 for x, _ in points)
+            if var_x > 0:
+                slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+                estimate = mean_y + slope * (duration - mean_x)
+                if estimate > 0:
+                    return estimate
+
+        return median(s['seconds'] for s in samples)
+
+
+_eta_model: Optional[EtaModel] = None
+_eta_model_lock = threading.Lock()
+
+
+def get_eta_model() -> EtaModel:
+    """Process-wide ETA model backed by ETA_PATH"""
+    global _eta_model
+    with _eta_model_lock:
+        if _eta_model is None:
+            _eta_model = EtaModel()
+        return _eta_model
+
+
+# Task processing takes minutes, exports tens of seconds
+TASK_POLICY = PollPolicy(min_interval=2, max_interval=60)
+EXPORT_POLICY = PollPolicy(min_interval=1, max_interval=20)
+
+
+def is_done(kind: str, status: Optional[str]) -> bool:
+    """Whether a task ("ready") or export (EXPORT_DONE_STATUSES) has finished"""
+    return status == 'ready' if kind == 'task' else status in EXPORT_DONE_STATUSES
+
+
+def error_text(data: Dict) -> str:
+    """Error detail of a failed task or export response"""
+    return str(data.get('error_code') or data)
+
+
+class PollTracker:
+    """
+    One wait on a Klap task or export
+
+    Interprets status responses, schedules the next poll and records the
+    ETA sample. KlapAPI, AsyncKlapAPI and KlapMonitor all wait through
+    it and only differ in how they fetch the status and sleep.
+
+    max_wait counts from when this wait started; the ETA and the
+    recorded sample count from submitted_at, so a task resumed by a
+    later run is neither polled as if it had just started nor learned
+    as faster than it was.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        max_wait: float,
+        duration: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        submitted_at: Optional[float] = None
+    ):
+        self.kind = kind
+        self.max_wait = max_wait
+        self.duration = duration
+        self.poll_interval = poll_interval
+        self.policy = TASK_POLICY if kind == 'task' else EXPORT_POLICY
+        self.eta = get_eta_model().predict(kind, duration)
+        self.started = time.time()
+        self.submitted_at = submitted_at or self.started
+        self.attempt = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since this wait started"""
+        return time.time() - self.started
+
+    @property
+    def processing(self) -> float:
+        """Seconds since the job was submitted"""
+        return time.time() - self.submitted_at
+
+    def observe(self, data: Dict) -> str:
+        """
+        Interpret one status response
+
+        Returns:
+            'ready', 'error', 'timeout' or 'pending'
+        """
+        status = data.get('status')
+        metrics.POLLS.inc(kind=self.kind, status=status)
+        if self.duration is None and self.kind == 'task':
+            reported = next((data[f] for f in TASK_DURATION_FIELDS
+                             if isinstance(data.get(f), (int, float)) and data[f] > 0), None)
+            if reported is not None:
+                self.duration = float(reported)
+                self.eta = get_eta_model().predict(self.kind, self.duration)
+
+        if is_done(self.kind, status):
+            get_eta_model().record(self.kind, self.processing, self.duration)
+            metrics.STAGE_SECONDS.observe(self.processing, kind=self.kind)
+            outcome = 'ready'
+        elif status == 'error':
+            outcome = 'error'
+        elif self.elapsed > self.max_wait:
+            outcome = 'timeout'
+        else:
+            return 'pending'
+
+        if self.kind == 'export':
+            metrics.EXPORTS.inc(result=outcome)
+        return outcome
+
+    def raise_for(self, outcome: str, data: Dict):
+        """Raise for an 'error' or 'timeout' outcome (no-op otherwise)"""
+        if outcome == 'error':
+            raise Exception(f"{self.kind.capitalize()} failed: {error_text(data)}")
+        if outcome == 'timeout':
+            raise TimeoutError(f"{self.kind.capitalize()} timeout after {self.max_wait}s")
+
+    def next_delay(self) -> float:
+        """Seconds to sleep before the next poll"""
+        delay = self.poll_interval or self.policy.next_delay(self.attempt, self.processing, self.eta)
+        self.attempt += 1
+        return delay
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Export selection policies for Klap shorts
+Decide from get_shorts metadata which shorts are worth exporting at all
+"""
+
+from typing import Dict, List, Optional
+
+# {source name: [short, ...]} as returned by get_shorts, per folder
+Candidates = Dict[str, List[Dict]]
+
+
+def _score(short: Dict) -> float:
+    return short.get('virality_score', 0)
+
+
+class SelectionPolicy:
+    """
+    Base policy: keeps every short
+
+    select() receives every source's shorts and returns the subset to
+    export, each list sorted by virality score (highest first).
+    Policies combine with `&`, applied left to right.
+    """
+
+    def select(self, candidates: Candidates) -> Candidates:
+        return {name: sorted(shorts, key=_score, reverse=True) for name, shorts in candidates.items()}
+
+    def __and__(self, other: 'SelectionPolicy') -> 'SelectionPolicy':
+        return Chain(self, other)
+
+    def __repr__(self):
+        fields = ', '.join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"{type(self).__name__}({fields})"
+
+
+class Chain(SelectionPolicy):
+    """Apply policies one after another"""
+
+    def __init__(self, *policies: SelectionPolicy):
+        self.policies = policies
+
+    def select(self, candidates: Candidates) -> Candidates:
+        for policy in self.policies:
+            candidates = policy.select(candidates)
+        return candidates
+
+
+class MinScore(SelectionPolicy):
+    """Keep shorts with virality_score >= threshold"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def select(self, candidates: Candidates) -> Candidates:
+        return super().select({
+            name: [s for s in shorts if _score(s) >= self.threshold]
+            for name, shorts in candidates.items()
+        })
+
+
+class DurationWindow(SelectionPolicy):
+    """Keep shorts whose duration (seconds) lies in [min_seconds, max_seconds]"""
+
+    def __init__(self, min_seconds: float = 0, max_seconds: Optional[float] = None):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+
+    def _fits(self, short: Dict) -> bool:
+        duration = short.get('duration')
+        if duration is None:
+            return True
+        if duration < self.min_seconds:
+            return False
+        return self.max_seconds is None or duration <= self.max_seconds
+
+    def select(self, candidates: Candidates) -> Candidates:
+        return super().select({
+            name: [s for s in shorts if self._fits(s)]
+            for name, shorts in candidates.items()
+        })
+
+
+class TopKPerSource(SelectionPolicy):
+    """Keep the k highest-scoring shorts of every source"""
+
+    def __init__(self, k: int):
+        self.k = k
+
+    def select(self, candidates: Candidates) -> Candidates:
+        return {name: shorts[:self.k] for name, shorts in super().select(candidates).items()}
+
+
+class GlobalTopK(SelectionPolicy):
+    """Keep the k highest-scoring shorts across all sources"""
+
+    def __init__(self, k: int):
+        self.k = k
+
+    def select(self, candidates: Candidates) -> Candidates:
+        ranked = sorted(
+            ((name, short) for name, shorts in candidates.items() for short in shorts),
+            key=lambda pair: _score(pair[1]),
+            reverse=True
+        )
+        selected: Candidates = {name: [] for name in candidates}
+        for name, short in ranked[:self.k]:
+            selected[name].append(short)
+        return selected
+
+
+def policy_from_options(
+    min_score: Optional[float] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    top_k: Optional[int] = None,
+    global_top_k: Optional[int] = None
+) -> SelectionPolicy:
+    """
+    Build a policy from plain options (e.g. manifest or CLI values)
+
+    Filters run first, then the per-source cut, then the global cut.
+    """
+    policies: List[SelectionPolicy] = []
+    if min_score is not None:
+        policies.append(MinScore(min_score))
+    if min_duration is not None or max_duration is not None:
+        policies.append(DurationWindow(min_duration or 0, max_duration))
+    if top_k is not None:
+        policies.append(TopKPerSource(top_k))
+    if global_top_k is not None:
+        policies.append(GlobalTopK(global_top_k))
+    return Chain(*policies) if policies else SelectionPolicy()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Media probe index for source videos
+Runs ffprobe once per source and caches duration, streams and keyframes by content hash
+"""
+
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from content_hash import source_identity
+from runtime_state import state_path
+
+PROBE_DIR = Path(os.getenv('MEDIA_PROBE_DIR') or state_path('media_probe'))
+# Seconds ffprobe may wait on a remote source before giving up
+URL_PROBE_TIMEOUT = 10
+# Watch-page hosts: their URLs are not media ffprobe can read
+PAGE_HOSTS = ('youtube.com', 'www.youtube.com', 'm.youtube.com', 'youtu.be')
+# Bump when the stored fields change so old entries are re-probed
+INDEX_VERSION = 2
+
+
+class ProbeError(Exception):
+    """ffprobe could not read the source"""
+
+
+class MediaInfo:
+    """
+    Probe results for one source
+
+    duration: seconds; streams: ffprobe stream dicts; keyframes: video
+    keyframe presentation times in seconds (sorted); open_gop: whether
+    frames after a keyframe (in decode order) are shown before it, i.e.
+    the GOPs may reference the previous one.
+    """
+
+    def __init__(self, identity: str, duration: float, format_name: str,
+                 streams: List[Dict], keyframes: List[float], open_gop: bool = False):
+        self.identity = identity
+        self.duration = duration
+        self.format_name = format_name
+        self.streams = streams
+        self.keyframes = keyframes
+        self.open_gop = open_gop
+
+    @property
+    def video(self) -> Optional[Dict]:
+        """First video stream"""
+        return next((s for s in self.streams if s.get('codec_type') == 'video'), None)
+
+    @property
+    def audio(self) -> Optional[Dict]:
+        """First audio stream"""
+        return next((s for s in self.streams if s.get('codec_type') == 'audio'), None)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    @property
+    def fps(self) -> Optional[float]:
+        rate = (self.video or {}).get('avg_frame_rate') or (self.video or {}).get('r_frame_rate')
+        if not rate or rate == '0/0':
+            return None
+        num, _, den = rate.partition('/')
+        return float(num) / float(den or 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": INDEX_VERSION,
+            "identity": self.identity,
+            "duration": self.duration,
+            "format_name": self.format_name,
+            "streams": self.streams,
+            "keyframes": self.keyframes,
+            "open_gop": self.open_gop
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MediaInfo':
+        return cls(data['identity'], data['duration'], data['format_name'],
+                   data['streams'], data['keyframes'], data['open_gop'])
+
+
+def _ffprobe(args: List[str]) -> str:
+    try:
+        result = subprocess.run(['ffprobe', '-v', 'error'] + args, capture_output=True, text=True)
+    except OSError as e:
+        raise ProbeError(f"cannot run ffprobe: {e}") from e
+    if result.returncode != 0:
+        raise ProbeError(result.stderr.strip() or f"ffprobe exited with {result.returncode}")
+    return result.stdout
+
+
+def scan_keyframes(video_path: str) -> Tuple[List[float], bool]:
+    """
+    Keyframe presentation times (seconds) and whether the GOPs are open
+
+    Reads packet flags only, so the source is demuxed but not decoded.
+    A GOP is open when a packet following its keyframe in decode order
+    has an earlier presentation time (leading B-frames, which may
+    reference the previous GOP). The first keyframe is not considered,
+    as nothing precedes it.
+    """
+    output = _ffprobe([
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=print_section=0',
+        video_path
+    ])
+    times = []
+    open_gop = False
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if pts_time in ('', 'N/A'):
+            continue
+        pts = float(pts_time)
+        if 'K' in flags:
+            times.append(pts)
+        elif len(times) > 1 and pts < times[-1]:
+            open_gop = True
+    return sorted(times), open_gop
+
+
+def keyframe_times(video_path: str) -> List[float]:
+    """
+    Presentation times (seconds) of every video keyframe
+
+    Reads packet flags only, so the source is demuxed but not decoded.
+    """
+    return scan_keyframes(video_path)[0]
+
+
+def probe(video_path: str, identity: Optional[str] = None) -> MediaInfo:
+    """Run ffprobe on video_path (no caching)"""
+    data = json.loads(_ffprobe(['-show_format', '-show_streams', '-of', 'json', video_path]) or '{}')
+    fmt = data.get('format') or {}
+    streams = data.get('streams') or []
+    has_video = any(s.get('codec_type') == 'video' for s in streams)
+    keyframes, open_gop = scan_keyframes(video_path) if has_video else ([], False)
+    return MediaInfo(
+        identity=identity or source_identity(video_path),
+        duration=float(fmt.get('duration') or 0),
+        format_name=fmt.get('format_name', ''),
+        streams=streams,
+        keyframes=keyframes,
+        open_gop=open_gop
+    )
+
+
+# In-process cache keyed by file state, so repeat lookups in one run
+# never hash the source again
+_memory: Dict[Tuple, MediaInfo] = {}
+_lock = threading.Lock()
+
+
+def _file_state(video_path: str) -> Tuple:
+    """(real path, device, inode, size, mtime) of video_path"""
+    real_path = os.path.realpath(video_path)
+    try:
+        stat = os.stat(real_path)
+    except OSError as e:
+        raise ProbeError(f"cannot read {video_path}: {e}") from e
+    return (real_path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def get_media_info(video_path: str) -> MediaInfo:
+    """
+    Probe results for video_path, from the index when available
+
+    The index holds one JSON file per source content hash in PROBE_DIR,
+    so renamed or copied files are not probed again and a changed file
+    is. Within a process results are also kept per path and file state,
+    and the content hash is only computed to look up the index.
+
+    Raises:
+        ProbeError: if the source cannot be probed
+    """
+    state = _file_state(video_path)
+    with _lock:
+        if state in _memory:
+            return _memory[state]
+
+    identity = source_identity(video_path)
+    index_path = PROBE_DIR / f"{identity.split(':')[-1]}.json"
+    try:
+        with open(index_path) as f:
+            data = json.load(f)
+        if data.get('version') == INDEX_VERSION:
+            info = MediaInfo.from_dict(data)
+            with _lock:
+                _memory[state] = info
+            return info
+    except (OSError, ValueError, KeyError):
+        pass
+
+    info = probe(video_path, identity)
+    PROBE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(info.to_dict(), f)
+    os.replace(tmp_path, index_path)
+
+    with _lock:
+        _memory[state] = info
+    return info
+
+
+def source_duration(source: str) -> Optional[float]:
+    """
+    Length in seconds of a local file or direct media URL, None if unknown
+
+    Local files go through get_media_info (indexed); for URLs ffprobe
+    reads only the container header. Watch-page URLs such as YouTube
+    links cannot be probed and give None.
+    """
+    if os.path.isfile(source):
+        try:
+            return get_media_info(source).duration or None
+        except ProbeError:
+            return None
+
+    parts = urlsplit(source)
+    if parts.scheme not in ('http', 'https') or parts.hostname in PAGE_HOSTS:
+        return None
+    try:
+        output = _ffprobe([
+            '-rw_timeout', str(URL_PROBE_TIMEOUT * 1_000_000),
+            '-show_entries', 'format=duration',
+            '-of', 'csv=p=0',
+            source
+        ])
+        return float(output.strip()) or None
+    except (ProbeError, ValueError):
+        return None
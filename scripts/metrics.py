@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Pipeline metrics for Ruby
+Counters and latency histograms per stage, exported in Prometheus text format
+"""
+
+import atexit
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Exposure is configured from .env and applied on the first recorded metric:
+#   RUBY_METRICS_FILE=outputs/metrics.prom   written at exit (textfile collector)
+#   RUBY_METRICS_PORT=9464                   served at http://127.0.0.1:<port>/metrics
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+RATE_BUCKETS = tuple(mb * 1024 * 1024 for mb in (0.5, 1, 2, 5, 10, 25, 50, 100, 250))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, one series per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        _ensure_exposed()
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        _ensure_exposed()
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts, sum, count]
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> '_Timer':
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+_registry: List = []
+
+
+def counter(name: str, help: str) -> Counter:
+    metric = Counter(name, help)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    metric = Histogram(name, help, buckets)
+    _registry.append(metric)
+    return metric
+
+
+# Pipeline metrics
+API_REQUESTS = counter('ruby_api_requests_total', 'HTTP requests to Klap/Blotato by endpoint and status code')
+API_LATENCY = histogram('ruby_api_request_seconds', 'HTTP request latency by endpoint')
+POLLS = counter('ruby_klap_polls_total', 'Klap status polls by kind (task/export) and reported status')
+STAGE_SECONDS = histogram('ruby_klap_stage_seconds', 'Time from submit/export request until ready, by kind')
+EXPORTS = counter('ruby_klap_exports_total', 'Klap exports by result (ready/error/timeout/cached)')
+DOWNLOAD_BYTES = counter('ruby_download_bytes_total', 'Bytes downloaded')
+DOWNLOAD_SECONDS = histogram('ruby_download_seconds', 'Download duration by result')
+DOWNLOAD_RATE = histogram('ruby_download_bytes_per_second', 'Per-file download throughput', RATE_BUCKETS)
+FFMPEG_CUT_SECONDS = histogram('ruby_ffmpeg_cut_seconds', 'ffmpeg clip cut duration by mode and result')
+POSTS = counter('ruby_posts_total', 'Blotato post submissions by platform and result')
+
+# Path segments of the Klap and Blotato routes; anything else in a path
+# is an ID and must not become its own label value
+ROUTE_WORDS = {'tasks', 'video-to-shorts', 'projects', 'exports', 'folders', 'files', 'media', 'posts'}
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+
+def endpoint(path: str) -> str:
+    """URL path with every non-route segment replaced by {id}"""
+    return '/'.join(
+        part if not part or part in ROUTE_WORDS or _VERSION_SEGMENT.match(part) else '{id}'
+        for part in path.split('/')
+    )
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def dump(path: str):
+    """Write render() to path atomically (node_exporter textfile format)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_exposed = False
+_exposed_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def _ensure_exposed():
+    """Set up file/HTTP export from the environment on first use"""
+    global _exposed, _server
+    if _exposed:
+        return
+    with _exposed_lock:
+        if _exposed:
+            return
+        _exposed = True
+
+        path = os.getenv('RUBY_METRICS_FILE')
+        if path:
+            atexit.register(dump, path)
+
+        port = os.getenv('RUBY_METRICS_PORT')
+        if port:
+            try:
+                _server = serve(int(port))
+                print(f"Metrics at http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                print(f"Warning: metrics endpoint not started on port {port}: {e}")
@@ -0,0 +1,14 @@
+"""
+Local stand-in servers for the Klap and Blotato APIs
+Used to exercise and load-test the pipeline without live credentials
+
+Usage:
+    server = start_server(KlapMockHandler, MockConfig(task_seconds=1))
+    os.environ['KLAP_BASE_URL'] = server.base_url + '/v2'
+"""
+
+from .common import MockConfig, MockServer, start_server
+from .klap import KlapMockHandler
+from .blotato import BlotatoMockHandler
+
+__all__ = ['MockConfig', 'MockServer', 'start_server', 'KlapMockHandler', 'BlotatoMockHandler']
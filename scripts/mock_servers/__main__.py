@@ -0,0 +1,88 @@
+"""
+Run the mock Klap and Blotato servers until interrupted
+
+Usage (from scripts/):
+    python -m mock_servers --task-seconds 30 --error-rate 0.02 --max-rps 5
+
+Then point the clients at them:
+    KLAP_BASE_URL=http://127.0.0.1:8801/v2
+    base_url "http://127.0.0.1:8802" in .claude/skills/blotato-posting/config.json
+
+Port 0 picks a free port (the URLs are printed on startup). SIGTERM stops
+the servers like Ctrl+C; --stats-file then receives the per-route call
+counts as JSON.
+"""
+
+import argparse
+import json
+import signal
+import time
+
+from .common import MockConfig, start_server
+from .klap import KlapMockHandler
+from .blotato import BlotatoMockHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m mock_servers', description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--klap-port', type=int, default=8801)
+    parser.add_argument('--blotato-port', type=int, default=8802)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every request')
+    parser.add_argument('--latency-jitter', type=float, default=0.05)
+    parser.add_argument('--task-seconds', type=float, default=5.0, help='time until a task is ready')
+    parser.add_argument('--export-seconds', type=float, default=2.0, help='time until an export is ready')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of HTTP 500 responses')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of HTTP 429 responses')
+    parser.add_argument('--max-rps', type=float, default=None, help='requests/second before 429s')
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--file-mb', type=float, default=20.0, help='size of each fake MP4')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--stats-file', default=None, help='write call counts here on exit')
+    args = parser.parse_args()
+
+    def config() -> MockConfig:
+        return MockConfig(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            task_seconds=args.task_seconds,
+            export_seconds=args.export_seconds,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            max_rps=args.max_rps,
+            retry_after=args.retry_after,
+            file_size=int(args.file_mb * 1024 * 1024),
+            seed=args.seed
+        )
+
+    klap = start_server(KlapMockHandler, config(), args.host, args.klap_port)
+    blotato = start_server(BlotatoMockHandler, config(), args.host, args.blotato_port)
+    print(f"Mock Klap API:    {klap.base_url}/v2")
+    print(f"Mock Blotato API: {blotato.base_url}")
+    print("Press Ctrl+C to stop", flush=True)
+
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        klap.shutdown()
+        blotato.shutdown()
+
+    if args.stats_file:
+        with open(args.stats_file, 'w') as f:
+            json.dump({"klap": klap.calls, "blotato": blotato.calls}, f, indent=2)
+
+    for name, server in (('Klap', klap), ('Blotato', blotato)):
+        print(f"\n{name} calls:")
+        for route, count in sorted(server.calls.items()):
+            print(f"  {count:6d}  {route}")
+
+
+if __name__ == '__main__':
+    main()
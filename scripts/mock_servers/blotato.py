@@ -0,0 +1,53 @@
+"""
+Mock Blotato API (v2)
+Media uploads and post scheduling
+"""
+
+import uuid
+
+from .common import MockHandler
+
+
+class BlotatoMockHandler(MockHandler):
+    """
+    Emulates Blotato's /v2/media and /v2/posts
+
+    Uploaded media is re-hosted under /media/<id>.mp4 on this server;
+    every accepted post is kept in server.state['posts'].
+    """
+
+    ROUTES = (
+        ('POST', r'/v2/media', 'upload_media'),
+        ('POST', r'/v2/posts', 'create_post'),
+        ('GET', r'/media/([^/]+)\.mp4', 'download'),
+    )
+
+    def upload_media(self):
+        url = self.read_json().get('url')
+        if not url:
+            self.send_json(400, {"error": "url is required"})
+            return
+
+        media_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.state.setdefault('media', {})[media_id] = url
+        self.send_json(201, {"url": f"{self.server.base_url}/media/{media_id}.mp4"})
+
+    def create_post(self):
+        body = self.read_json()
+        post = body.get('post') or {}
+        content = post.get('content') or {}
+        if not post.get('accountId') or not content.get('platform'):
+            self.send_json(400, {"error": "post.accountId and post.content.platform are required"})
+            return
+
+        submission_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.state.setdefault('posts', {})[submission_id] = body
+        self.send_json(201, {"postSubmissionId": submission_id, "id": submission_id})
+
+    def download(self, media_id: str):
+        if media_id not in self.server.state.get('media', {}):
+            self.send_json(404, {"error": "Media not found"})
+            return
+        self.send_fake_mp4(self.server.config.file_size)
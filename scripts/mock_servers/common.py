@@ -0,0 +1,231 @@
+"""
+Shared plumbing for the mock API servers
+Latency, failure injection, 429 throttling and fake MP4 payloads
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Smallest box sequence players recognise as MP4; the rest is padding
+MP4_HEADER = (
+    b'\x00\x00\x00\x20ftypisom\x00\x00\x02\x00isomiso2avc1mp41'
+    b'\x00\x00\x00\x08free'
+)
+CHUNK_SIZE = 256 * 1024
+
+
+class MockConfig:
+    """
+    Behaviour knobs for a mock server
+
+    latency: seconds added to every request (plus up to latency_jitter)
+    task_seconds / export_seconds: simulated processing time until a
+        task or export reports ready
+    error_rate: fraction of requests answered with HTTP 500
+    throttle_rate: fraction of requests answered with HTTP 429
+    max_rps: server-side request budget; requests beyond it get a 429
+    retry_after: Retry-After header sent with every 429
+    file_size: bytes served for each fake exported MP4
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        task_seconds: float = 5.0,
+        export_seconds: float = 2.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_rps: Optional[float] = None,
+        retry_after: float = 1.0,
+        file_size: int = 20 * 1024 * 1024,
+        shorts_per_task: int = 5,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.task_seconds = task_seconds
+        self.export_seconds = export_seconds
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.file_size = file_size
+        self.shorts_per_task = shorts_per_task
+        self.random = random.Random(seed)
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding a config, shared state and call counters"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], handler, config: MockConfig):
+        super().__init__(address, handler)
+        self.config = config
+        self.state: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self._tokens = config.max_rps or 0.0
+        self._tokens_at = time.time()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route: str):
+        with self.lock:
+            self.calls[route] = self.calls.get(route, 0) + 1
+
+    def take_token(self) -> bool:
+        """Spend one request from the max_rps budget (True if allowed)"""
+        rate = self.config.max_rps
+        if not rate:
+            return True
+        with self.lock:
+            now = time.time()
+            self._tokens = min(rate, self._tokens + (now - self._tokens_at) * rate)
+            self._tokens_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Base request handler: subclasses list ROUTES as
+    (method, regex, handler method name) and implement those methods
+    taking the regex groups. Every matched request first passes
+    latency, 429 and 500 injection.
+    """
+
+    ROUTES = ()
+    _body: Optional[Dict] = None
+    protocol_version = 'HTTP/1.1'
+    server: MockServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method: str):
+        self._body = None
+        path = self.path.split('?', 1)[0]
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                self.server.count(f"{method} {pattern}")
+                if self._inject(name):
+                    return
+                getattr(self, name)(*match.groups())
+                return
+        self.read_json()
+        self.send_json(404, {"error": f"No route for {method} {path}"})
+
+    def _inject(self, name: str) -> bool:
+        """Apply configured latency and failures; True if already answered"""
+        config = self.server.config
+        self.read_json()  # drain the body so keep-alive connections stay usable
+
+        delay = config.latency + config.random.uniform(0, config.latency_jitter)
+        if delay:
+            time.sleep(delay)
+
+        if name == 'download':
+            return False
+        if not self.server.take_token() or config.random.random() < config.throttle_rate:
+            self.send_json(429, {"error": "Too many requests"},
+                           headers={'Retry-After': str(config.retry_after)})
+            return True
+        if config.random.random() < config.error_rate:
+            self.send_json(500, {"error": "Injected server error"})
+            return True
+        return False
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def read_json(self) -> Dict:
+        if self._body is None:
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                self._body = json.loads(raw) if raw else {}
+            except ValueError:
+                self._body = {}
+        return self._body
+
+    def send_json(self, code: int, body, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_fake_mp4(self, size: int):
+        """Stream `size` bytes of fake MP4, honouring a single Range header"""
+        start, end = 0, size - 1
+        status = 200
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range') or '')
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), size - 1)
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        padding = bytes(CHUNK_SIZE)
+        position = start
+        while position <= end:
+            if position < len(MP4_HEADER):
+                chunk = MP4_HEADER[position:end + 1]
+            else:
+                chunk = padding[:end + 1 - position]
+            self.wfile.write(chunk)
+            position += len(chunk)
+
+
+def start_server(
+    handler,
+    config: Optional[MockConfig] = None,
+    host: str = '127.0.0.1',
+    port: int = 0
+) -> MockServer:
+    """
+    Serve `handler` in a background thread
+
+    port=0 picks a free port; read it back from server.base_url.
+    Call server.shutdown() to stop.
+    """
+    server = MockServer((host, port), handler, config or MockConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
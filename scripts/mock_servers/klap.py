@@ -0,0 +1,123 @@
+"""
+Mock Klap API (v2)
+Tasks, generated projects, exports and fake MP4 downloads
+"""
+
+import time
+import uuid
+from typing import Dict
+
+from .common import MockHandler
+
+PREFIX = r'/v2'
+
+
+class KlapMockHandler(MockHandler):
+    """
+    Emulates the Klap endpoints KlapAPI uses
+
+    Tasks report "processing" until config.task_seconds have passed,
+    exports until config.export_seconds; ready exports point at
+    /files/<export_id>.mp4 on this server.
+    """
+
+    ROUTES = (
+        ('POST', PREFIX + r'/tasks/video-to-shorts', 'create_task'),
+        ('GET', PREFIX + r'/tasks/([^/]+)', 'get_task'),
+        ('GET', PREFIX + r'/projects/([^/]+)', 'get_projects'),
+        ('POST', PREFIX + r'/projects/([^/]+)/([^/]+)/exports', 'create_export'),
+        ('GET', PREFIX + r'/projects/([^/]+)/([^/]+)/exports', 'list_exports'),
+        ('GET', PREFIX + r'/projects/([^/]+)/([^/]+)/exports/([^/]+)', 'get_export'),
+        ('GET', r'/files/([^/]+)\.mp4', 'download'),
+    )
+
+    def _status(self, record, seconds: float) -> str:
+        return 'ready' if time.time() - record['created_at'] >= seconds else 'processing'
+
+    def create_task(self):
+        body = self.read_json()
+        if not body.get('source_video_url'):
+            self.send_json(400, {"error": "source_video_url is required"})
+            return
+
+        config = self.server.config
+        task_id = uuid.uuid4().hex
+        folder_id = uuid.uuid4().hex
+        count = min(body.get('target_clip_count') or config.shorts_per_task, config.shorts_per_task)
+        max_duration = body.get('max_duration') or 60
+        shorts = [
+            {
+                "id": uuid.uuid4().hex,
+                "name": f"Short {i + 1}",
+                "virality_score": config.random.randint(40, 99),
+                "duration": config.random.randint(15, max_duration),
+                "caption": f"Mock short {i + 1} from {body['source_video_url']}"
+            }
+            for i in range(count)
+        ]
+
+        with self.server.lock:
+            self.server.state[task_id] = {"created_at": time.time(), "output_id": folder_id}
+            self.server.state[folder_id] = {"shorts": shorts}
+        self.send_json(200, {"id": task_id, "output_id": folder_id, "status": "processing"})
+
+    def get_task(self, task_id: str):
+        task = self.server.state.get(task_id)
+        if not task or 'output_id' not in task:
+            self.send_json(404, {"error": "Task not found"})
+            return
+        self.send_json(200, {
+            "id": task_id,
+            "output_id": task['output_id'],
+            "status": self._status(task, self.server.config.task_seconds)
+        })
+
+    def get_projects(self, folder_id: str):
+        folder = self.server.state.get(folder_id)
+        if not folder or 'shorts' not in folder:
+            self.send_json(404, {"error": "Folder not found"})
+            return
+        self.send_json(200, folder['shorts'])
+
+    def create_export(self, folder_id: str, project_id: str):
+        folder = self.server.state.get(folder_id)
+        if not folder or not any(s['id'] == project_id for s in folder.get('shorts', [])):
+            self.send_json(404, {"error": "Project not found"})
+            return
+
+        export_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.state[export_id] = {
+                "created_at": time.time(),
+                "project_id": project_id,
+                "watermark": self.read_json().get('watermark')
+            }
+        self.send_json(200, {"id": export_id, "status": "processing"})
+
+    def _export_body(self, export_id: str, export: Dict) -> Dict:
+        status = self._status(export, self.server.config.export_seconds)
+        body = {"id": export_id, "status": status, "watermark": export['watermark']}
+        if status == 'ready':
+            body['src_url'] = f"{self.server.base_url}/files/{export_id}.mp4"
+        return body
+
+    def list_exports(self, folder_id: str, project_id: str):
+        self.send_json(200, [
+            self._export_body(export_id, export)
+            for export_id, export in list(self.server.state.items())
+            if export.get('project_id') == project_id
+        ])
+
+    def get_export(self, folder_id: str, project_id: str, export_id: str):
+        export = self.server.state.get(export_id)
+        if not export or export.get('project_id') != project_id:
+            self.send_json(404, {"error": "Export not found"})
+            return
+
+        self.send_json(200, self._export_body(export_id, export))
+
+    def download(self, export_id: str):
+        if export_id not in self.server.state:
+            self.send_json(404, {"error": "File not found"})
+            return
+        self.send_fake_mp4(self.server.config.file_size)
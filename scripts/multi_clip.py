@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Single-decode multi-clip extraction
+Cuts several clips from one ffmpeg pass using split/trim filter graphs or shared span encodes
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import metrics
+from clip_plan import Span
+from media_probe import ProbeError, get_media_info, keyframe_times
+from render_pool import ProgressCallback, run_ffmpeg
+
+# Same quality settings as cut_clip_with_ffmpeg
+VIDEO_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '18']
+AUDIO_ARGS = ['-c:a', 'aac']
+# Clips closer than this share a decode pass; farther apart, decoding the
+# gap costs more than seeking again
+MAX_GAP = 30.0
+
+# (start seconds, end seconds, output path)
+ClipSpec = Tuple[float, float, str]
+
+
+def group_clips(clips: List[ClipSpec], max_gap: float = MAX_GAP) -> List[List[ClipSpec]]:
+    """
+    Group clips whose ranges overlap or lie within max_gap of each other
+
+    Each group is decoded once, from its first start to its last end.
+    """
+    groups: List[List[ClipSpec]] = []
+    group_end = None
+    for clip in sorted(clips, key=lambda c: c[0]):
+        if groups and clip[0] - group_end <= max_gap:
+            groups[-1].append(clip)
+            group_end = max(group_end, clip[1])
+        else:
+            groups.append([clip])
+            group_end = clip[1]
+    return groups
+
+
+def build_command(video_path: str, group: List[ClipSpec], audio: bool = True) -> List[str]:
+    """
+    ffmpeg command producing every clip of a group from one decode
+
+    The input is seeked to the group's start and read only until its
+    end; split/asplit fan the decoded frames out to one trim/atrim
+    chain (and encoder) per clip.
+    """
+    base = min(start for start, _, _ in group)
+    length = max(end for _, end, _ in group) - base
+    count = len(group)
+
+    filters = [f"[0:v]split={count}" + ''.join(f"[v{i}]" for i in range(count))]
+    if audio:
+        filters.append(f"[0:a]asplit={count}" + ''.join(f"[a{i}]" for i in range(count)))
+    for i, (start, end, _) in enumerate(group):
+        s, e = start - base, end - base
+        filters.append(f"[v{i}]trim=start={s:.6f}:end={e:.6f},setpts=PTS-STARTPTS[vo{i}]")
+        if audio:
+            filters.append(f"[a{i}]atrim=start={s:.6f}:end={e:.6f},asetpts=PTS-STARTPTS[ao{i}]")
+
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-ss', f"{base:.6f}", '-t', f"{length:.6f}",
+        '-i', video_path,
+        '-filter_complex', ';'.join(filters)
+    ]
+    for i, (_, _, output_path) in enumerate(group):
+        cmd += ['-map', f"[vo{i}]"] + VIDEO_ARGS
+        if audio:
+            cmd += ['-map', f"[ao{i}]"] + AUDIO_ARGS
+        cmd += ['-movflags', '+faststart', '-y', output_path]
+    return cmd
+
+
+def extract_clips(video_path: str, clips: List[ClipSpec], max_gap: float = MAX_GAP) -> List[bool]:
+    """
+    Cut every clip, decoding each group of nearby clips only once
+
+    Returns:
+        Success per clip, in input order
+    """
+    audio = get_media_info(video_path).has_audio
+    succeeded = set()
+
+    for group in group_clips(clips, max_gap):
+        print(f"Cutting {len(group)} clip(s) in one pass: "
+              f"{min(c[0] for c in group):.2f}s to {max(c[1] for c in group):.2f}s")
+        started = time.perf_counter()
+        result = subprocess.run(build_command(video_path, group, audio), capture_output=True, text=True)
+        metrics.FFMPEG_CUT_SECONDS.observe(
+            time.perf_counter() - started,
+            result='ok' if result.returncode == 0 else 'error',
+            mode='single-pass'
+        )
+        if result.returncode != 0:
+            print(f"Error cutting clips: {result.stderr}")
+            continue
+        succeeded.update(output_path for _, _, output_path in group)
+
+    return [output_path in succeeded for _, _, output_path in clips]
+
+
+def extract_span(
+    video_path: str,
+    span: Span,
+    audio: bool = True,
+    threads: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None
+) -> List[bool]:
+    """
+    Encode a merged span once and slice its segments out of it
+
+    Keyframes are forced at every segment boundary, so each segment is
+    then cut from the span by stream copy, frame-accurately, and the
+    ranges segments share are encoded only once.
+
+    Returns:
+        Success per segment, in span order
+    """
+    boundaries = sorted({
+        t - span.start for segment in span.segments for t in (segment.start, segment.end)
+    } - {0.0})
+    work_dir = tempfile.mkdtemp(
+        prefix='.span_', dir=os.path.dirname(os.path.abspath(span.segments[0].output_path))
+    )
+    span_path = os.path.join(work_dir, 'span.mp4')
+    try:
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f"{span.start:.6f}", '-i', video_path,
+            '-t', f"{span.duration:.6f}",
+            '-map', '0:v:0'
+        ]
+        if audio:
+            cmd += ['-map', '0:a:0']
+        cmd += ['-force_key_frames', ','.join(f"{t:.6f}" for t in boundaries)] + VIDEO_ARGS
+        if audio:
+            cmd += AUDIO_ARGS
+        if threads:
+            cmd += ['-threads', str(threads)]
+        cmd += ['-y', span_path]
+
+        print(f"Encoding {len(span.segments)} overlapping clip(s) once: {span.start:.2f}s to {span.end:.2f}s")
+        started = time.perf_counter()
+        result = run_ffmpeg(cmd, on_progress)
+        metrics.FFMPEG_CUT_SECONDS.observe(
+            time.perf_counter() - started,
+            result='ok' if result.returncode == 0 else 'error',
+            mode='span'
+        )
+        if result.returncode != 0:
+            print(f"Error encoding span: {result.stderr}")
+            return [False] * len(span.segments)
+
+        # Forced keyframes land on the first frame at or after each
+        # boundary; seek to that frame so the copy starts on it
+        try:
+            keyframes = keyframe_times(span_path)
+        except ProbeError:
+            keyframes = []
+
+        outcomes = []
+        for segment in span.segments:
+            offset = segment.start - span.start
+            offset = next((k for k in keyframes if k >= offset - 0.001), offset)
+            result = subprocess.run([
+                'ffmpeg', '-v', 'error',
+                '-ss', f"{offset:.6f}", '-i', span_path,
+                '-t', f"{segment.end - span.start - offset:.6f}",
+                '-c', 'copy', '-avoid_negative_ts', 'make_zero',
+                '-movflags', '+faststart',
+                '-y', segment.output_path
+            ], capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Error slicing {segment.output_path}: {result.stderr}")
+            outcomes.append(result.returncode == 0)
+        return outcomes
+    finally:
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Cross-process token-bucket rate limiting for Klap and Blotato
+Bucket state lives in lock-protected files so concurrent scripts share one budget
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared within one process
+    fcntl = None
+
+RATE_LIMIT_DIR = Path(os.getenv('RATE_LIMIT_DIR', Path(tempfile.gettempdir()) / 'ruby_rate_limits'))
+
+# Bucket name: (requests per second, burst). Override with e.g.
+# RATE_LIMIT_BLOTATO_V2_POSTS="2,5" in .env
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'klap': (5, 10),
+    'blotato': (5, 5),
+    'blotato /v2/posts': (1, 3),
+    'blotato /v2/media': (0.5, 2),
+}
+
+# API host → bucket name (download/CDN hosts are not limited)
+HOST_APIS = {
+    'api.klap.app': 'klap',
+    'backend.blotato.com': 'blotato',
+}
+# Base URL overrides (e.g. local mock servers) share the same buckets
+BASE_URL_ENV = {
+    'KLAP_BASE_URL': 'klap',
+    'BLOTATO_BASE_URL': 'blotato',
+}
+
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class TokenBucket:
+    """
+    Token bucket whose state is a small JSON file guarded by flock
+
+    Every process using the same bucket name draws from the same
+    tokens. A 429 sets blocked_until, pausing all users of the bucket.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        safe_name = name.replace(' ', '_').replace('/', '_')
+        self.path = RATE_LIMIT_DIR / f"{safe_name}.json"
+        self._lock = threading.Lock()
+
+    def _update(self, fn) -> float:
+        """Apply fn(state, now) under the file lock, return its result"""
+        RATE_LIMIT_DIR.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+
+                now = time.time()
+                tokens = state.get('tokens', self.burst)
+                updated = state.get('updated', now)
+                state['tokens'] = min(self.burst, tokens + (now - updated) * self.rate)
+                state['updated'] = now
+
+                result = fn(state, now)
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self):
+        """Block until one request is allowed"""
+        def take(state, now):
+            blocked_until = state.get('blocked_until', 0)
+            if blocked_until > now:
+                return blocked_until - now
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                return 0
+            return (1 - state['tokens']) / self.rate
+
+        while True:
+            wait = self._update(take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def block(self, seconds: float):
+        """Pause the bucket for every process (after a 429)"""
+        def set_block(state, now):
+            state['blocked_until'] = max(state.get('blocked_until', 0), now + seconds)
+            state['tokens'] = 0
+            return 0
+
+        self._update(set_block)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _limit(name: str) -> Optional[Tuple[float, float]]:
+    env_name = 'RATE_LIMIT_' + '_'.join(re.findall(r'[A-Za-z0-9]+', name)).upper()
+    value = os.getenv(env_name)
+    if value:
+        rate, _, burst = value.partition(',')
+        return float(rate), float(burst or rate)
+    return DEFAULT_LIMITS.get(name)
+
+
+def _bucket(name: str) -> Optional[TokenBucket]:
+    with _buckets_lock:
+        if name not in _buckets:
+            limit = _limit(name)
+            _buckets[name] = TokenBucket(name, *limit) if limit else None
+        return _buckets[name]
+
+
+def api_name(url: str) -> Optional[str]:
+    """Rate-limited API ("klap", "blotato") that url belongs to, if any"""
+    parts = urlsplit(url)
+    api = HOST_APIS.get(parts.hostname)
+    if api:
+        return api
+    for env_name, name in BASE_URL_ENV.items():
+        override = urlsplit(os.getenv(env_name, ''))
+        if (override.netloc and override.netloc == parts.netloc
+                and parts.path.startswith(override.path.rstrip('/'))):
+            return name
+    return None
+
+
+def buckets_for(url: str) -> List[TokenBucket]:
+    """API-wide and endpoint buckets that apply to url (empty if unlimited)"""
+    api = api_name(url)
+    if not api:
+        return []
+
+    path = urlsplit(url).path
+    buckets = [_bucket(api)]
+    for name in DEFAULT_LIMITS:
+        prefix = name.partition(' ')[2]
+        if name.startswith(api + ' ') and path.startswith(prefix):
+            buckets.append(_bucket(name))
+    return [b for b in buckets if b]
+
+
+def acquire(url: str):
+    """Wait until a request to url fits every applicable bucket"""
+    for bucket in buckets_for(url):
+        bucket.acquire()
+
+
+def retry_after(headers, attempt: int = 0) -> float:
+    """Seconds to back off after a 429 (Retry-After header or exponential)"""
+    value = headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return DEFAULT_RETRY_AFTER * (2 ** attempt)
+
+
+def throttled(url: str, seconds: float):
+    """Record a 429 for url so every process backs off"""
+    for bucket in buckets_for(url):
+        bucket.block(seconds)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Parallel clip rendering
+Runs several ffmpeg jobs at once, sized from available cores and memory, with live progress
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+# Rough resident size of one 1080p libx264 encode; override with
+# RENDER_MEMORY_PER_JOB_MB for 4K sources or tighter boxes
+MEMORY_PER_JOB_MB = 600
+PROGRESS_STEP = 10  # percent between progress lines
+
+# on_progress(seconds_done, speed) as reported by ffmpeg -progress
+ProgressCallback = Callable[[float, str], None]
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory available for new processes (None if unknown)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def available_cores() -> int:
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_workers(
+    job_count: int,
+    cores: Optional[int] = None,
+    memory_mb: Optional[float] = None
+) -> Tuple[int, int]:
+    """
+    Concurrent ffmpeg jobs and -threads per job
+
+    One job per core (capped by job count and by how many encodes fit
+    in available memory); the cores are then shared out as encoder
+    threads so the box is saturated either way.
+
+    Returns:
+        (workers, threads per job)
+    """
+    cores = cores or available_cores()
+    memory_mb = memory_mb if memory_mb is not None else available_memory_mb()
+    per_job = float(os.getenv('RENDER_MEMORY_PER_JOB_MB', MEMORY_PER_JOB_MB))
+
+    workers = min(max(1, job_count), cores)
+    if memory_mb:
+        workers = min(workers, max(1, int(memory_mb // per_job)))
+    return workers, max(1, cores // workers)
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    on_progress: Optional[ProgressCallback] = None
+) -> subprocess.CompletedProcess:
+    """
+    Run an ffmpeg command, feeding `-progress` updates to on_progress
+
+    stderr goes to a temp file so a chatty ffmpeg can never block on a
+    full pipe while progress is being read.
+    """
+    if on_progress is None:
+        return subprocess.run(cmd, capture_output=True, text=True)
+
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        done, speed = 0.0, ''
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key in ('out_time_us', 'out_time_ms') and value.lstrip('-').isdigit():
+                # out_time_ms is also in microseconds (long-standing ffmpeg quirk)
+                done = max(0.0, int(value) / 1_000_000)
+            elif key == 'speed':
+                speed = value
+            elif key == 'progress':
+                on_progress(done, speed)
+        process.wait()
+        stderr.seek(0)
+        return subprocess.CompletedProcess(cmd, process.returncode, '', stderr.read())
+
+
+def progress_printer(name: str, duration: float) -> ProgressCallback:
+    """Callback printing "<name> NN%" every PROGRESS_STEP percent"""
+    state = {'shown': -PROGRESS_STEP}
+    lock = threading.Lock()
+
+    def report(done: float, speed: str):
+        percent = min(100, int(100 * done / duration)) if duration > 0 else 0
+        with lock:
+            if percent <= state['shown'] or (percent < 100 and percent - state['shown'] < PROGRESS_STEP):
+                return
+            state['shown'] = percent
+        print(f"  [{name}] {percent:3d}% ({done:.1f}/{duration:.1f}s, {speed or '?'})")
+
+    return report
+
+
+def render_parallel(
+    jobs: List[Tuple[str, float]],
+    render: Callable[[int, int, ProgressCallback], bool],
+    workers: Optional[int] = None
+) -> List[bool]:
+    """
+    Render jobs concurrently
+
+    Args:
+        jobs: (name, duration seconds) per job, used for progress lines
+        render: render(index, threads, on_progress) -> success
+        workers: Concurrent jobs (default: plan_workers)
+
+    Returns:
+        Success per job, in input order
+    """
+    planned_workers, threads = plan_workers(len(jobs))
+    if workers:
+        threads = max(1, available_cores() // workers)
+    workers = workers or planned_workers
+    print(f"Rendering {len(jobs)} job(s): {workers} at once, {threads} ffmpeg thread(s) each")
+
+    def run(index: int) -> bool:
+        name, duration = jobs[index]
+        try:
+            return render(index, threads, progress_printer(name, duration))
+        except Exception as e:
+            print(f"  [{name}] failed: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, range(len(jobs))))
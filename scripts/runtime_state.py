@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Runtime state location
+Job records, caches and other machine-local state live under memory/runtime/, which is not versioned
+"""
+
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: state files are only guarded within one process
+    fcntl = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+STATE_DIR = Path(os.getenv('RUBY_STATE_DIR', PROJECT_ROOT / 'memory' / 'runtime'))
+# Where earlier versions kept this state (the versioned outputs directory)
+LEGACY_DIR = PROJECT_ROOT / 'outputs'
+
+
+def state_path(name: str) -> Path:
+    """
+    Path of a runtime state file or directory under STATE_DIR
+
+    State an earlier version left in outputs/ under the same name (with
+    companions such as SQLite -wal/-shm files) is moved over the first
+    time, so job records and caches survive the relocation.
+    """
+    path = STATE_DIR / name
+    if path.exists() or not (LEGACY_DIR / name).exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for legacy in LEGACY_DIR.glob(f"{name}*"):
+        try:
+            shutil.move(str(legacy), str(STATE_DIR / legacy.name))
+        except OSError as e:
+            print(f"Warning: could not move {legacy} to {STATE_DIR}: {e}")
+    return path
+
+
+@contextmanager
+def locked_json(path: Path, default):
+    """
+    Read-merge-write of a JSON state file shared by concurrent runs
+
+    Holds an exclusive lock on <path>.lock for the whole block, yields
+    the file's current contents (`default` when missing or unreadable)
+    and writes the yielded object back through a per-process temp file,
+    so one run never drops what another wrote meanwhile.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = default
+            yield data
+
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
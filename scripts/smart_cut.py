@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Keyframe-aware smart cutting
+Stream-copies the GOPs inside a clip and re-encodes only the partial GOPs at its edges
+"""
+
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from media_probe import ProbeError, get_media_info
+
+# Source codec → (encoder for the edge segments, Annex B bitstream filter)
+CODECS = {
+    'h264': ('libx264', 'h264_mp4toannexb'),
+    'hevc': ('libx265', 'hevc_mp4toannexb'),
+}
+# Same quality settings as the full re-encode in clip_video_semantic.py
+ENCODE_ARGS = ['-preset', 'fast', '-crf', '18']
+# Edges shorter than this are treated as already on a keyframe
+EPSILON = 0.001
+
+Segment = Tuple[str, float, float]
+
+# ffprobe profile names → encoder -profile:v values
+PROFILES = {
+    'h264': {
+        'constrained baseline': 'baseline', 'baseline': 'baseline', 'main': 'main',
+        'high': 'high', 'high 10': 'high10', 'high 4:2:2': 'high422', 'high 4:4:4 predictive': 'high444'
+    },
+    'hevc': {'main': 'main', 'main 10': 'main10', 'main still picture': 'mainstillpicture'},
+}
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True)
+
+
+def edge_encode_args(stream: Dict) -> List[str]:
+    """
+    Encoder arguments that make the re-encoded edges match the source stream
+
+    Pixel format, profile, level and time base all have to agree with
+    the copied GOPs, or players reset (or refuse) at the copy boundary.
+    """
+    codec = stream.get('codec_name')
+    args = []
+    if stream.get('pix_fmt'):
+        args += ['-pix_fmt', stream['pix_fmt']]
+
+    profile = PROFILES.get(codec, {}).get(str(stream.get('profile', '')).lower())
+    if profile:
+        args += ['-profile:v', profile]
+
+    level = stream.get('level')
+    if isinstance(level, int) and level > 0:
+        if codec == 'h264':
+            # ffprobe reports level_idc, e.g. 40 for 4.0
+            args += ['-level:v', f"{level / 10:.1f}"]
+        elif codec == 'hevc':
+            # general_level_idc is 30 × the level, e.g. 120 for 4.0
+            args += ['-x265-params', f"level-idc={level / 30:.1f}"]
+
+    if stream.get('time_base') and stream['time_base'] != '0/0':
+        args += ['-enc_time_base:v', stream['time_base']]
+    return args
+
+
+def track_timescale(stream: Dict) -> Optional[str]:
+    """MP4 video timescale of the source (denominator of its time base)"""
+    _, _, den = str(stream.get('time_base', '')).partition('/')
+    return den if den.isdigit() and int(den) > 0 else None
+
+
+def plan_segments(start: float, end: float, keyframes: List[float]) -> List[Segment]:
+    """
+    Split [start, end) into ("encode" | "copy", from, to) segments
+
+    Whole GOPs between the first and last keyframe inside the range are
+    copied; the partial GOPs before/after them are re-encoded. A range
+    without two keyframes inside is a single "encode" segment.
+    """
+    inside = [k for k in keyframes if start - EPSILON <= k <= end]
+    if len(inside) < 2:
+        return [('encode', start, end)]
+
+    first, last = inside[0], inside[-1]
+    segments = []
+    if first - start > EPSILON:
+        segments.append(('encode', start, first))
+    segments.append(('copy', first, last))
+    if end - last > EPSILON:
+        segments.append(('encode', last, end))
+    return segments
+
+
+def smart_cut(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    keyframes: Optional[List[float]] = None,
+    stream: Optional[Dict] = None,
+    threads: Optional[int] = None,
+    open_gop: Optional[bool] = None
+) -> bool:
+    """
+    Cut [start, end) from video_path with minimal re-encoding
+
+    Video segments are written as MPEG-TS (in-band parameter sets, so
+    copied and re-encoded parts concatenate cleanly), joined with the
+    concat demuxer and muxed with the clip's audio (AAC). Boundaries are
+    frame-accurate, same as a full re-encode. Edge encodes match the
+    source's pixel format, profile, level and time base (see
+    edge_encode_args).
+
+    Args:
+        keyframes / stream / open_gop: Probe results, if the caller
+            already has them (default: the media probe index, see
+            media_probe.py)
+        threads: ffmpeg -threads for the edge encodes (default: ffmpeg's choice)
+
+    Returns:
+        False when smart cutting does not apply (unsupported codec,
+        open GOPs, no whole GOP inside the range) or ffmpeg failed; the
+        caller should then fall back to a full re-encode.
+    """
+    if stream is None or keyframes is None or open_gop is None:
+        try:
+            info = get_media_info(video_path)
+        except ProbeError:
+            return False
+        stream = stream or info.video
+        keyframes = keyframes if keyframes is not None else info.keyframes
+        open_gop = open_gop if open_gop is not None else info.open_gop
+    if not stream or stream.get('codec_name') not in CODECS:
+        return False
+    if open_gop:
+        # Leading frames of a copied GOP would reference a frame the
+        # cut dropped and glitch at the copy boundary
+        return False
+    encoder, annexb = CODECS[stream['codec_name']]
+
+    segments = plan_segments(start, end, keyframes)
+    if not any(kind == 'copy' for kind, _, _ in segments):
+        return False
+
+    work_dir = tempfile.mkdtemp(prefix='.smartcut_', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        parts = []
+        for i, (kind, seg_start, seg_end) in enumerate(segments):
+            part = os.path.join(work_dir, f"part_{i}.ts")
+            cmd = [
+                'ffmpeg', '-v', 'error',
+                '-ss', f"{seg_start:.6f}",
+                '-i', video_path,
+                '-t', f"{seg_end - seg_start:.6f}",
+                '-map', '0:v:0', '-an', '-sn', '-dn'
+            ]
+            if kind == 'copy':
+                cmd += ['-c:v', 'copy', '-bsf:v', annexb]
+            else:
+                cmd += ['-c:v', encoder, *ENCODE_ARGS, *edge_encode_args(stream)]
+                if threads:
+                    cmd += ['-threads', str(threads)]
+            cmd += ['-f', 'mpegts', '-y', part]
+
+            result = _run(cmd)
+            if result.returncode != 0:
+                print(f"Smart cut failed on {kind} segment {seg_start:.3f}-{seg_end:.3f}: {result.stderr}")
+                return False
+            parts.append(part)
+
+        list_path = os.path.join(work_dir, 'parts.txt')
+        with open(list_path, 'w') as f:
+            for part in parts:
+                f.write(f"file '{part}'\n")
+
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-ss', f"{start:.6f}", '-t', f"{end - start:.6f}", '-i', video_path,
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c:v', 'copy', '-c:a', 'aac',
+            '-avoid_negative_ts', 'make_zero',
+            '-movflags', '+faststart'
+        ]
+        timescale = track_timescale(stream)
+        if timescale:
+            cmd += ['-video_track_timescale', timescale]
+        result = _run(cmd + ['-y', output_path])
+        if result.returncode != 0:
+            print(f"Smart cut concat failed: {result.stderr}")
+            return False
+        return True
+    finally:
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
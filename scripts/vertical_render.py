@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Vertical short rendering
+Cuts, reframes to 9:16, burns in captions and normalizes loudness in one ffmpeg encode
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import metrics
+from clip_plan import ClipPlan, ClipSegment, parse_timestamp
+from media_probe import get_media_info
+from render_pool import ProgressCallback, render_parallel, run_ffmpeg
+
+WIDTH, HEIGHT = 1080, 1920
+VIDEO_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '18', '-pix_fmt', 'yuv420p']
+AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '128k', '-ar', '48000']
+# Streaming platforms normalize to about -14 LUFS
+LOUDNORM = 'loudnorm=I=-14:TP=-1.5:LRA=11'
+# libass style for SRT captions (sizes are in the 384x288 SRT script space)
+CAPTION_STYLE = ('FontName=Arial,FontSize=14,Bold=1,PrimaryColour=&H00FFFFFF,'
+                 'OutlineColour=&H00000000,BorderStyle=1,Outline=2,Alignment=2,MarginV=40')
+
+# (start seconds, end seconds, text) on the source timeline
+Cue = Tuple[float, float, str]
+
+_CUE_TIMES = re.compile(r'^\s*(\S+)\s*-->\s*(\S+)')
+
+
+def parse_srt(path: str) -> List[Cue]:
+    """Cues of an SRT file; malformed blocks are skipped"""
+    with open(path, encoding='utf-8-sig') as f:
+        blocks = re.split(r'\n\s*\n', f.read().replace('\r\n', '\n'))
+
+    cues = []
+    for block in blocks:
+        lines = block.strip().split('\n')
+        for i, line in enumerate(lines):
+            match = _CUE_TIMES.match(line)
+            if not match:
+                continue
+            try:
+                start, end = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+            except ValueError:
+                break
+            text = '\n'.join(lines[i + 1:]).strip()
+            if text and end > start:
+                cues.append((start, end, text))
+            break
+    return cues
+
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def write_clip_srt(cues: List[Cue], start: float, end: float, path: str) -> int:
+    """
+    Write the cues overlapping [start, end) shifted to clip time
+
+    Returns:
+        Number of cues written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for cue_start, cue_end, text in cues:
+            if cue_end <= start or cue_start >= end:
+                continue
+            count += 1
+            f.write(f"{count}\n{_srt_time(max(0.0, cue_start - start))} --> "
+                    f"{_srt_time(min(end, cue_end) - start)}\n{text}\n\n")
+    return count
+
+
+def _filter_path(path: str) -> str:
+    """Path usable as a filter option value"""
+    return path.replace('\\', '/').replace(':', '\\:').replace("'", "\\'")
+
+
+def build_filter_graph(crop_x: float = 0.5, captions_path: Optional[str] = None,
+                       audio: bool = True) -> str:
+    """
+    Filter graph for one vertical short
+
+    The largest 9:16 window is cropped at crop_x (0 left, 1 right) and
+    scaled to WIDTH x HEIGHT, captions are burnt in at output size and
+    audio goes through loudnorm.
+    """
+    crop_x = min(1.0, max(0.0, crop_x))
+    video = (f"[0:v]crop=w='min(iw,ih*9/16)':h='min(ih,iw*16/9)':x='(iw-ow)*{crop_x:.4f}':y='(ih-oh)/2',"
+             f"scale={WIDTH}:{HEIGHT}:flags=lanczos,setsar=1")
+    if captions_path:
+        video += f",subtitles=filename={_filter_path(captions_path)}:force_style='{CAPTION_STYLE}'"
+    graph = video + '[v]'
+    if audio:
+        graph += f";[0:a]{LOUDNORM},aresample=48000[a]"
+    return graph
+
+
+def render_vertical(
+    video_path: str,
+    segment: ClipSegment,
+    cues: Optional[List[Cue]] = None,
+    audio: bool = True,
+    threads: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None
+) -> bool:
+    """
+    Render one segment as a finished 9:16 short in a single encode
+
+    segment.metadata may set "crop_x" (0-1, default centered) to follow
+    the subject horizontally.
+    """
+    work_dir = tempfile.mkdtemp(prefix='vertical_')
+    try:
+        captions_path = None
+        if cues:
+            captions_path = os.path.join(work_dir, 'captions.srt')
+            if not write_clip_srt(cues, segment.start, segment.end, captions_path):
+                captions_path = None
+
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f"{segment.start:.6f}", '-i', video_path,
+            '-t', f"{segment.duration:.6f}",
+            '-filter_complex', build_filter_graph(
+                float(segment.metadata.get('crop_x', 0.5)), captions_path, audio
+            ),
+            '-map', '[v]'
+        ] + VIDEO_ARGS
+        if audio:
+            cmd += ['-map', '[a]'] + AUDIO_ARGS
+        if threads:
+            cmd += ['-threads', str(threads)]
+        cmd += ['-movflags', '+faststart', '-y', segment.output_path]
+
+        print(f"Rendering vertical short: {segment.start:.2f}s to {segment.end:.2f}s")
+        started = time.perf_counter()
+        result = run_ffmpeg(cmd, on_progress)
+        metrics.FFMPEG_CUT_SECONDS.observe(
+            time.perf_counter() - started,
+            result='ok' if result.returncode == 0 else 'error',
+            mode='vertical'
+        )
+        if result.returncode != 0:
+            print(f"Error rendering {segment.output_path}: {result.stderr}")
+            return False
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def render_plan(plan: ClipPlan, captions_path: Optional[str] = None,
+                workers: Optional[int] = None) -> List[bool]:
+    """
+    Render every segment of a plan as a vertical short, in parallel
+
+    Args:
+        captions_path: SRT on the source timeline, burnt into each short
+        workers: Concurrent renders (default: sized by render_pool)
+
+    Returns:
+        Success per segment, in plan order
+    """
+    cues = parse_srt(captions_path) if captions_path else None
+    audio = get_media_info(plan.source).has_audio
+
+    def render(index, threads, on_progress):
+        return render_vertical(plan.source, plan.segments[index], cues, audio, threads, on_progress)
+
+    return render_parallel(
+        [(os.path.basename(s.output_path), s.duration) for s in plan.segments],
+        render,
+        workers
+    )
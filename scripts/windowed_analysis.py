@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Windowed analysis helpers for long videos
+Plans overlapping analysis windows and merges the clips found in them
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from clip_plan import parse_timestamp
+
+WINDOW_SECONDS = 600
+# At least the longest clip we want, so every clip fits whole in some window
+OVERLAP_SECONDS = 90
+WORKERS = 4
+MAX_CLIPS = 5
+# Candidates sharing this much of the shorter one are the same moment
+DUPLICATE_OVERLAP = 0.5
+
+# (global start seconds, global end seconds, clip dict)
+Candidate = Tuple[float, float, Dict]
+
+
+def plan_windows(
+    duration: float,
+    window: float = WINDOW_SECONDS,
+    overlap: float = OVERLAP_SECONDS
+) -> List[Tuple[float, float]]:
+    """(start, end) of overlapping windows covering [0, duration)"""
+    if duration <= window:
+        return [(0.0, duration)]
+
+    step = window - overlap
+    windows = []
+    start = 0.0
+    while True:
+        end = min(start + window, duration)
+        windows.append((start, end))
+        if end >= duration:
+            return windows
+        start += step
+
+
+def format_timestamp(seconds: float) -> str:
+    """Seconds as MM:SS.mmm, or HH:MM:SS.mmm from one hour on (see clip_plan.parse_timestamp)"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+    return f"{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def to_source(clip: Dict, window: Tuple[float, float]) -> Optional[Candidate]:
+    """
+    Candidate on the source timeline for a clip found in a window
+
+    Clip times are relative to the window start; the end is clamped to
+    the window end. None if nothing of the clip is left.
+
+    Raises:
+        ValueError: if the clip's timestamps are invalid
+    """
+    window_start, window_end = window
+    start = window_start + parse_timestamp(clip['start_time'])
+    end = min(window_start + parse_timestamp(clip['end_time']), window_end)
+    if end <= start:
+        return None
+    return start, end, dict(clip, start_time=format_timestamp(start), end_time=format_timestamp(end))
+
+
+def overlap_ratio(a: Candidate, b: Candidate) -> float:
+    """Shared time as a fraction of the shorter candidate"""
+    shared = min(a[1], b[1]) - max(a[0], b[0])
+    shortest = min(a[1] - a[0], b[1] - b[0])
+    return max(0.0, shared) / shortest if shortest > 0 else 0.0
+
+
+def _score(candidate: Candidate) -> float:
+    try:
+        return float(candidate[2].get('score') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def merge_clips(candidates: List[Candidate], max_clips: int = MAX_CLIPS) -> List[Candidate]:
+    """
+    Dedupe candidates from all windows and rank them
+
+    Candidates overlapping by DUPLICATE_OVERLAP or more (typically the
+    same moment seen by two neighbouring windows) are merged, keeping
+    the best-scored (then longest) one; "votes" records how many were
+    merged. Results are ranked by score, votes, then length.
+
+    Returns:
+        At most max_clips candidates (all if max_clips is 0), best first
+    """
+    groups: List[List[Candidate]] = []
+    for candidate in sorted(candidates, key=lambda c: c[0]):
+        for group in groups:
+            if any(overlap_ratio(candidate, other) >= DUPLICATE_OVERLAP for other in group):
+                group.append(candidate)
+                break
+        else:
+            groups.append([candidate])
+
+    merged = []
+    for group in groups:
+        start, end, clip = max(group, key=lambda c: (_score(c), c[1] - c[0]))
+        merged.append((start, end, dict(clip, votes=len(group))))
+
+    merged.sort(key=lambda c: (_score(c), c[2]['votes'], c[1] - c[0]), reverse=True)
+    return merged[:max_clips] if max_clips else merged
@@ -0,0 +1,16 @@
+"""
+Test setup
+Puts scripts/ on the import path and keeps runtime state out of memory/runtime/
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+STATE_DIR = tempfile.mkdtemp(prefix='ruby_test_state_')
+# Set before any script module is imported: they resolve state paths at import time
+os.environ['RUBY_STATE_DIR'] = STATE_DIR
+os.environ['RATE_LIMIT_DIR'] = os.path.join(STATE_DIR, 'rate_limit')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
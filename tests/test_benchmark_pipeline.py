@@ -0,0 +1,16 @@
+from benchmark_pipeline import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [15, 20, 35, 40, 50]
+    assert percentile(values, 5) == 15
+    assert percentile(values, 30) == 20
+    assert percentile(values, 40) == 20
+    assert percentile(values, 50) == 35
+    assert percentile(values, 100) == 50
+
+
+def test_percentile_ignores_input_order_and_handles_edges():
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([7], 99) == 7
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,84 @@
+import pytest
+import requests
+
+import blotato_posting
+from blotato_posting import UNCONFIRMED, schedule_post, upload_media
+from job_store import MEDIA, POST, JobStore
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = str(self.body)
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = []
+
+    def post(self, url, headers=None, json=None):
+        self.sent.append((url, json))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    monkeypatch.setattr(blotato_posting, 'get_job_store', lambda: store)
+    return store
+
+
+def post(session, key='tiktok|a.mp4|t'):
+    return schedule_post(session, 'https://blotato', {}, key, {'post': {}}, 'tiktok')
+
+
+def test_scheduled_posts_are_not_sent_again(store):
+    session = FakeSession(FakeResponse(201, {'id': 'sub1'}))
+    assert post(session) == {'status': 'scheduled', 'submission_id': 'sub1'}
+    assert post(session) == {'status': 'skipped'}
+    assert len(session.sent) == 1
+    assert store.get(POST, 'tiktok|a.mp4|t')['data']['submission_id'] == 'sub1'
+
+
+def test_unanswered_posts_stay_submitting(store):
+    session = FakeSession(requests.ReadTimeout('read timed out'))
+    assert post(session)['status'] == 'error'
+    assert store.get(POST, 'tiktok|a.mp4|t')['status'] == 'submitting'
+
+    # The next run does not resend it
+    assert post(session) == {'status': 'error', 'error': UNCONFIRMED}
+    assert len(session.sent) == 1
+
+
+def test_posts_that_never_left_or_were_rejected_are_retried(store):
+    session = FakeSession(
+        requests.ConnectTimeout('connect timed out'),
+        FakeResponse(500, {'error': 'boom'}),
+        FakeResponse(200, {'submissionId': 'sub2'}),
+    )
+    assert post(session)['status'] == 'error'
+    assert store.get(POST, 'tiktok|a.mp4|t')['status'] == 'error'
+    assert post(session)['status'] == 'error'
+    assert post(session) == {'status': 'scheduled', 'submission_id': 'sub2'}
+
+
+def test_upload_media_reuses_earlier_uploads(store):
+    session = FakeSession(FakeResponse(200, {'url': 'https://blotato/m1.mp4'}))
+    assert upload_media(session, 'https://blotato', {}, 'https://cdn/a.mp4') == 'https://blotato/m1.mp4'
+    assert upload_media(session, 'https://blotato', {}, 'https://cdn/a.mp4') == 'https://blotato/m1.mp4'
+    assert len(session.sent) == 1
+    assert store.get(MEDIA, 'https://cdn/a.mp4')['status'] == 'uploaded'
+
+
+def test_upload_media_failure_is_recorded(store):
+    session = FakeSession(FakeResponse(502, {'error': 'bad gateway'}))
+    assert upload_media(session, 'https://blotato', {}, 'https://cdn/a.mp4') is None
+    assert store.get(MEDIA, 'https://cdn/a.mp4')['status'] == 'error'
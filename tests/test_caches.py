@@ -0,0 +1,81 @@
+import json
+import time
+
+import pytest
+
+from analysis_cache import AnalysisCache, normalize_instruction
+from klap_cache import KlapResultCache
+
+
+def test_klap_cache_round_trip_and_exports(tmp_path):
+    cache = KlapResultCache(tmp_path / 'klap.json')
+    cache.put('k', 'task1', 'folder1', [{'id': 'p1'}])
+    cache.put_export('k', 'p1', 'https://cdn/p1.mp4')
+
+    reloaded = KlapResultCache(tmp_path / 'klap.json')
+    assert reloaded.get('k')['task_id'] == 'task1'
+    assert reloaded.get_export('k', 'p1') == 'https://cdn/p1.mp4'
+    assert reloaded.get_export('k', 'p1', 'https://wm.png') is None
+
+
+def test_klap_cache_expires_entries_and_export_urls(tmp_path):
+    cache = KlapResultCache(tmp_path / 'klap.json', ttl=60, export_ttl=10)
+    cache.put('k', 'task1', 'folder1', [])
+    cache.put_export('k', 'p1', 'https://cdn/p1.mp4')
+
+    cache.entries['k']['exports']['p1|']['exported_at'] -= 11
+    assert cache.get_export('k', 'p1') is None
+    assert cache.get('k') is not None
+
+    cache.entries['k']['created_at'] -= 61
+    assert cache.get('k') is None
+
+
+def test_klap_cache_evicts_least_recently_used(tmp_path):
+    cache = KlapResultCache(tmp_path / 'klap.json', max_entries=2)
+    cache.put('a', 't', 'f', [])
+    cache.put('b', 't', 'f', [])
+    time.sleep(0.01)
+    cache.get('a')
+    cache.put('c', 't', 'f', [])
+
+    assert set(cache.entries) == {'a', 'c'}
+
+
+def test_klap_cache_hits_do_not_rewrite_the_file(tmp_path):
+    path = tmp_path / 'klap.json'
+    KlapResultCache(path).put('k', 't', 'f', [])
+    before = path.stat().st_mtime_ns
+
+    cache = KlapResultCache(path)
+    assert cache.get('k')
+    assert path.stat().st_mtime_ns == before
+
+    cache.flush()
+    assert json.loads(path.read_text())['k']['used_at'] == pytest.approx(cache.entries['k']['used_at'])
+
+
+def test_klap_cache_keeps_entries_written_by_other_runs(tmp_path):
+    path = tmp_path / 'klap.json'
+    first, second = KlapResultCache(path), KlapResultCache(path)
+    first.put('a', 't', 'f', [])
+    second.put('b', 't', 'f', [])
+    first.put_export('a', 'p1', 'u1')
+
+    assert set(json.loads(path.read_text())) == {'a', 'b'}
+
+
+def test_analysis_cache_lru(tmp_path):
+    cache = AnalysisCache(tmp_path / 'analysis.json', max_entries=2)
+    cache.put('a', [{'start_time': '00:01'}])
+    cache.put('b', [])
+    time.sleep(0.01)
+    assert cache.get('a') == [{'start_time': '00:01'}]
+    cache.put('c', [])
+
+    assert set(AnalysisCache(tmp_path / 'analysis.json').entries) == {'a', 'c'}
+    assert cache.get('missing') is None
+
+
+def test_normalize_instruction():
+    assert normalize_instruction('  Find   the FUNNY parts ') == 'find the funny parts'
@@ -0,0 +1,51 @@
+import pytest
+
+from clip_plan import ClipPlan, parse_timestamp
+
+
+@pytest.mark.parametrize('value, seconds', [
+    (90, 90.0),
+    (90.5, 90.5),
+    ('90.5', 90.5),
+    ('01:30', 90.0),
+    ('1:30.250', 90.25),
+    ('01:02:03.500', 3723.5),
+    ('00:01,5', 1.5),
+])
+def test_parse_timestamp(value, seconds):
+    assert parse_timestamp(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize('value', ['', 'abc', '1:60', '1:60:00', -1, float('nan'), None, True])
+def test_parse_timestamp_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+def test_plan_clamps_to_source_and_rejects_unusable_clips():
+    plan = ClipPlan.from_clips('source.mp4', [
+        {'start_time': '00:10', 'end_time': '00:20'},
+        {'start_time': '00:50', 'end_time': '01:30'},
+        {'start_time': '01:10', 'end_time': '01:20'},
+        {'start_time': '00:30', 'end_time': '00:25'},
+        {'start_time': 'soon', 'end_time': '00:25'},
+    ], duration=60)
+
+    assert [(s.start, s.end) for s in plan.segments] == [(10, 20), (50, 60)]
+    reasons = [reason for _, reason in plan.rejected]
+    assert len(reasons) == 3
+    assert 'starts after the end' in reasons[0]
+    assert reasons[1] == 'ends before it starts'
+    assert 'Invalid timestamp' in reasons[2]
+
+
+def test_spans_merge_overlapping_and_adjacent_segments():
+    plan = ClipPlan('source.mp4')
+    plan.add(30, 40)
+    plan.add(0, 10)
+    plan.add(5, 15)
+    plan.add(15.02, 20)
+
+    spans = plan.spans()
+    assert [(s.start, s.end, len(s.segments)) for s in spans] == [(0, 20, 3), (30, 40, 1)]
+    assert len(plan.spans(merge=False)) == 4
@@ -0,0 +1,33 @@
+import pytest
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from http_transport import request_sent
+
+
+def refused():
+    reason = NewConnectionError(None, 'Connection refused')
+    return requests.ConnectionError(type('MaxRetryError', (), {'reason': reason})())
+
+
+@pytest.mark.parametrize('error', [
+    requests.ConnectTimeout(),
+    requests.exceptions.SSLError(),
+    requests.exceptions.ProxyError(),
+    refused(),
+])
+def test_connect_failures_were_not_sent(error):
+    assert not request_sent(error)
+
+
+@pytest.mark.parametrize('error', [
+    requests.ReadTimeout(),
+    requests.ConnectionError('Connection aborted.'),
+    requests.exceptions.ChunkedEncodingError(),
+])
+def test_failures_after_connecting_may_have_been_sent(error):
+    assert request_sent(error)
+
+
+def test_errors_before_the_request_were_not_sent():
+    assert not request_sent(ValueError('bad payload'))
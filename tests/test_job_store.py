@@ -0,0 +1,60 @@
+import job_store
+from job_store import POST, JobStore, export_job_key
+
+
+def make_store(tmp_path):
+    return JobStore(tmp_path / 'jobs.sqlite3')
+
+
+def test_claim_sends_new_jobs_once(tmp_path):
+    store = make_store(tmp_path)
+    assert store.claim(POST, 'tiktok|a.mp4|t', {'x': 1})
+    assert store.get(POST, 'tiktok|a.mp4|t')['status'] == 'submitting'
+    assert store.get(POST, 'tiktok|a.mp4|t')['data']['payload'] == {'x': 1}
+
+    # Submitting (may have been sent) and scheduled jobs are never claimed again
+    assert not store.claim(POST, 'tiktok|a.mp4|t', {'x': 1})
+    store.update(POST, 'tiktok|a.mp4|t', 'scheduled', submission_id='s1')
+    assert not store.claim(POST, 'tiktok|a.mp4|t', {'x': 1})
+
+
+def test_failed_jobs_can_be_claimed_again(tmp_path):
+    store = make_store(tmp_path)
+    store.claim(POST, 'k', {})
+    store.fail(POST, 'k', 'HTTP 500')
+    assert store.get(POST, 'k')['error'] == 'HTTP 500'
+    assert store.claim(POST, 'k', {})
+
+
+def test_entered_at_is_the_latest_transition(tmp_path):
+    store = make_store(tmp_path)
+    assert store.entered_at('task', 'k', 'submitted') is None
+    store.update('task', 'k', 'submitted')
+    first = store.entered_at('task', 'k', 'submitted')
+    store.update('task', 'k', 'error')
+    store.update('task', 'k', 'submitted')
+    assert store.entered_at('task', 'k', 'submitted') >= first
+    assert [t['status'] for t in store.history('task', 'k')] == ['submitted', 'error', 'submitted']
+
+
+def test_export_job_key_includes_watermark():
+    assert export_job_key('f', 'p') != export_job_key('f', 'p', 'https://wm.png')
+
+
+def test_cli_resolves_stuck_jobs(tmp_path, monkeypatch, capsys):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(job_store, '_store', store)
+    store.claim(POST, 'a', {})
+    store.claim(POST, 'b', {})
+
+    assert job_store.main(['stuck', POST]) == 0
+    assert '2 unconfirmed' in capsys.readouterr().out
+
+    assert job_store.main(['confirm', POST, 'a', 'scheduled']) == 0
+    assert store.get(POST, 'a')['status'] == 'scheduled'
+    assert store.get(POST, 'a')['data']['confirmed_manually'] is True
+
+    assert job_store.main(['retry', POST, 'b']) == 0
+    assert store.claim(POST, 'b', {})
+
+    assert job_store.main(['retry', POST, 'missing']) == 1
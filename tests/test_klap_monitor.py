@@ -0,0 +1,75 @@
+import asyncio
+
+import requests
+
+import klap_monitor
+from klap_monitor import KlapMonitor, permanent_failure
+
+
+class FlakyKlap:
+    """Export status that fails `failures` times before it is ready"""
+
+    def __init__(self, failures, error=requests.ReadTimeout):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def get_export_status(self, folder_id, project_id, export_id):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        return {'status': 'ready', 'src_url': 'https://cdn/x.mp4'}
+
+
+def not_found():
+    response = requests.Response()
+    response.status_code = 404
+    return requests.HTTPError('404', response=response)
+
+
+def run(klap):
+    monitor = KlapMonitor(klap)
+    events = []
+    for event in ('ready', 'error'):
+        monitor.on(event, lambda item, event=event: events.append(event))
+    monitor.watch_export('f', 'p', 'e')
+    asyncio.run(monitor.run())
+    return events
+
+
+def test_transient_poll_failures_are_retried(monkeypatch):
+    monkeypatch.setattr(klap_monitor, 'POLL_FAILURE_MAX_DELAY', 0.01)
+    assert run(FlakyKlap(klap_monitor.MAX_POLL_FAILURES - 1)) == ['ready']
+
+
+def test_repeated_poll_failures_give_up(monkeypatch):
+    monkeypatch.setattr(klap_monitor, 'POLL_FAILURE_MAX_DELAY', 0.01)
+    klap = FlakyKlap(100)
+    assert run(klap) == ['error']
+    assert klap.calls == klap_monitor.MAX_POLL_FAILURES
+
+
+def test_client_errors_fail_at_once():
+    klap = FlakyKlap(1, not_found)
+    assert run(klap) == ['error']
+    assert klap.calls == 1
+    assert permanent_failure(not_found())
+    assert not permanent_failure(requests.ReadTimeout())
+
+
+def test_run_waits_for_items_added_later():
+    klap = FlakyKlap(0)
+    monitor = KlapMonitor(klap)
+    ready = []
+    monitor.on('ready', lambda item: ready.append(item.key))
+
+    async def add_later():
+        await asyncio.sleep(0.05)
+        monitor.watch_export('f', 'p', 'e')
+
+    async def main():
+        adding = asyncio.ensure_future(add_later())
+        await monitor.run(until=adding)
+
+    asyncio.run(main())
+    assert ready == ['export:f/p/e']
@@ -0,0 +1,72 @@
+import json
+import time
+
+import pytest
+
+import klap_polling
+from klap_polling import EtaModel, PollPolicy, PollTracker
+
+
+@pytest.fixture
+def eta(monkeypatch, tmp_path):
+    model = EtaModel(tmp_path / 'eta.json')
+    monkeypatch.setattr(klap_polling, '_eta_model', model)
+    return model
+
+
+def test_policy_backs_off_without_eta():
+    policy = PollPolicy(min_interval=2, max_interval=60, jitter=0)
+    assert [policy.next_delay(a, 0) for a in range(4)] == [2, 3, 4.5, 6.75]
+    assert policy.next_delay(100, 0) == 60
+
+
+def test_policy_halves_remaining_time_before_eta():
+    policy = PollPolicy(min_interval=2, jitter=0, eta_floor=0.5)
+    assert policy.next_delay(0, 0, eta=10) == 5
+    # A quick job is not held back by min_interval
+    assert policy.next_delay(0, 0, eta=1) == 0.5
+    # Overdue: back to min_interval, backing off from when the ETA passed
+    assert policy.next_delay(5, 11, eta=10) == 2
+    assert policy.next_delay(5, 12, eta=10) == 3
+
+
+def test_eta_model_uses_duration_when_samples_spread(eta):
+    for duration in (60, 120, 180):
+        eta.record('task', duration / 2, duration)
+    assert eta.predict('task', 240) == pytest.approx(120)
+    assert eta.predict('task') == 60
+    assert eta.predict('export') is None
+
+
+def test_eta_model_merges_samples_from_other_runs(tmp_path):
+    first, second = EtaModel(tmp_path / 'eta.json'), EtaModel(tmp_path / 'eta.json')
+    first.record('task', 10)
+    second.record('task', 20)
+    assert len(json.loads((tmp_path / 'eta.json').read_text())['task']) == 2
+
+
+def test_tracker_outcomes(eta):
+    poll = PollTracker('export', max_wait=60)
+    assert poll.observe({'status': 'processing'}) == 'pending'
+    assert poll.observe({'status': 'completed', 'src_url': 'u'}) == 'ready'
+    assert PollTracker('task', max_wait=60).observe({'status': 'error'}) == 'error'
+
+    stale = PollTracker('task', max_wait=0)
+    stale.started -= 1
+    assert stale.observe({'status': 'processing'}) == 'timeout'
+    with pytest.raises(TimeoutError):
+        stale.raise_for('timeout', {})
+
+
+def test_tracker_records_time_since_submission(eta):
+    poll = PollTracker('task', max_wait=60, duration=100, submitted_at=time.time() - 30)
+    assert poll.observe({'status': 'ready'}) == 'ready'
+    sample = eta.samples['task'][-1]
+    assert sample['duration'] == 100
+    assert sample['seconds'] == pytest.approx(30, abs=1)
+
+
+def test_tracker_falls_back_to_reported_task_duration(eta):
+    poll = PollTracker('task', max_wait=60)
+    poll.observe({'status': 'processing', 'duration': 95.0})
+    assert poll.duration == 95.0
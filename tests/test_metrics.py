@@ -0,0 +1,24 @@
+from metrics import Counter, Histogram, endpoint
+
+
+def test_endpoint_collapses_ids():
+    assert endpoint('/v2/tasks/abc123') == '/v2/tasks/{id}'
+    assert endpoint('/v2/projects/f1/p2/exports/e3') == '/v2/projects/{id}/{id}/exports/{id}'
+    assert endpoint('/v2/posts') == '/v2/posts'
+    assert endpoint('/files/abc.mp4') == '/files/{id}'
+
+
+def test_counter_values_per_label():
+    posts = Counter('test_posts_total', 'help')
+    posts.inc(platform='tiktok')
+    posts.inc(2, platform='tiktok')
+    posts.inc(platform='youtube')
+    assert posts.value(platform='tiktok') == 3
+    assert posts.value(platform='instagram') == 0
+
+
+def test_histogram_counts_observations():
+    seconds = Histogram('test_seconds', 'help', buckets=(1, 10))
+    for value in (0.5, 5, 50):
+        seconds.observe(value, kind='task')
+    assert seconds.count(kind='task') == 3
@@ -0,0 +1,62 @@
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucket, retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_DIR', tmp_path)
+    monkeypatch.setattr(rate_limit.time, 'time', clock.time)
+    monkeypatch.setattr(rate_limit.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_waits_for_refill(clock):
+    bucket = TokenBucket('test', rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_bucket_refills_up_to_burst(clock):
+    bucket = TokenBucket('test', rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_block_pauses_the_bucket(clock):
+    bucket = TokenBucket('test', rate=10, burst=10)
+    bucket.block(5)
+    bucket.acquire()
+    # Tokens refill while blocked, so the block is the only wait
+    assert clock.slept == [pytest.approx(5.0)]
+
+
+def test_retry_after_header_or_exponential():
+    assert retry_after({'Retry-After': '7'}) == 7
+    assert retry_after({}, attempt=2) == rate_limit.DEFAULT_RETRY_AFTER * 4
+    assert retry_after({'Retry-After': 'soon'}, attempt=0) == rate_limit.DEFAULT_RETRY_AFTER
@@ -0,0 +1,116 @@
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import media_probe
+from media_probe import get_media_info, scan_keyframes
+from smart_cut import edge_encode_args, plan_segments, smart_cut, track_timescale
+
+needs_ffmpeg = pytest.mark.skipif(
+    not (shutil.which('ffmpeg') and shutil.which('ffprobe')),
+    reason='ffmpeg/ffprobe not installed'
+)
+
+FPS = 25
+
+
+def test_plan_segments_copies_whole_gops():
+    assert plan_segments(0.5, 4.5, [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]) == [
+        ('encode', 0.5, 1.0), ('copy', 1.0, 4.0), ('encode', 4.0, 4.5)
+    ]
+
+
+def test_plan_segments_on_keyframes_has_no_edges():
+    assert plan_segments(1.0, 3.0, [0.0, 1.0, 2.0, 3.0]) == [('copy', 1.0, 3.0)]
+
+
+def test_plan_segments_without_two_keyframes_encodes():
+    assert plan_segments(0.2, 0.8, [0.0, 1.0]) == [('encode', 0.2, 0.8)]
+
+
+def test_edge_encode_args_match_h264_stream():
+    stream = {'codec_name': 'h264', 'pix_fmt': 'yuv420p', 'profile': 'High', 'level': 40,
+              'time_base': '1/12800'}
+    assert edge_encode_args(stream) == [
+        '-pix_fmt', 'yuv420p', '-profile:v', 'high', '-level:v', '4.0', '-enc_time_base:v', '1/12800'
+    ]
+    assert track_timescale(stream) == '12800'
+
+
+def test_edge_encode_args_map_hevc_level():
+    args = edge_encode_args({'codec_name': 'hevc', 'profile': 'Main 10', 'level': 120})
+    assert args == ['-profile:v', 'main10', '-x265-params', 'level-idc=4.0']
+
+
+def test_edge_encode_args_skip_unknown_values():
+    assert edge_encode_args({'codec_name': 'h264', 'profile': 'Unknown', 'level': -99}) == []
+    assert track_timescale({'time_base': '0/0'}) is None
+
+
+def test_scan_keyframes_detects_leading_frames(monkeypatch):
+    # Decode order; the B-frames after the second keyframe are shown before it
+    packets = '0.000,K__\n0.120,___\n0.040,___\n1.000,K__\n0.920,___\n0.960,___\n'
+    monkeypatch.setattr(media_probe, '_ffprobe', lambda args: packets)
+    assert scan_keyframes('open.mp4') == ([0.0, 1.0], True)
+
+    closed = '0.000,K__\n0.120,___\n0.040,___\n1.000,K__\n1.120,___\n1.040,___\n'
+    monkeypatch.setattr(media_probe, '_ffprobe', lambda args: closed)
+    assert scan_keyframes('closed.mp4') == ([0.0, 1.0], False)
+
+
+def _make_source(path, x264_params):
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', f"testsrc2=size=320x240:rate={FPS}:duration=6",
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-g', str(FPS), '-bf', '2',
+        '-x264-params', x264_params, '-y', str(path)
+    ], check=True, capture_output=True)
+
+
+def _frame_count(path):
+    output = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-count_frames',
+        '-show_entries', 'stream=nb_read_frames', '-of', 'csv=p=0', str(path)
+    ], check=True, capture_output=True, text=True).stdout
+    return int(output.strip())
+
+
+def _min_psnr(clip, source, start, duration):
+    """Lowest per-frame PSNR of clip against the same range of source"""
+    result = subprocess.run([
+        'ffmpeg', '-v', 'info', '-i', str(clip),
+        '-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', str(source),
+        '-lavfi', 'psnr=stats_file=-', '-f', 'null', '-'
+    ], check=True, capture_output=True, text=True)
+    return min(float(v) for v in re.findall(r'psnr_avg:(\S+)', result.stdout))
+
+
+@needs_ffmpeg
+def test_smart_cut_boundaries_match_the_source(tmp_path):
+    source = tmp_path / 'closed.mp4'
+    _make_source(source, 'open-gop=0:scenecut=0')
+    keyframes, open_gop = scan_keyframes(str(source))
+    assert not open_gop
+
+    start, end = 0.52, 4.48
+    output = tmp_path / 'clip.mp4'
+    assert smart_cut(str(source), start, end, str(output))
+
+    # Frame-accurate: exactly the frames of [start, end), each the same
+    # picture as the source frame at that time (a shift by one frame of
+    # the moving test pattern drops PSNR far below this)
+    assert _frame_count(output) == round((end - start) * FPS)
+    assert _min_psnr(output, source, start, end - start) > 35
+
+    video = get_media_info(str(output)).video
+    assert video['profile'] == get_media_info(str(source)).video['profile']
+
+
+@needs_ffmpeg
+def test_smart_cut_refuses_open_gop_sources(tmp_path):
+    source = tmp_path / 'open.mp4'
+    _make_source(source, 'open-gop=1:scenecut=0')
+    assert get_media_info(str(source)).open_gop
+
+    assert not smart_cut(str(source), 0.52, 4.48, str(tmp_path / 'clip.mp4'))
@@ -0,0 +1,41 @@
+import pytest
+
+from windowed_analysis import format_timestamp, merge_clips, plan_windows, to_source
+
+
+def test_plan_windows_overlap_and_cover_the_source():
+    assert plan_windows(300) == [(0.0, 300)]
+    assert plan_windows(1500, window=600, overlap=90) == [(0.0, 600), (510.0, 1110.0), (1020.0, 1500)]
+
+
+def test_to_source_shifts_clip_times_by_the_window_start():
+    start, end, clip = to_source({'start_time': '01:00', 'end_time': '01:30', 'score': 8}, (510.0, 1110.0))
+    assert (start, end) == (570.0, 600.0)
+    assert clip['start_time'] == '09:30.000'
+    assert clip['end_time'] == '10:00.000'
+    assert clip['score'] == 8
+
+
+def test_to_source_clamps_to_the_window_end():
+    start, end, _ = to_source({'start_time': '09:50', 'end_time': '11:00'}, (0.0, 600.0))
+    assert (start, end) == (590.0, 600.0)
+    assert to_source({'start_time': '10:10', 'end_time': '10:20'}, (0.0, 600.0)) is None
+
+
+def test_to_source_rejects_invalid_timestamps():
+    with pytest.raises(ValueError):
+        to_source({'start_time': 'later', 'end_time': '00:10'}, (0.0, 600.0))
+
+
+def test_format_timestamp():
+    assert format_timestamp(90.25) == '01:30.250'
+    assert format_timestamp(3723.5) == '01:02:03.500'
+
+
+def test_merge_clips_dedupes_window_overlaps():
+    merged = merge_clips([
+        (570.0, 600.0, {'score': 7}),
+        (572.0, 601.0, {'score': 9}),
+        (100.0, 130.0, {'score': 5}),
+    ])
+    assert [(start, clip['score'], clip['votes']) for start, _, clip in merged] == [(572.0, 9, 2), (100.0, 5, 1)]